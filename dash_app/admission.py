@@ -0,0 +1,104 @@
+"""
+Admission control of team suggestions, so a spike degrades the searches instead of timing out every request.
+
+Optimizations run in a fixed number of workers, see jobs.py. A request is admitted while the jobs waiting for a
+worker are below a degrade depth, admitted with a smaller search budget up to a reject depth, and rejected beyond it.
+Every client is also rate limited by a token bucket.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+
+
+class AdmissionDecision(Enum):
+    ADMIT = "admit"
+    DEGRADE = "degrade"
+    REJECT = "reject"
+
+
+@dataclass(frozen=True)
+class Admission:
+    """
+    Decision of the admission control for a request.
+
+    Attributes:
+        decision (AdmissionDecision): Whether the request runs, runs with a smaller budget, or is rejected.
+        reason (str): Why the request was degraded or rejected, for the user.
+    """
+
+    decision: AdmissionDecision
+    reason: str = ""
+
+
+class AdmissionController:
+    """
+    Admits, degrades or rejects requests by queue depth and per-client rate.
+
+    Args:
+        degrade_depth (int): The number of waiting jobs from which requests are degraded.
+        reject_depth (int): The number of waiting jobs from which requests are rejected.
+        rate (float): The requests per minute of every client.
+        burst (int): The requests a client can make at once.
+        max_clients (int, optional): The number of clients whose bucket is kept, the least recent ones are dropped.
+            Defaults to 10000.
+    """
+
+    def __init__(
+        self,
+        degrade_depth: int,
+        reject_depth: int,
+        rate: float,
+        burst: int,
+        max_clients: int = 10000,
+    ):
+        self.degrade_depth = degrade_depth
+        self.reject_depth = reject_depth
+        self.rate = rate / 60
+        self.burst = burst
+        self.max_clients = max_clients
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def take_token(self, client: str) -> bool:
+        now = time.monotonic()
+        with self.lock:
+            tokens, last = self.buckets.get(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            admitted = tokens >= 1
+            self.buckets[client] = (tokens - admitted, now)
+            # The buckets are kept in order of use, so the least recent clients are dropped in constant time
+            self.buckets.move_to_end(client)
+            while len(self.buckets) > self.max_clients:
+                self.buckets.popitem(last=False)
+            return admitted
+
+    def admit(self, client: str, queue_depth: int) -> Admission:
+        """
+        Decides whether a new optimization of a client runs.
+
+        Args:
+            client (str): The client, e.g. its address.
+            queue_depth (int): The number of jobs waiting for a worker.
+
+        Returns:
+            Admission: The decision.
+        """
+        if queue_depth >= self.reject_depth:
+            return Admission(
+                AdmissionDecision.REJECT,
+                "The server is busy, please try again in a moment",
+            )
+        if not self.take_token(client):
+            return Admission(
+                AdmissionDecision.REJECT,
+                "Too many team suggestions, please wait a moment",
+            )
+        if queue_depth >= self.degrade_depth:
+            return Admission(
+                AdmissionDecision.DEGRADE,
+                "The server is busy, the team was searched with a smaller budget",
+            )
+        return Admission(AdmissionDecision.ADMIT)
@@ -0,0 +1,241 @@
+"""
+JSON HTTP API of team suggestions, sharing the cache, jobs and admission control of the UI, see service.py.
+
+POST /api/optimize takes a spec, all keys but objectives optional:
+
+    {
+        "objectives": ["Attack"],
+        "types": ["fire"],
+        "generations": [[1, 151]],
+        "games": ["Red"],
+        "mono_type": false,
+        "legendaries": false,
+        "strategy": null,
+        "roles": ["is_cleric"],
+        "preselected": [{"pokemon": 6, "moves": [0, 3]}],
+        "budget": {"population_fraction": 0.5, "time_limit": 5},
+        "wait": 10
+    }
+
+Preselected Pokémon are ids as in the UI, and their moves are indexes of their knowable moves. The team is returned
+in the same format, with the global move ids as move_ids, so it can be preselected back, followed by the best
+distinct alternative teams the search found with their objective values. The request waits up to
+wait seconds for the team, 0 to return at once. An unfinished job answers 202 with its id, to poll at
+GET /api/jobs/<id>.
+"""
+
+import math
+
+from flask import Blueprint, jsonify, request
+from jobs import JobStatus
+from optimization import filter_index
+from service import (
+    cache_result,
+    client_address,
+    job_manager,
+    submit_suggestion,
+)
+from utils import move_options
+
+from poketactician.models import Roles
+from poketactician.models.Types import PokemonType
+from poketactician.objectives import ObjectiveFunctions, StrategyFunctions
+
+api = Blueprint("api", __name__, url_prefix="/api")
+
+MAX_WAIT = 60
+
+
+def string_list(spec: dict, name: str, allowed: set[str] = None) -> list[str]:
+    values = spec.get(name, [])
+    if not isinstance(values, list) or not all(
+        isinstance(value, str) for value in values
+    ):
+        raise ValueError(f"{name} must be a list of strings")
+    if allowed is not None:
+        unknown = [value for value in values if value not in allowed]
+        if unknown:
+            raise ValueError(f"Unknown {name}: {', '.join(unknown)}")
+    return values
+
+
+def finite_number(value, name: str) -> float:
+    number = float(value)
+    # nan and inf parse as floats but pass every clamp
+    if not math.isfinite(number):
+        raise ValueError(f"{name} must be a finite number")
+    return number
+
+
+def is_int(value) -> bool:
+    # JSON booleans are ints in Python
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def spec_to_request(spec: dict) -> tuple:
+    """
+    Arguments of optimization.suggest_team of a spec, in the format of the UI selections.
+
+    The spec is fully validated here, so a malformed request never takes a rate-limit token nor a worker.
+
+    Raises:
+        ValueError: If the spec is malformed.
+    """
+    if not isinstance(spec, dict):
+        raise ValueError("The spec must be a JSON object")
+    objectives = string_list(
+        spec, "objectives", {member.value for member in ObjectiveFunctions}
+    )
+    if not objectives:
+        raise ValueError("Select at least one objective")
+    strategy = spec.get("strategy")
+    if strategy is not None and strategy not in {
+        member.value for member in StrategyFunctions
+    }:
+        raise ValueError(f"Unknown strategy: {strategy}")
+    generations = spec.get("generations", [])
+    if not isinstance(generations, list) or not all(
+        isinstance(generation, list)
+        and len(generation) == 2
+        and all(is_int(bound) for bound in generation)
+        for generation in generations
+    ):
+        raise ValueError("generations must be a list of [first id, last id] pairs")
+    for name in ("mono_type", "legendaries"):
+        if not isinstance(spec.get(name, False), bool):
+            raise ValueError(f"{name} must be a boolean")
+
+    preselected = spec.get("preselected", [])
+    if not isinstance(preselected, list) or len(preselected) > 6:
+        raise ValueError("preselected must be a list of at most 6 Pokémon")
+    pre_selected = [None] * 6
+    pre_selected_moves = [None] * 24
+    for slot, pokemon in enumerate(preselected):
+        if not isinstance(pokemon, dict) or pokemon.get("pokemon") not in move_options:
+            raise ValueError("Every preselected Pokémon needs a known pokemon id")
+        moves = pokemon.get("moves", [])
+        move_count = len(move_options[pokemon["pokemon"]])
+        if (
+            not isinstance(moves, list)
+            or len(moves) > 4
+            or not all(is_int(move) and 0 <= move < move_count for move in moves)
+            or len(set(moves)) < len(moves)
+        ):
+            raise ValueError(
+                "moves must be a list of at most 4 distinct knowable-move indexes"
+            )
+        pre_selected[slot] = pokemon["pokemon"]
+        pre_selected_moves[4 * slot : 4 * slot + len(moves)] = moves
+    return (
+        objectives,
+        string_list(spec, "types", {member.value for member in PokemonType}),
+        generations,
+        string_list(spec, "games", set(filter_index.game_masks)),
+        spec.get("mono_type", False),
+        spec.get("legendaries", False),
+        strategy,
+        string_list(
+            spec, "roles", {role for role in dir(Roles) if role.startswith("is_")}
+        ),
+        pre_selected,
+        pre_selected_moves,
+    )
+
+
+def compact_team(result: dict) -> list[dict]:
+    """
+    Team of a result, every Pokémon with its id, its moves as knowable-move indexes, the format of the preselected
+    moves of a spec, and the global ids of those moves.
+    """
+    return [
+        {
+            "pokemon": pokemon["id"],
+            "name": pokemon["name"],
+            "moves": move_indexes,
+            "move_ids": [move["id"] for move in pokemon["moves"]],
+        }
+        for pokemon, move_indexes in zip(result["team"], result["move_indexes"])
+    ]
+
+
+def compact_result(result: dict, queue_wait: float = 0.0) -> dict:
+    """
+    Team of a result, with the objective value, the alternative teams and the search statistics, see compact_team.
+    """
+    return {
+        "team": compact_team(result),
+        "objective_value": result["objective_value"],
+        "alternatives": [
+            {
+                "team": compact_team(alternative),
+                "objective_value": alternative["objective_value"],
+            }
+            for alternative in result["alternatives"]
+        ],
+        "elapsed_time": result["elapsed_time"],
+        "exact_evaluations": result["exact_evaluations"],
+        "queue_wait": queue_wait,
+    }
+
+
+def job_response(job_id: str, notice: str = ""):
+    status, result = job_manager.status(job_id)
+    if status == JobStatus.PENDING:
+        return jsonify({"status": status.value, "job": job_id, "notice": notice}), 202
+    if status == JobStatus.DONE:
+        cache_result(job_id, result)
+        return jsonify(
+            {
+                "status": status.value,
+                "job": job_id,
+                "notice": notice,
+                **compact_result(result, job_manager.queue_wait(job_id)),
+            }
+        )
+    if status == JobStatus.FAILED:
+        return (
+            jsonify({"status": status.value, "job": job_id, "error": str(result)}),
+            422,
+        )
+    return jsonify({"status": status.value, "job": job_id}), 404
+
+
+@api.post("/optimize")
+def optimize():
+    spec = request.get_json(silent=True)
+    try:
+        suggestion_request = spec_to_request(spec)
+        budget = spec.get("budget")
+        if budget is not None and not isinstance(budget, dict):
+            raise ValueError("budget must be an object")
+        if budget is not None:
+            budget = {
+                "population_fraction": min(
+                    finite_number(
+                        budget.get("population_fraction", 1.0), "population_fraction"
+                    ),
+                    1.0,
+                ),
+                "time_limit": (
+                    finite_number(budget["time_limit"], "time_limit")
+                    if budget.get("time_limit") is not None
+                    else None
+                ),
+            }
+        wait = min(max(finite_number(spec.get("wait", 10), "wait"), 0), MAX_WAIT)
+    except (ValueError, TypeError, KeyError, AttributeError) as e:
+        return jsonify({"status": "invalid", "error": str(e)}), 400
+    result, job_id, notice = submit_suggestion(
+        suggestion_request, client_address(), budget
+    )
+    if result is not None:
+        return jsonify({"status": JobStatus.DONE.value, **compact_result(result)})
+    if job_id is None:
+        return jsonify({"status": "rejected", "error": notice}), 429
+    job_manager.wait(job_id, wait)
+    return job_response(job_id, notice)
+
+
+@api.get("/jobs/<job_id>")
+def job(job_id: str):
+    return job_response(job_id)
@@ -1,20 +1,67 @@
+import gc
+import logging
+
 import callbacks  # This imports the callbacks to register them with the app
 import dash_bootstrap_components as dbc
+import service
+from api import api
 from dash import Dash
 from decouple import config
+from jobs import worker_memory
 from layouts import layout
+from optimization import warm_up
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 # Initialize the Dash app
 app = Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
 app.title = "PokéTactician"
 server = app.server
 
+# Behind reverse proxies, the client address is taken from the X-Forwarded-For header they set, and only then
+trusted_proxies = config("TRUSTED_PROXIES", default=0, cast=int)
+if trusted_proxies:
+    server.wsgi_app = ProxyFix(server.wsgi_app, x_for=trusted_proxies)
+
+# Log the search engine chosen for every request, see poketactician.portfolio
+logging.basicConfig(level=config("LOG_LEVEL", "INFO"))
+
 app.layout = layout
 
+
+# JSON API of team suggestions, see api.py
+server.register_blueprint(api)
+
+
+# Hit, miss and eviction counters of the result cache
+@server.route("/cache-stats")
+def cache_stats():
+    return service.result_cache.stats()
+
+
+# Queue depth and queue-wait times of the optimization jobs
+@server.route("/job-stats")
+def job_stats():
+    return service.job_manager.stats()
+
+
 if __name__ == "__main__":
     if config("DEBUG", False, cast=bool):
         app.run(debug=True, host="0.0.0.0", port=8080)
     else:
         from waitress import serve
 
-        serve(server, host="0.0.0.0", port=8080)
+        # The optimization workers are forked once the data, tables and kernels are loaded. Freezing the objects
+        # created so far keeps the garbage collector from writing to their pages, but the reference counts of the
+        # objects a job touches still copy their pages, so the memory of the workers is measured after a warm job
+        warm_up()
+        gc.collect()
+        gc.freeze()
+        logging.info("Server memory (MB): %s", worker_memory())
+        for memory in service.job_manager.start(warm_up):
+            logging.info("Optimization worker memory after a warm job (MB): %s", memory)
+        serve(
+            server,
+            host="0.0.0.0",
+            port=8080,
+            threads=config("WAITRESS_THREADS", default=8, cast=int),
+        )
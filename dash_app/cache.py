@@ -0,0 +1,138 @@
+"""
+Cache of team-suggestion results, so a request resubmitted with the same selections is answered without searching.
+
+Entries live in a bounded in-memory LRU and expire after a time to live. With a directory, entries are also written
+to disk, one pickle per key, so a restarted server starts warm.
+"""
+
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+class ResultCache:
+    """
+    LRU cache with a time to live and an optional disk tier.
+
+    Args:
+        size (int): The maximum number of entries in memory.
+        ttl (float): The seconds an entry is valid.
+        directory (str, optional): The directory of the disk tier. Defaults to None, which disables it.
+        disk_size (int, optional): The maximum number of entries on disk. Defaults to 10 times size.
+
+    Attributes:
+        hits (int): The lookups answered, from memory or disk.
+        misses (int): The lookups not answered.
+        evictions (int): The entries dropped to keep the size bound, from memory or disk.
+        expirations (int): The entries dropped after their time to live.
+    """
+
+    def __init__(
+        self, size: int, ttl: float, directory: str = None, disk_size: int = None
+    ):
+        self.size = size
+        self.ttl = ttl
+        self.directory = directory
+        self.disk_size = disk_size if disk_size is not None else 10 * size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def get(self, key: str) -> Any | None:
+        """
+        Gets the value of a key, None if it is missing or expired.
+        """
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and now - entry[0] > self.ttl:
+                del self.entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                entry = self.read(key, now)
+                if entry is not None:
+                    self.insert(key, entry)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any):
+        entry = (time.time(), value)
+        with self.lock:
+            self.insert(key, entry)
+        if self.directory:
+            self.write(key, entry)
+
+    def insert(self, key: str, entry: tuple[float, Any]):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def read(self, key: str, now: float) -> tuple[float, Any] | None:
+        if not self.directory:
+            return None
+        try:
+            with open(self.path(key), "rb") as cache_file:
+                entry = pickle.load(cache_file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if now - entry[0] > self.ttl:
+            self.remove(key)
+            self.expirations += 1
+            return None
+        return entry
+
+    def write(self, key: str, entry: tuple[float, Any]):
+        # Written under a temporary name and renamed, so a reader never sees a partial entry
+        temporary_path = f"{self.path(key)}.{os.getpid()}.{threading.get_ident()}"
+        try:
+            with open(temporary_path, "wb") as cache_file:
+                pickle.dump(entry, cache_file)
+            os.replace(temporary_path, self.path(key))
+            files = sorted(
+                (
+                    entry_file
+                    for entry_file in os.scandir(self.directory)
+                    if entry_file.name.endswith(".pkl")
+                ),
+                key=lambda entry_file: entry_file.stat().st_mtime,
+            )
+        except OSError:
+            return
+        with self.lock:
+            for entry_file in files[: max(len(files) - self.disk_size, 0)]:
+                self.remove(entry_file.name[: -len(".pkl")])
+                self.evictions += 1
+
+    def remove(self, key: str):
+        try:
+            os.remove(self.path(key))
+        except OSError:
+            pass
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -1,6 +1,6 @@
 import sys
 
-from components import BlankPokemonTeam, PokemonTeam
+from components import BlankPokemonTeam, TeamSuggestion
 from dash import (
     ALL,
     MATCH,
@@ -11,109 +11,37 @@ from dash import (
     clientside_callback,
     no_update,
 )
-from filters import (
-    filter_games,
-    filter_generations,
-    filter_legendaries,
-    filter_types,
-    hand_removed,
-    remove_battle_only,
-    remove_megas,
-    remove_totems,
-    split_preselected,
-)
+from jobs import JobStatus
 
 sys.path.append(sys.path[0] + "/..")
-import time
-
-from utils import generate_move_list_and_selector_status
-
-from poketactician.glob_var import Q, alpha, beta, pok_pre_filter, rho
-from poketactician.MOACO import MOACO
-from poketactician.models.Pokemon import Pokemon
-from poketactician.objectives import ObjectiveFunctions, StrategyFunctions
-
-
-def preprocess_moves(pre_selected_moves: list[int | None]) -> list[list[int]]:
-    """
-    Preprocess pre-selected moves into lists.
-    """
-    move_lists = [[] for _ in range(6)]
-    for idx, move in enumerate(pre_selected_moves):
-        if move is not None:
-            move_lists[idx // 4].append(int(move))
-    return move_lists
-
-
-def filter_pokemon_list(
-    pre_selected: list[int],
-    included_types: list[str],
-    mono_type: bool,
-    generations: list[list[int]],
-    include_legendaries: bool,
-    games: list[str],
-):
-    """
-    Apply filters to the Pokémon list.
-    """
-    pok_list = hand_removed(pok_pre_filter)
-    pok_list = remove_megas(pok_list)
-    pok_list = remove_battle_only(pok_list)
-    pok_list = remove_totems(pok_list)
-    pre_selected, pok_list = split_preselected(pok_list, pre_selected)
-    pok_list = filter_types(pok_list, included_types, mono_type)
-    pok_list = filter_generations(pok_list, generations)
-    pok_list = filter_legendaries(pok_list, include_legendaries)
-    pok_list = filter_games(pok_list, games)
-    return pre_selected + pok_list
-
-
-def define_objective_functions(
-    obj_funcs_param: list[int], strategy: str, pok_list: list[Pokemon]
-):
-    """
-    Define the objective functions for team optimization.
-    """
-    objective_funcs = []
-    for objective_function in obj_funcs_param:
-        objective_funcs.append(
-            ObjectiveFunctions(objective_function).get_function(pok_list)
-        )
-    if strategy:
-        objective_funcs.append(StrategyFunctions(strategy).get_function(pok_list))
-    return objective_funcs
+from optimization import filter_index
+from service import cache_result, client_address, job_manager, submit_suggestion
+from utils import generate_move_list_and_selector_status, species_options
 
 
-def optimize_team_selection(
-    pok_list: list[Pokemon],
-    pre_selected: list[int],
-    pre_selected_moves_lists: list[list[int]],
-    objective_funcs: list[tuple[callable, float, float]],
-    roles: list[str],
-):
+def team_outputs(result: dict, queue_wait: float = 0.0) -> tuple:
     """
-    Optimize team selection using MOACO algorithm.
+    Team output, blank team visibility and tracked data of a team-suggestion result.
     """
-    m_col = MOACO(
-        400,
-        objective_funcs,
-        pok_list,
-        list(range(len(pre_selected))),
-        pre_selected_moves_lists,
-        alpha,
-        beta,
-        roles=roles,
+    return (
+        TeamSuggestion(result).layout(),
+        True,
+        [
+            result["elapsed_time"],
+            result["objective_value"],
+            result["exact_evaluations"],
+            queue_wait,
+        ],
     )
 
-    m_col.optimize(iters=25, time_limit=None)
-    return m_col.get_solution(), m_col.get_objective_value()
-
 
 @callback(
     Output("time-to-calc", "children"),
+    Output("job-store", "data"),
+    Output("job-interval", "disabled"),
     Output("team-output", "children", allow_duplicate=True),
     Output("blank-team-output", "hidden", allow_duplicate=True),
-    Output("memory-output", "data"),
+    Output("memory-output", "data", allow_duplicate=True),
     Output("filter-drawer", "opened", allow_duplicate=True),
     Output("filter-button", "opened", allow_duplicate=True),
     [
@@ -132,7 +60,7 @@ def optimize_team_selection(
     ],
     prevent_initial_call=True,
 )
-def update_output(
+def submit_team_suggestion(
     n_clicks,
     obj_funcs_param,
     included_types,
@@ -147,10 +75,9 @@ def update_output(
     screen_width,
 ):
     """
-    Callback to update team output based on user selections and screen width.
+    Callback to submit the team suggestion of the user selections and screen width as a background job, unless
+    the same request was already solved, see service.submit_suggestion.
     """
-    pre_selected_moves_lists = preprocess_moves(pre_selected_moves)
-
     # Adjust parameters based on screen width
     if screen_width:
         idx = 0 if screen_width > 768 else 1
@@ -164,58 +91,99 @@ def update_output(
         strategy = strategy[idx]
         roles = roles[idx]
     elif screen_width is None or n_clicks is None:
-        return "", "", "", "", False
+        return "", None, True, no_update, no_update, no_update, False, False
 
     # Check if there are objective functions selected
     if not obj_funcs_param:
-        return no_update, no_update, no_update, no_update, no_update, no_update
-
+        return (no_update,) * 8
+
+    request = (
+        obj_funcs_param,
+        included_types,
+        generations,
+        games,
+        mono_type,
+        include_legendaries,
+        strategy,
+        roles,
+        pre_selected,
+        pre_selected_moves,
+    )
     try:
-        # Filter and process pre-selected moves
-        pre_selected_moves_lists = [
-            move_list
-            for i, move_list in enumerate(pre_selected_moves_lists)
-            if pre_selected[i]
-        ]
-        pre_selected = [int(p) - 1 for p in pre_selected if p is not None]
-
-        # Apply filters to the Pokémon list
-        pok_list = filter_pokemon_list(
-            pre_selected,
-            included_types,
-            mono_type,
-            generations,
-            include_legendaries,
-            games,
-        )
-
-        # Check if any Pokémon remain after filtering
-        if not pok_list:
-            raise ValueError("No Pokémon available with current filter selection")
+        result, job_id, notice = submit_suggestion(request, client_address())
+    except Exception as e:
+        return str(e), None, True, no_update, no_update, no_update, no_update, False
+    if result is not None:
+        return "", None, True, *team_outputs(result), False, False
+    if job_id is None:
+        return notice, None, True, no_update, no_update, no_update, False, False
+    return (
+        "Optimizing team...",
+        {"id": job_id, "notice": notice},
+        False,
+        no_update,
+        no_update,
+        no_update,
+        False,
+        False,
+    )
 
-        # Define objective functions
-        objective_funcs = define_objective_functions(
-            obj_funcs_param, strategy, pok_list
-        )
-        # Optimize team selection
-        start_time = time.time()
-        team, obj_value = optimize_team_selection(
-            pok_list, pre_selected, pre_selected_moves_lists, objective_funcs, roles
-        )
-        elapsed_time = time.time() - start_time
 
+@callback(
+    Output("time-to-calc", "children", allow_duplicate=True),
+    Output("team-output", "children", allow_duplicate=True),
+    Output("blank-team-output", "hidden", allow_duplicate=True),
+    Output("memory-output", "data", allow_duplicate=True),
+    Output("job-interval", "disabled", allow_duplicate=True),
+    Input("job-interval", "n_intervals"),
+    State("job-store", "data"),
+    prevent_initial_call=True,
+)
+def poll_team_suggestion(_, job):
+    """
+    Callback to show the suggested team once its background job is done.
+    """
+    if job is None:
+        return no_update, no_update, no_update, no_update, True
+    status, result = job_manager.status(job["id"])
+    if status == JobStatus.PENDING:
+        return no_update, no_update, no_update, no_update, no_update
+    if status == JobStatus.DONE:
+        cache_result(job["id"], result)
         return (
-            "",
-            PokemonTeam(team.serialize()).layout(),
+            job["notice"],
+            *team_outputs(result, job_manager.queue_wait(job["id"])),
             True,
-            [elapsed_time, obj_value],
-            False,
-            False,
         )
-    except ValueError as ve:
-        return str(ve), "", True, "", "", False
-    except Exception as e:
-        return str(e), "", True, "", "", False
+    if status == JobStatus.FAILED:
+        return str(result), "", True, "", True
+    return "The team suggestion expired, please try again", "", True, "", True
+
+
+# Callback to preview the Pokémon pool of the filters before optimizing
+@callback(
+    Output({"type": "pool-size", "suffix": MATCH}, "children"),
+    Output({"type": "pool-size", "suffix": MATCH}, "color"),
+    Input({"type": "type-multi-select", "suffix": MATCH}, "value"),
+    Input({"type": "mono-type", "suffix": MATCH}, "checked"),
+    Input({"type": "gen-multi-select", "suffix": MATCH}, "value"),
+    Input({"type": "legendaries", "suffix": MATCH}, "checked"),
+    Input({"type": "game-multi-select", "suffix": MATCH}, "value"),
+)
+def preview_pool(included_types, mono_type, generations, include_legendaries, games):
+    try:
+        count, preview = filter_index.preview(
+            included_types, mono_type, generations, include_legendaries, games
+        )
+    except (ValueError, KeyError):
+        return "Unknown filter selection", "red"
+    if count == 0:
+        return "No Pokémon match these filters", "red"
+    names = ", ".join(pok.name.title() for pok in preview)
+    return (
+        f"{count} Pokémon match: {names}{', ...' if count > len(preview) else ''}",
+        "dimmed",
+    )
 
 
 #################### LAYOUT CALLBACKS ####################
@@ -224,12 +192,7 @@ def update_output(
 # Callback to insert the BlankPokemonTeam dynamically upon page load
 @callback(Output("blank-team-output", "children"), Input("url", "pathname"))
 def display_page(_):
-    pokemon_list = remove_megas(pok_pre_filter)
-    pokemon_list = remove_battle_only(pokemon_list)
-    pokemon_team = [
-        {"value": pok.id, "label": pok.name.title()} for pok in pokemon_list
-    ]
-    return BlankPokemonTeam(pokemon_team).layout()
+    return BlankPokemonTeam(species_options).layout()
 
 
 @callback(
@@ -265,6 +228,7 @@ def open(opened):
 #################### PRESELECTED POKEMON AND MOVE CALLBACKS ####################
 @callback(
     Output({"type": "preSelect-image", "suffix": MATCH}, "src"),
+    Output({"type": "preSelect-move-store", "suffix": MATCH}, "data"),
     Output({"type": "preSelect-move-selector", "suffix": MATCH, "move": 0}, "data"),
     Output({"type": "preSelect-move-selector", "suffix": MATCH, "move": 0}, "disabled"),
     Input({"type": "preSelect-selector", "suffix": MATCH}, "value"),
@@ -273,51 +237,9 @@ def preSelected_images(value):
     image = "/assets/qmark.png"
     if value:
         image = f"https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/{value}.png"
-    return image, *generate_move_list_and_selector_status(value)
-
-
-@callback(
-    Output({"type": "preSelect-move-selector", "suffix": MATCH, "move": 1}, "data"),
-    Output({"type": "preSelect-move-selector", "suffix": MATCH, "move": 1}, "disabled"),
-    State({"type": "preSelect-selector", "suffix": MATCH}, "value"),
-    Input({"type": "preSelect-move-selector", "suffix": MATCH, "move": 0}, "value"),
-)
-def preSelected_images(pok_id, move_id):
-    return generate_move_list_and_selector_status(
-        pok_id,
-        [
-            move_id,
-        ],
-    )
-
-
-@callback(
-    Output({"type": "preSelect-move-selector", "suffix": MATCH, "move": 2}, "data"),
-    Output({"type": "preSelect-move-selector", "suffix": MATCH, "move": 2}, "disabled"),
-    State({"type": "preSelect-selector", "suffix": MATCH}, "value"),
-    State({"type": "preSelect-move-selector", "suffix": MATCH, "move": 0}, "value"),
-    Input({"type": "preSelect-move-selector", "suffix": MATCH, "move": 1}, "value"),
-)
-def preSelected_images(
-    pok_id,
-    move_id_1,
-    move_id_2,
-):
-    return generate_move_list_and_selector_status(pok_id, [move_id_1, move_id_2])
-
-
-@callback(
-    Output({"type": "preSelect-move-selector", "suffix": MATCH, "move": 3}, "data"),
-    Output({"type": "preSelect-move-selector", "suffix": MATCH, "move": 3}, "disabled"),
-    State({"type": "preSelect-selector", "suffix": MATCH}, "value"),
-    State({"type": "preSelect-move-selector", "suffix": MATCH, "move": 0}, "value"),
-    State({"type": "preSelect-move-selector", "suffix": MATCH, "move": 1}, "value"),
-    Input({"type": "preSelect-move-selector", "suffix": MATCH, "move": 2}, "value"),
-)
-def preSelected_images(pok_id, move_id_1, move_id_2, move_id_3):
-    return generate_move_list_and_selector_status(
-        pok_id, [move_id_1, move_id_2, move_id_3]
-    )
+    move_list, move_selector_disabled = generate_move_list_and_selector_status(value)
+    # The move list of the species is sent once, the next move selectors are chained in the browser
+    return image, move_list if value else [], move_list, move_selector_disabled
 
 
 #################### CLIENTSIDE CALLBACKS ####################
@@ -326,7 +248,7 @@ def preSelected_images(pok_id, move_id_1, move_id_2, move_id_3):
 clientside_callback(
     """
     function(data){
-        console.log(`Time to compute: ${data[0]} - Objective Value: ${data[1]}`);
+        console.log(`Time to compute: ${data[0]} - Objective Value: ${data[1]} - Exact Evaluations: ${data[2]} - Queue Wait: ${data[3]}`);
         return ''
     }
     """,
@@ -335,6 +257,39 @@ clientside_callback(
     prevent_initial_call=True,
 )
 
+# Chain the move selectors of a preselected Pokémon, each one without the moves already selected
+for move in range(1, 4):
+    clientside_callback(
+        """
+        function(lastMove, moves, ...previousMoves) {
+            if (!moves || moves.length === 0) {
+                return [["------"], true];
+            }
+            const selected = previousMoves.concat([lastMove]);
+            return [moves.filter((option) => !selected.includes(option.value)), false];
+        }
+        """,
+        Output(
+            {"type": "preSelect-move-selector", "suffix": MATCH, "move": move}, "data"
+        ),
+        Output(
+            {"type": "preSelect-move-selector", "suffix": MATCH, "move": move},
+            "disabled",
+        ),
+        Input(
+            {"type": "preSelect-move-selector", "suffix": MATCH, "move": move - 1},
+            "value",
+        ),
+        State({"type": "preSelect-move-store", "suffix": MATCH}, "data"),
+        *[
+            State(
+                {"type": "preSelect-move-selector", "suffix": MATCH, "move": previous},
+                "value",
+            )
+            for previous in range(move - 1)
+        ],
+    )
+
 # Track screen width
 clientside_callback(
     """
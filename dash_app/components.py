@@ -107,6 +107,41 @@ class PokemonTeam:
         )
 
 
+class TeamSuggestion:
+    """
+    Suggested team and the alternative teams of the same search, one tab each, so another team is shown without
+    searching again.
+    """
+
+    def __init__(self, result: dict):
+        self.teams = [("Suggested team", result["team"])] + [
+            (
+                f"Alternative {index} ({alternative['objective_value'] / result['objective_value']:.0%})",
+                alternative["team"],
+            )
+            for index, alternative in enumerate(result["alternatives"], 1)
+        ]
+
+    def layout(self):
+        if len(self.teams) == 1:
+            return PokemonTeam(self.teams[0][1]).layout()
+        return dmc.Tabs(
+            [
+                dmc.TabsList(
+                    [
+                        dmc.Tab(label, value=str(index))
+                        for index, (label, _) in enumerate(self.teams)
+                    ]
+                )
+            ]
+            + [
+                dmc.TabsPanel(PokemonTeam(team).layout(), value=str(index))
+                for index, (_, team) in enumerate(self.teams)
+            ],
+            value="0",
+        )
+
+
 class BlankPokemonCard:
     def __init__(self, pokemon_list: list[dict], id: str):
         self.pokemon_list = pokemon_list
@@ -144,6 +179,8 @@ class BlankPokemonCard:
                     inheritPadding=True,
                     py="xs",
                 ),
+                # Move list of the selected species, for the clientside move selector chaining
+                dcc.Store(id={"type": "preSelect-move-store", "suffix": self.id}),
                 dmc.CardSection(
                     children=[
                         dmc.SimpleGrid(
@@ -333,6 +370,8 @@ def filter_components(suffix: str):
             style={"paddingLeft": 0},
         ),
         html.Br(),
+        dmc.Text(id={"type": "pool-size", "suffix": suffix}, size="sm"),
+        html.Br(),
         dmc.Button(
             "Suggest Team",
             leftIcon=DashIconify(icon="ic:twotone-catching-pokemon"),
@@ -0,0 +1,260 @@
+"""
+Local background jobs, so long optimizations run in worker processes instead of the threads serving the requests.
+
+A job is submitted with an id the UI keeps and polls until the result is ready. Finished jobs are forgotten after a
+time to live, whether their result was collected or not. Jobs submitted with the key of a job that is running, or
+that succeeded and is still kept, get the id of that job, so concurrent identical requests share one run. The time
+every job waited for a worker is logged and kept for the stats.
+
+On Linux the workers started by JobManager.start are forked, so they share the memory of the data the server loaded
+before starting them. Start them once everything is loaded and before serving, instead of on the first job. Pools
+created later, on the first job when start was not called or to replace a broken pool, are started from a fork
+server instead, as forking a process that already runs threads copies the locks those threads hold.
+"""
+
+import logging
+import multiprocessing
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from enum import Enum
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(Enum):
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+    MISSING = "missing"
+
+
+def timed_job(fn: Callable, submitted_at: float, *args) -> tuple[float, Any]:
+    """
+    Runs a job in a worker, returning the seconds it waited for the worker with its result.
+    """
+    return time.time() - submitted_at, fn(*args)
+
+
+def worker_memory(delay: float = 0.0) -> dict:
+    """
+    Memory of the current process in MB, the proportional and private sizes show how much of it is shared.
+
+    Args:
+        delay (float, optional): The seconds to wait first, so jobs submitted together run in different workers.
+            Defaults to 0.
+    """
+    time.sleep(delay)
+    memory = {"pid": multiprocessing.current_process().pid}
+    try:
+        with open("/proc/self/smaps_rollup", "r") as smaps_file:
+            sizes = {
+                line.split(":")[0]: int(line.split()[1]) / 1024
+                for line in smaps_file
+                if line.endswith("kB\n")
+            }
+        memory["rss"] = sizes["Rss"]
+        memory["pss"] = sizes["Pss"]
+        memory["private"] = sizes["Private_Clean"] + sizes["Private_Dirty"]
+    except (OSError, KeyError):
+        import resource
+
+        memory["rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return memory
+
+
+def warm_worker(job: Callable | None, delay: float) -> dict:
+    """
+    Runs a warm-up job in a worker and returns its memory after it, see worker_memory.
+    """
+    if job is not None:
+        job()
+    return worker_memory(delay)
+
+
+class JobManager:
+    """
+    Runs jobs in a pool of worker processes, started on the first job or by start.
+
+    Args:
+        workers (int): The number of worker processes.
+        ttl (float, optional): The seconds a finished job is kept. Defaults to 600.
+    """
+
+    def __init__(self, workers: int, ttl: float = 600):
+        self.workers = workers
+        self.ttl = ttl
+        self.executor = None
+        self.jobs = {}
+        self.finished_at = {}
+        self.keys = {}
+        self.queue_waits = deque(maxlen=100)
+        self.lock = threading.Lock()
+
+    def new_executor(self, fork: bool = False) -> ProcessPoolExecutor:
+        # Forked workers share the pages of the loaded data until they write to them, which is only safe while the
+        # process runs no other thread
+        context = (
+            multiprocessing.get_context("fork" if fork else "forkserver")
+            if sys.platform == "linux"
+            else None
+        )
+        return ProcessPoolExecutor(self.workers, mp_context=context)
+
+    def start(self, warm_up: Callable = None) -> list[dict]:
+        """
+        Starts the workers, forking them from the current state of the process, call it before serving any request.
+
+        Args:
+            warm_up (Callable, optional): A module-level job every worker runs before its memory is measured, so the
+                memory reflects the pages a job writes to. Defaults to None.
+
+        Returns:
+            List[dict]: The memory of every worker, see worker_memory.
+        """
+        with self.lock:
+            if self.executor is None:
+                self.executor = self.new_executor(fork=True)
+            futures = [
+                self.executor.submit(warm_worker, warm_up, 0.2)
+                for _ in range(self.workers)
+            ]
+        memories = {}
+        for future in futures:
+            memory = future.result()
+            memories[memory["pid"]] = memory
+        return list(memories.values())
+
+    def shared_job(self, key: str) -> str | None:
+        """
+        Gets the id of the job a job of a key would share, None if it would run.
+        """
+        with self.lock:
+            return self.find_shared_job(key)
+
+    def find_shared_job(self, key: str) -> str | None:
+        # Callers hold the lock, as purge removes jobs before their keys
+        future = self.jobs.get(self.keys.get(key))
+        if future is not None and (not future.done() or future.exception() is None):
+            return self.keys[key]
+        return None
+
+    def job_key(self, job_id: str) -> str | None:
+        """
+        Gets the key a job was submitted with, None for a job without one.
+        """
+        with self.lock:
+            return next(
+                (key for key, key_job_id in self.keys.items() if key_job_id == job_id),
+                None,
+            )
+
+    def queue_depth(self) -> int:
+        """
+        Gets the number of jobs waiting for a worker.
+        """
+        with self.lock:
+            unfinished = sum(not future.done() for future in set(self.jobs.values()))
+        return max(unfinished - self.workers, 0)
+
+    def submit(self, fn: Callable, *args, key: str = None) -> str:
+        """
+        Submits a job, unless a job of the same key is running or succeeded.
+
+        Args:
+            fn (Callable): The job, a module-level function so it can be sent to the workers.
+            *args: The arguments of the job.
+            key (str, optional): The key of the problem the job solves. Defaults to None, which never shares the job.
+
+        Returns:
+            str: The id of the job.
+        """
+        with self.lock:
+            self.purge()
+            job_id = self.find_shared_job(key)
+            if job_id is not None:
+                return job_id
+            if self.executor is None:
+                self.executor = self.new_executor()
+            try:
+                future = self.executor.submit(timed_job, fn, time.time(), *args)
+            except BrokenProcessPool:
+                # A worker died, e.g. out of memory, so the pool is replaced
+                self.executor = self.new_executor()
+                future = self.executor.submit(timed_job, fn, time.time(), *args)
+            job_id = uuid.uuid4().hex
+            self.jobs[job_id] = future
+            if key is not None:
+                self.keys[key] = job_id
+            future.add_done_callback(self.mark_finished)
+            return job_id
+
+    def mark_finished(self, future: Future):
+        self.finished_at[future] = time.monotonic()
+        if not future.cancelled() and future.exception() is None:
+            queue_wait = future.result()[0]
+            self.queue_waits.append(queue_wait)
+            logger.info("Job waited %.3f s for a worker", queue_wait)
+
+    def purge(self):
+        now = time.monotonic()
+        for job_id, future in list(self.jobs.items()):
+            if now - self.finished_at.get(future, now) > self.ttl:
+                del self.jobs[job_id]
+                del self.finished_at[future]
+        for key, job_id in list(self.keys.items()):
+            if job_id not in self.jobs:
+                del self.keys[key]
+
+    def status(self, job_id: str) -> tuple[JobStatus, Any]:
+        """
+        Gets the status of a job.
+
+        Returns:
+            Tuple[JobStatus, Any]: The status of the job, with its result when done or its exception when failed.
+        """
+        with self.lock:
+            future = self.jobs.get(job_id)
+        if future is None:
+            return JobStatus.MISSING, None
+        if not future.done():
+            return JobStatus.PENDING, None
+        exception = future.exception()
+        if exception is not None:
+            return JobStatus.FAILED, exception
+        return JobStatus.DONE, future.result()[1]
+
+    def wait(self, job_id: str, timeout: float):
+        """
+        Waits up to timeout seconds for a job to finish.
+        """
+        with self.lock:
+            future = self.jobs.get(job_id)
+        if future is not None:
+            wait([future], timeout)
+
+    def queue_wait(self, job_id: str) -> float | None:
+        """
+        Gets the seconds a finished job waited for a worker, None if it is not done.
+        """
+        with self.lock:
+            future = self.jobs.get(job_id)
+        if future is None or not future.done() or future.exception() is not None:
+            return None
+        return future.result()[0]
+
+    def stats(self) -> dict:
+        queue_waits = list(self.queue_waits)
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue_depth(),
+            "mean_queue_wait": (
+                sum(queue_waits) / len(queue_waits) if queue_waits else 0.0
+            ),
+            "max_queue_wait": max(queue_waits, default=0.0),
+        }
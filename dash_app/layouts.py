@@ -16,6 +16,9 @@ layout = html.Div(
         dcc.Location(id="url", refresh=False),
         dcc.Store(id="memory-output"),
         dcc.Store(id="screen-width-store"),
+        # Id of the running team suggestion, polled until its result is ready
+        dcc.Store(id="job-store"),
+        dcc.Interval(id="job-interval", interval=500, disabled=True),
         # Hidden div to listen
         html.Div(id="resize-listener", style={"display": "none"}),
         # Start actual layout
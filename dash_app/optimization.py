@@ -0,0 +1,345 @@
+"""
+Optimization pipeline of a team-suggestion request, from the selections of the UI to a serializable result.
+
+It does not depend on Dash, so requests run in the background job workers, see jobs.py.
+"""
+
+import hashlib
+import json
+import time
+
+from filters import FilterIndex
+
+from poketactician.engines import SolverEngine, create_solver
+from poketactician.features import RequestFeatures
+from poketactician.glob_var import (
+    alpha,
+    beta,
+    iterations,
+    local_search_evaluations,
+    local_search_time,
+    pok_pre_filter,
+    suggested_alternatives,
+    surrogate_fraction,
+    total_population,
+    use_movesets,
+)
+from poketactician.models.Pokemon import Pokemon
+from poketactician.models.Team import Team
+from poketactician.objectives import ObjectiveFunctions, StrategyFunctions
+from poketactician.portfolio import Portfolio, PortfolioChoice
+
+# Version of the result format of suggest_team, part of the request key
+RESULT_FORMAT = 4
+
+# Engine and settings chosen per request from the rules fitted on benchmark data, python -m poketactician.portfolio
+portfolio = Portfolio.load()
+# Boolean mask index of the Pokémon list, built once per process
+filter_index = FilterIndex(pok_pre_filter)
+
+
+def preprocess_moves(pre_selected_moves: list[int | None]) -> list[list[int]]:
+    """
+    Preprocess pre-selected moves into lists.
+    """
+    move_lists = [[] for _ in range(6)]
+    for idx, move in enumerate(pre_selected_moves):
+        if move is not None:
+            move_lists[idx // 4].append(int(move))
+    return move_lists
+
+
+def filter_pokemon_list(
+    pre_selected: list[int],
+    included_types: list[str],
+    mono_type: bool,
+    generations: list[list[int]],
+    include_legendaries: bool,
+    games: list[str],
+):
+    """
+    Apply filters to the Pokémon list.
+    """
+    return filter_index.filter(
+        pre_selected, included_types, mono_type, generations, include_legendaries, games
+    )
+
+
+def define_objective_functions(
+    obj_funcs_param: list[int], strategy: str, pok_list: list[Pokemon]
+):
+    """
+    Define the objective functions for team optimization.
+    """
+    objective_funcs = []
+    for objective_function in obj_funcs_param:
+        objective_funcs.append(
+            ObjectiveFunctions(objective_function).get_function(pok_list)
+        )
+    if strategy:
+        objective_funcs.append(StrategyFunctions(strategy).get_function(pok_list))
+    return objective_funcs
+
+
+def define_objective_structures(
+    obj_funcs_param: list[int], strategy: str, pok_list: list[Pokemon]
+):
+    """
+    Define the cached colony structures of each objective function, aligned with define_objective_functions.
+    """
+    objective_structures = []
+    for objective_function in obj_funcs_param:
+        objective_structures.append(
+            ObjectiveFunctions(objective_function).get_pool_structures(
+                pok_list, beta, use_movesets
+            )
+        )
+    if strategy:
+        objective_structures.append(
+            StrategyFunctions(strategy).get_pool_structures(pok_list, beta)
+        )
+    return objective_structures
+
+
+def define_batch_objective_functions(
+    obj_funcs_param: list[int], strategy: str, pok_list: list[Pokemon]
+):
+    """
+    Define the vectorized objective functions, aligned with define_objective_functions.
+    """
+    batch_objective_funcs = []
+    for objective_function in obj_funcs_param:
+        batch_objective_funcs.append(
+            ObjectiveFunctions(objective_function).get_batch_function(pok_list)
+        )
+    if strategy:
+        batch_objective_funcs.append(
+            StrategyFunctions(strategy).get_batch_function(pok_list)
+        )
+    return batch_objective_funcs
+
+
+def optimize_team_selection(
+    pok_list: list[Pokemon],
+    pre_selected: list[int],
+    pre_selected_moves_lists: list[list[int]],
+    objective_funcs: list[tuple[callable, float, float]],
+    roles: list[str],
+    objective_structures: list = None,
+    batch_objective_funcs: list = None,
+    seed: int = None,
+    engine: str = None,
+    population_fraction: float = 1.0,
+    time_limit: float = None,
+):
+    """
+    Optimize team selection with the engine and settings the portfolio chooses for the request, or with the default
+    settings of the engine named by engine, a member of SolverEngine. The population can be shrunk and the search
+    cut short, to bound the compute of a request when the server is busy.
+
+    Returns:
+        tuple: The best team, its objective value, the number of exact evaluations, and the best distinct teams of
+            the run after it with their objective values, at most suggested_alternatives.
+    """
+    preselected_pokemons = list(range(len(pre_selected)))
+    if engine is None:
+        choice = portfolio.choose(
+            RequestFeatures.from_request(
+                pok_list, preselected_pokemons, objective_funcs, batch_objective_funcs
+            )
+        )
+    else:
+        choice = PortfolioChoice(
+            SolverEngine[engine], total_population, iterations, reason="requested"
+        )
+    engine_options = {}
+    if choice.engine == SolverEngine.MOACO:
+        # Only the objectives without a vectorized function are expensive enough to screen
+        engine_options["surrogate_fraction"] = [
+            surrogate_fraction if batch_objective_func is None else None
+            for batch_objective_func in (
+                batch_objective_funcs or [None] * len(objective_funcs)
+            )
+        ]
+    engine_options.update(choice.options)
+    solver = create_solver(
+        choice.engine,
+        max(int(choice.total_population * population_fraction), 10),
+        objective_funcs,
+        pok_list,
+        preselected_pokemons,
+        pre_selected_moves_lists,
+        alpha,
+        beta,
+        roles=roles,
+        batch_objective_functions=batch_objective_funcs,
+        local_search_evaluations=local_search_evaluations,
+        local_search_time=local_search_time,
+        seed=seed,
+        objective_structures=objective_structures,
+        **engine_options,
+    )
+
+    solver.optimize(iters=choice.iterations, time_limit=time_limit)
+    return (
+        solver.get_solution(),
+        solver.get_objective_value(),
+        solver.get_exact_evaluations(),
+        solver.get_alternatives(suggested_alternatives),
+    )
+
+
+def serialize_team(team: Team) -> dict:
+    """
+    Serialized team with the indexes of its learnt moves in the knowable moves of each Pokémon, as the preselected
+    moves are given.
+    """
+    return {
+        "team": team.serialize(),
+        "move_indexes": [
+            [
+                [move.id for move in pokemon.knowable_moves].index(learnt_move.id)
+                for learnt_move in pokemon.learnt_moves
+            ]
+            for pokemon in team.pokemons
+        ],
+    }
+
+
+def request_key(
+    obj_funcs_param: list[str],
+    included_types: list[str],
+    generations: list[list[int]],
+    games: list[str],
+    mono_type: bool,
+    include_legendaries: bool,
+    strategy: str,
+    roles: list[str],
+    pre_selected: list[int | None],
+    pre_selected_moves: list[int | None],
+) -> str:
+    """
+    Normalized key of a team-suggestion request, equal for every request with the same problem.
+
+    The order of the selections does not change the problem, neither do the moves of empty preselected slots nor
+    the order of the preselected moves. The preselected slots keep their order, as it is the order of the team.
+    """
+    pre_selected_moves_lists = preprocess_moves(pre_selected_moves)
+    normalized = {
+        # Format of the results, so results cached on disk in an older format are never served
+        "result_format": RESULT_FORMAT,
+        "objectives": sorted(obj_funcs_param),
+        "types": sorted(included_types or []),
+        "generations": sorted(generations or []),
+        "games": sorted(games or []),
+        "mono_type": bool(mono_type),
+        "legendaries": bool(include_legendaries),
+        "strategy": strategy or None,
+        "roles": sorted(roles or []),
+        "pre_selected": [
+            [int(p), sorted(set(pre_selected_moves_lists[i]))]
+            for i, p in enumerate(pre_selected)
+            if p is not None
+        ],
+    }
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+
+
+def suggest_team(
+    obj_funcs_param: list[str],
+    included_types: list[str],
+    generations: list[list[int]],
+    games: list[str],
+    mono_type: bool,
+    include_legendaries: bool,
+    strategy: str,
+    roles: list[str],
+    pre_selected: list[int | None],
+    pre_selected_moves: list[int | None],
+    population_fraction: float = 1.0,
+    time_limit: float = None,
+) -> dict:
+    """
+    Runs a team-suggestion request with the selections of the UI, see optimize_team_selection for the budget.
+
+    Returns:
+        dict: The serialized team, the knowable-move indexes of its moves, the elapsed time of the optimization, the
+            objective value of the team, the number of exact evaluations, and the alternative teams of the run in
+            the same format with their objective values.
+
+    Raises:
+        ValueError: If no Pokémon is left after filtering.
+    """
+    # Filter and process pre-selected moves
+    pre_selected_moves_lists = [
+        move_list
+        for i, move_list in enumerate(preprocess_moves(pre_selected_moves))
+        if pre_selected[i]
+    ]
+    pre_selected = [int(p) - 1 for p in pre_selected if p is not None]
+
+    # Apply filters to the Pokémon list
+    pok_list = filter_pokemon_list(
+        pre_selected,
+        included_types,
+        mono_type,
+        generations,
+        include_legendaries,
+        games,
+    )
+
+    # Check if any Pokémon remain after filtering
+    if not pok_list:
+        raise ValueError("No Pokémon available with current filter selection")
+
+    # Define objective functions
+    objective_funcs = define_objective_functions(obj_funcs_param, strategy, pok_list)
+    objective_structures = define_objective_structures(
+        obj_funcs_param, strategy, pok_list
+    )
+    batch_objective_funcs = define_batch_objective_functions(
+        obj_funcs_param, strategy, pok_list
+    )
+    # Optimize team selection
+    start_time = time.time()
+    team, obj_value, exact_evaluations, alternatives = optimize_team_selection(
+        pok_list,
+        pre_selected,
+        pre_selected_moves_lists,
+        objective_funcs,
+        roles,
+        objective_structures,
+        batch_objective_funcs,
+        population_fraction=population_fraction,
+        time_limit=time_limit,
+    )
+    return {
+        **serialize_team(team),
+        "elapsed_time": time.time() - start_time,
+        "objective_value": obj_value,
+        "exact_evaluations": exact_evaluations,
+        "alternatives": [
+            {**serialize_team(alternative), "objective_value": float(value)}
+            for alternative, value in alternatives
+        ],
+    }
+
+
+def warm_up():
+    """
+    Runs the default request of the UI once, so its tables, caches and compiled kernels are built before the
+    workers are forked, see JobManager.start.
+    """
+    suggest_team(
+        [ObjectiveFunctions.ATTACK.value],
+        [],
+        [],
+        [],
+        False,
+        False,
+        None,
+        [],
+        [None] * 6,
+        [None] * 24,
+        population_fraction=0.1,
+    )
@@ -0,0 +1,97 @@
+"""
+Team-suggestion service shared by the UI callbacks and the HTTP API: the result cache, the background jobs and the
+admission control of every process.
+"""
+
+from admission import AdmissionController, AdmissionDecision
+from cache import ResultCache
+from decouple import config
+from flask import request as http_request
+from jobs import JobManager
+from optimization import request_key, suggest_team
+
+# Optimizations run in worker processes and the page polls for the result, so the server threads stay free
+job_manager = JobManager(config("OPTIMIZATION_WORKERS", default=2, cast=int))
+# Results of the requests already solved, by their normalized key
+result_cache = ResultCache(
+    config("RESULT_CACHE_SIZE", default=256, cast=int),
+    config("RESULT_CACHE_TTL", default=3600, cast=float),
+    config("RESULT_CACHE_DIR", default="") or None,
+)
+# Requests beyond the workers are degraded, then rejected, as the jobs waiting for a worker pile up
+admission_controller = AdmissionController(
+    config("ADMISSION_DEGRADE_DEPTH", default=2, cast=int),
+    config("ADMISSION_REJECT_DEPTH", default=8, cast=int),
+    config("ADMISSION_RATE_PER_MINUTE", default=10, cast=float),
+    config("ADMISSION_BURST", default=5, cast=int),
+)
+# Search budget of the degraded requests
+degraded_budget = {
+    "population_fraction": config(
+        "DEGRADED_POPULATION_FRACTION", default=0.5, cast=float
+    ),
+    "time_limit": config("DEGRADED_TIME_LIMIT", default=3, cast=float),
+}
+
+
+def client_address() -> str:
+    """
+    Address of the client of the current request.
+
+    X-Forwarded-For is only honoured behind the trusted proxies set by TRUSTED_PROXIES, whose ProxyFix, see app.py,
+    puts the forwarded address in remote_addr. Otherwise any client could pick its address and dodge the rate limit.
+    """
+    return http_request.remote_addr
+
+
+def submit_suggestion(
+    request: tuple, client: str, budget: dict = None
+) -> tuple[dict | None, str | None, str]:
+    """
+    Answers a team-suggestion request from the cache, or submits it as a background job.
+
+    Identical requests in flight, e.g. double clicks or refreshed tabs, share the running job. New jobs go through
+    the admission control, and degraded ones run with the degraded budget. Jobs with a budget, degraded or requested,
+    are neither shared nor cached.
+
+    Args:
+        request (tuple): The arguments of optimization.suggest_team, without the budget.
+        client (str): The client of the request, for the rate limit.
+        budget (dict, optional): The population_fraction and time_limit of the search. Defaults to None, the full
+            search.
+
+    Returns:
+        Tuple[dict | None, str | None, str]: The cached result, or the id of the job, with a notice for the user.
+            The result and the job are None when the request is rejected, and the notice says why.
+    """
+    key = request_key(*request)
+    if budget is None:
+        result = result_cache.get(key)
+        if result is not None:
+            return result, None, ""
+        job_id = job_manager.shared_job(key)
+        if job_id is not None:
+            return None, job_id, ""
+    admission = admission_controller.admit(client, job_manager.queue_depth())
+    if admission.decision == AdmissionDecision.REJECT:
+        return None, None, admission.reason
+    if admission.decision == AdmissionDecision.DEGRADE:
+        budget = degraded_budget
+    if budget is None:
+        return None, job_manager.submit(suggest_team, *request, key=key), ""
+    job_id = job_manager.submit(
+        suggest_team,
+        *request,
+        budget.get("population_fraction", 1.0),
+        budget.get("time_limit"),
+    )
+    return None, job_id, admission.reason
+
+
+def cache_result(job_id: str, result: dict):
+    """
+    Caches the result of a finished job, unless it ran with a budget.
+    """
+    key = job_manager.job_key(job_id)
+    if key is not None:
+        result_cache.set(key, result)
@@ -1,8 +1,28 @@
 import re
 
+from filters import remove_battle_only, remove_megas
+
 from poketactician.glob_var import pok_pre_filter
 from poketactician.models import Roles
 
+# Species by id, the first one of the list when forms share an id
+pokemon_by_id = {}
+for pokemon in pok_pre_filter:
+    pokemon_by_id.setdefault(pokemon.id, pokemon)
+
+# Dropdown options of the species that can be preselected, and of the moves of every species
+species_options = [
+    {"value": pok.id, "label": pok.name.title()}
+    for pok in remove_battle_only(remove_megas(pok_pre_filter))
+]
+move_options = {
+    pok_id: [
+        {"value": i, "label": move.name.replace("-", " ").title()}
+        for i, move in enumerate(pok.knowable_moves)
+    ]
+    for pok_id, pok in pokemon_by_id.items()
+}
+
 
 def generate_move_list_and_selector_status(
     pok_id: int, move_id: list[int] = []
@@ -24,13 +44,11 @@ def generate_move_list_and_selector_status(
         "------",
     ]
     if pok_id:
-        pok = next(
-            (pokemon for pokemon in pok_pre_filter if pokemon.id == pok_id), None
-        )
+        selected_moves = set(move_id)
         move_list = [
-            {"value": i, "label": pok.knowable_moves[i].name.replace("-", " ").title()}
-            for i in range(len(pok.knowable_moves))
-            if i not in move_id
+            option
+            for option in move_options[pok_id]
+            if option["value"] not in selected_moves
         ]
         move_selector_disabled = False
     return move_list, move_selector_disabled
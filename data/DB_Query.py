@@ -21,6 +21,7 @@ from fuzzywuzzy import fuzz
 from poketactician.models.Move import Move, DamageClass
 from poketactician.models.Pokemon import Pokemon
 from poketactician.models.Types import PokemonType
+from poketactician.movesets import build_moveset_table, save_moveset_table
 
 def get_game_availability(pokemon_name, pokemon_id):
     """
@@ -186,6 +187,13 @@ def build_data(recalculateMoves):
     serialized_pokemon_list = [pokemon.serialize() for pokemon in Pokemons]
     with open("data/pokemon_data.json", "w") as f:
         json.dump(serialized_pokemon_list, f, indent=4)
+    # Refresh the precomputed movesets, they are indexed on the knowable moves just written
+    save_moveset_table(
+        build_moveset_table(
+            [Pokemon.from_json(pokemon_data) for pokemon_data in serialized_pokemon_list]
+        ),
+        "data/moveset_data.json",
+    )
     toc = time.time()
     elapsed_time = toc - tic
     print("Elapsed Time: {:.2f} seconds".format(elapsed_time))
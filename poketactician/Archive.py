@@ -0,0 +1,86 @@
+import threading
+from typing import Callable
+
+import numpy as np
+
+from .models.Team import ant_dtype
+from .utils import dominated_candidate_set
+
+
+class SharedArchive:
+    """
+    Candidate set shared by colonies that cooperate asynchronously.
+
+    Colonies publish their candidate sets whenever they finish a step and read the latest state without waiting for
+    the other colonies. Publishing merges the candidates with the dominance selection of the synchronous cooperation
+    under a lock, and replaces the archived array instead of modifying it, so readers never see a partial update.
+
+    Args:
+        candidate_set (np.ndarray): The initial candidate set.
+        values (np.ndarray): The joint objective values of the initial candidate set.
+        objective_functions (List[Callable]): The objective functions used to merge candidate sets.
+        batch_objective_functions (List[Callable | None], optional): The vectorized objective functions. Defaults
+            to None.
+        feasibility_function (Callable, optional): Whether each candidate of a batch fulfills the roles of the run,
+            see Solver.feasibility. Defaults to None, every candidate is feasible.
+
+    Attributes:
+        values (np.ndarray): The joint objective values of the archived candidate set.
+        history (List[np.ndarray]): The archived candidate set after every publication.
+        history_values (List[np.ndarray]): The joint objective values of every archived candidate set.
+        exact_evaluations (int): The number of candidate and objective pairs evaluated by the merges.
+        version (int): The number of publications.
+    """
+
+    def __init__(
+        self,
+        candidate_set: np.ndarray,
+        values: np.ndarray,
+        objective_functions: list[Callable],
+        batch_objective_functions: list[Callable | None] = None,
+        feasibility_function: Callable = None,
+    ):
+        self.candidate_set = np.array(candidate_set, dtype=ant_dtype)
+        self.values = np.asarray(values, dtype=float)
+        self.objective_functions = objective_functions
+        self.batch_objective_functions = batch_objective_functions
+        self.feasibility_function = feasibility_function
+        self.history = []
+        self.history_values = []
+        self.exact_evaluations = 0
+        self.version = 0
+        self.lock = threading.Lock()
+
+    def snapshot(self) -> np.ndarray:
+        """
+        Returns the latest archived candidate set, it is never modified once published.
+        """
+        return self.candidate_set
+
+    def publish(self, candidate_set: list[np.ndarray]) -> np.ndarray:
+        """
+        Merges a candidate set into the archive.
+
+        Args:
+            candidate_set (List[np.ndarray]): The candidates of a colony, they are copied before merging.
+
+        Returns:
+            np.ndarray: The archived candidate set after the merge.
+        """
+        candidate_set = list(np.array(candidate_set, dtype=ant_dtype))
+        with self.lock:
+            self.exact_evaluations += (
+                len(self.candidate_set) + len(candidate_set)
+            ) * len(self.objective_functions)
+            merged_candidate_set, self.values = dominated_candidate_set(
+                [list(self.candidate_set), candidate_set],
+                self.objective_functions,
+                self.batch_objective_functions,
+                return_values=True,
+                feasibility_function=self.feasibility_function,
+            )
+            self.candidate_set = np.array(merged_candidate_set, dtype=ant_dtype)
+            self.version += 1
+            self.history.append(self.candidate_set)
+            self.history_values.append(self.values)
+            return self.candidate_set
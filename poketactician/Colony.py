@@ -1,10 +1,33 @@
-import random
+from enum import Enum
 from math import ceil
 
 import numpy as np
 
+from . import kernels
 from .models.Pokemon import Pokemon
-from .models.Team import Team
+from .models.Team import ant_dtype
+from .PoolStructures import PoolStructures, normalize_segments
+from .Surrogate import AdditiveSurrogate
+
+
+class PheromoneUpdate(Enum):
+    """
+    Pheromone update rule of a colony.
+
+    ANT_SYSTEM deposits Q times the raw fitness of each ant and pheromones are unbounded.
+    MAX_MIN deposits Q times the fitness normalized by the best fitness seen, and keeps pheromones in
+    [tau_min, tau_max]. Pheromones start from tau_min, so short runs converge without a long exploration phase.
+    """
+
+    ANT_SYSTEM = "Ant System"
+    MAX_MIN = "MAX-MIN"
+
+
+# Ratio between the lower and upper pheromone bounds of MAX-MIN colonies
+tau_min_ratio = 0.01
+
+# Share of the exact evaluations of a screened population given to ants picked at random instead of by the surrogate
+surrogate_exploration = 0.1
 
 
 class Colony:
@@ -20,11 +43,25 @@ class Colony:
         beta: int,
         Q: int,
         rho: float,
-        roles: list[str],
+        movesets: list[np.ndarray] = None,
+        pokemon_heuristics: np.ndarray = None,
+        move_heuristics: list[np.ndarray] = None,
+        pheromone_update: PheromoneUpdate = PheromoneUpdate.ANT_SYSTEM,
+        elitist: bool = False,
+        rng: np.random.Generator = None,
+        structures: PoolStructures = None,
+        batch_objective_function: callable = None,
+        surrogate_fraction: float = None,
+        feasibility_function: callable = None,
     ):
         self.pop_size = pop_size_param
         # objFunParam should be a lambda function
         self.objective_function = objective_fun_param
+        # The vectorized objective function, when set the population is evaluated at once
+        self.batch_objective_function = batch_objective_function
+        # Whether each ant of a batch fulfills the roles of the run, see Solver.feasibility
+        self.feasibility_function = feasibility_function
+        self.exact_evaluations = 0
 
         # Set Pokemon
         self.pokemons = pokemons_param
@@ -32,9 +69,15 @@ class Colony:
         # Set PreSelected Pokemon and Moves
         self.preselected_pok = preselected_poks
         self.preselected_moves = preselected_moves
+        team_size = min(6, len(self.pokemons))
+        self.preselected_move_counts = np.zeros(team_size, dtype=np.int64)
+        self.preselected_move_table = np.full([team_size, 4], -1, dtype=np.int64)
+        for slot, moves in enumerate(self.preselected_moves[:team_size]):
+            self.preselected_move_counts[slot] = len(moves)
+            self.preselected_move_table[slot, : len(moves)] = moves
 
-        # Set Roles
-        self.roles = roles
+        # Set Random Stream, colonies get their own child stream so runs are reproducible and parallelizable
+        self.rng = rng if rng is not None else np.random.default_rng()
 
         # Set Meta Params
         self.alpha = alpha
@@ -42,221 +85,338 @@ class Colony:
         self.Q = Q
         self.rho = rho
 
-        # Create Decision Space of Pokemon
-        self.decision_space_pokemon = np.arange(self.pokemons.__len__())
+        # Set Pheromone Update Rule, elitist colonies only deposit on the best ant found so far
+        self.pheromone_update = pheromone_update
+        self.elitist = elitist
+        self.best_fitness = -np.inf
+        self.best_ant = None
+        self.tau_max = self.Q / self.rho if self.rho > 0 else self.Q
+        self.tau_min = self.tau_max * tau_min_ratio
+        initial_pheromone = (
+            self.tau_min if self.pheromone_update == PheromoneUpdate.MAX_MIN else 0
+        )
 
-        # Create Decision Space of Moves
-        self.decision_space_moves = [
-            np.arange(len(pok.knowable_moves)) for pok in self.pokemons
-        ]
+        # Static structures of the pool, shared by every colony over the pool
+        if structures is None:
+            structures = PoolStructures(
+                self.pokemons, movesets, pokemon_heuristics, move_heuristics, self.beta
+            )
+        self.structures = structures
 
-        # Create Probability Vector for Pokemon
-        self.pokemon_probabilities = np.ones(self.pokemons.__len__()) * (
-            1 / self.pokemons.__len__()
-        )
+        # Create Decision Space of Pokemon
+        self.decision_space_pokemon = structures.decision_space_pokemon
 
-        # Create Probability of Attacks
-        self.move_probabilities = []
-        for pokemon in self.pokemons:
-            size = pokemon.knowable_moves.__len__()
-            if size == 0:
-                self.move_probabilities.append([])
-            else:
-                self.move_probabilities.append(np.ones(size) * (1 / size))
+        # Create Decision Space of Moves
+        self.decision_space_moves = structures.decision_space_moves
 
         # Create Pheromone Vector for Pokemon
-        self.pokemon_pheromones = np.zeros(self.pokemons.__len__())
+        self.pokemon_pheromones = np.full(structures.size, float(initial_pheromone))
 
-        # Create Pheromone of Attacks
-        self.move_pheromones = []
-        for pokemon in self.pokemons:
-            size = pokemon.knowable_moves.__len__()
-            if size == 0:
-                size = 1
-            self.move_pheromones.append(np.zeros(size))
+        # Create Pheromone of Attacks, the list holds views of one flat array, one per pokemon
+        self.move_pheromone_data = np.full(
+            structures.move_offsets[-1], float(initial_pheromone)
+        )
+        self.move_pheromones = structures.move_segments(self.move_pheromone_data)
 
         # Create Heuristic Value of Pokemon
-        self.pokemon_heuritics = np.zeros(self.pokemons.__len__())
-        i = 0
-        for i in range(0, self.pokemon_heuritics.__len__()):
-            self.pokemon_heuritics[i] = self.heuristic_pokemon_fun(self.pokemons, i)
+        self.pokemon_heuritics = structures.pokemon_heuristics
 
         # Create Heuristic Value of Attack
-        self.move_heuristics = []
-        for pokemon in self.pokemons:
-            size = pokemon.knowable_moves.__len__()
-            if size == 0:
-                size = 1
-            self.move_heuristics.append(np.zeros(size))
+        self.move_heuristics = structures.move_heuristics
+
+        # Create Probability Vector for Pokemon, it follows the heuristic until pheromones are deposited
+        self.pokemon_probabilities = structures.pokemon_probabilities.copy()
+
+        # Create Probability of Attacks
+        self.move_probability_data = structures.move_probabilities_data.copy()
+        self.move_probabilities = structures.move_segments(
+            self.move_probability_data, structures.move_counts
+        )
+
+        # Create Decision Space, Probabilities, Pheromones and Heuristics of Movesets
+        # When set, moves are sampled as one of the precomputed movesets of the pokemon
+        self.movesets = structures.movesets
+        if self.movesets is not None:
+            self.moveset_pheromone_data = np.full(
+                structures.moveset_offsets[-1], float(initial_pheromone)
+            )
+            self.moveset_pheromones = structures.moveset_segments(
+                self.moveset_pheromone_data
+            )
+            self.moveset_heuristics = structures.moveset_heuristics
+            self.moveset_probability_data = structures.moveset_probabilities_data.copy()
+            self.moveset_probabilities = structures.moveset_segments(
+                self.moveset_probability_data
+            )
+            self.moveset_indices = structures.moveset_indices
+
+        # Create Surrogate, when set only the most promising fraction of the population is evaluated exactly
+        self.surrogate_fraction = surrogate_fraction
+        self.surrogate = (
+            AdditiveSurrogate(structures) if surrogate_fraction is not None else None
+        )
 
         # Create Population$
         # TODO Change min(6, len(self.poks)) to 6 in case incomplete teams are not allowed
-        self.population = np.ones(
-            [self.pop_size, min(6, len(self.pokemons)), 5], dtype=int
-        ) * (-1)
+        # The population buffer is allocated once and overwritten by every run of the meta-heuristic
+        self.population = np.full(
+            [self.pop_size, min(6, len(self.pokemons)), 5], -1, dtype=ant_dtype
+        )
 
         # Initial Run of the Meta-Heuristic
         self.ACO()
 
-    def role_constraint(self, ant):
-        team = Team.ant_to_team(ant, self.pokemons)
-        team.team_has_roles(self.roles)
-        return True
+    def create_ant(self, ant: np.ndarray = None):
+        # The ant is written in place when a buffer is given, e.g. a row of the population
+        if ant is None:
+            ant = np.empty([min(6, len(self.pokemons)), 5], dtype=ant_dtype)
+        self.construct_ants(ant[None])
+        return ant
 
-    def create_ant(self):
-        # TODO Run more tests vectorized and non-vectorized versions they tend to give different results
-        # TODO Allow Repeating even if not all pokemon have been used
+    def construct_ants(self, ants: np.ndarray):
+        """
+        Builds a batch of ants in place with the kernels of the selected backend.
 
-        ######### Vectorized
-        ant = np.ones([min(6, len(self.pokemons)), 5], dtype=int) * (-1)
-        team_size = min(len(self.pokemons), 6)
+        The random numbers are drawn here, one per pokemon slot and move position, so every backend consumes the
+        random stream in the same way.
+
+        Args:
+            ants (np.ndarray): The [ants, team_size, 5] buffer to fill.
+        """
+        # TODO Allow Repeating even if not all pokemon have been used
+        team_size = ants.shape[1]
         preselected_size = len(self.preselected_pok)
-        ant[0:preselected_size, 0] = self.preselected_pok
+        uniforms = 1 - self.rng.random(ants.shape)
+        ants.fill(-1)
+        ants[:, :preselected_size, 0] = self.preselected_pok
         if preselected_size < team_size:
+            ants[:, preselected_size:, 0] = kernels.sample_pokemon(
+                self.pokemon_probabilities,
+                np.asarray(self.preselected_pok, dtype=np.int64),
+                uniforms[:, preselected_size:, 0],
+            )
+        species = ants[..., 0]
 
-            # Renormalize Probabilities
-            self.pokemon_probabilities[self.preselected_pok] = 0
-            self.pokemon_probabilities /= self.pokemon_probabilities.sum()
-            ant[preselected_size:, 0] = np.random.choice(
-                len(self.pokemon_probabilities),
-                size=team_size - preselected_size,
-                replace=False,
-                p=self.pokemon_probabilities,
+        # Slots with preselected moves sample single moves, the rest sample whole movesets when available
+        move_slots = (
+            self.preselected_move_counts > 0
+            if self.movesets is not None
+            else np.ones(team_size, dtype=bool)
+        )
+        if move_slots.any():
+            ants[:, move_slots, 1:5] = kernels.sample_moves(
+                species[:, move_slots],
+                uniforms[:, move_slots, 1:5],
+                self.move_probability_data,
+                self.structures.move_offsets,
+                self.structures.move_counts,
+                self.preselected_move_table[move_slots],
+                self.preselected_move_counts[move_slots],
+            )
+        if not move_slots.all():
+            ants[:, ~move_slots, 1:5] = kernels.sample_movesets(
+                species[:, ~move_slots],
+                uniforms[:, ~move_slots, 1],
+                self.moveset_probability_data,
+                self.structures.moveset_offsets,
+                self.structures.moveset_counts,
+                self.structures.moveset_data,
             )
-        # if replacePok:
-        #     ant[len(self.poks) :, 0] = np.random.choice(
-        #         len(self.Prob_Poks),
-        #         size=6 - team_size,
-        #         p=self.Prob_Poks,
-        #     )
-        for ant_i in range(ant.shape[0]):
-            pokemon = ant[ant_i]
-            selected_pokemon_id = pokemon[0]
-            ######### NonVectorized
-            prob_att_temp = self.move_probabilities[selected_pokemon_id].copy()
-            for i in range(1, 5):
-                if ant_i < len(self.preselected_moves) and i - 1 < len(
-                    self.preselected_moves[ant_i]
-                ):
-                    pokemon[i] = self.preselected_moves[ant_i][i - 1]
-                    prob_att_temp[self.preselected_moves[ant_i][i - 1]] = 0
-                elif prob_att_temp.size - i > 0:
-                    rand_att = random.random() * prob_att_temp.sum()
-                    cumulative_att_prob = np.cumsum(prob_att_temp)
-                    selected_attack_id = np.argmax(rand_att <= cumulative_att_prob)
-
-                    pokemon[i] = selected_attack_id
-                    prob_att_temp[selected_attack_id] = 0
-                else:
-                    pokemon[i] = -1
-            ######### Vectorized
-            # Get Knowable Moves
-            # prob_att_temp = self.Prob_Att[selected_pokemon_id]
-            # # TODO Ensure no repeated attacks and if the pokemon has less than 4 attacks, fill with -1 the remaining
-            # num_req_atts = min(4, len(prob_att_temp))
-            # selected_attack_ids = -1 * np.ones(4)
-            # selected_attack_ids[0:num_req_atts] = np.random.choice(
-            #     len(prob_att_temp),
-            #     size=num_req_atts,
-            #     replace=False,
-            #     p=prob_att_temp,
-            # )
-            # pokemon[1:5] = selected_attack_ids
-        return ant
 
     def ACO(self):
         # Assign Population
-        for i in range(self.pop_size):
-            temp_ant = self.create_ant()
-            while len(self.roles) > 0 and not self.role_constraint(temp_ant):
-                temp_ant = self.create_ant()
-            self.population[i] = temp_ant
+        self.construct_ants(self.population)
 
     def update_ph_concentration(self, candidate_set):
         # User Defined Variables
         Q = self.Q
         rho = self.rho
         # Update Pheromone Concentration
-        # Evaporate Pheromones
-        self.pokemon_pheromones = (1 - rho) * self.pokemon_pheromones
-        for idx, move_pheromone in enumerate(self.move_pheromones):
-            self.move_pheromones[idx] = (1 - rho) * move_pheromone
-
-        for ant in candidate_set:
-            fitness_value = self.fitness(ant)
-            delta_concentration = Q * fitness_value
-            for pokemon in ant:
-                self.pokemon_pheromones[pokemon[0]] = (
-                    self.pokemon_pheromones[pokemon[0]] + delta_concentration
+        # Evaporate Pheromones, in place so the per-pokemon views stay valid
+        self.pokemon_pheromones *= 1 - rho
+        self.move_pheromone_data *= 1 - rho
+        if self.movesets is not None:
+            self.moveset_pheromone_data *= 1 - rho
+
+        deposits = self.pheromone_deposits(candidate_set)
+        if len(deposits) > 0:
+            ants = np.array([ant for ant, _ in deposits], dtype=np.int64)
+            ant_deltas = np.array(
+                [delta_concentration for _, delta_concentration in deposits]
+            )
+            species = ants[..., 0]
+            deltas = np.broadcast_to(ant_deltas[:, None], species.shape)
+            kernels.deposit(self.pokemon_pheromones, species.ravel(), deltas.ravel())
+
+            moves = ants[..., 1:5]
+            known_moves = moves >= 0
+            kernels.deposit(
+                self.move_pheromone_data,
+                (self.structures.move_offsets[species][..., None] + moves)[known_moves],
+                np.broadcast_to(deltas[..., None], moves.shape)[known_moves],
+            )
+
+            if self.movesets is not None:
+                moveset_ids = np.array(
+                    [
+                        [
+                            self.moveset_indices[pokemon[0]].get(
+                                frozenset(pokemon[1:5][pokemon[1:5] >= 0]), -1
+                            )
+                            for pokemon in ant
+                        ]
+                        for ant in ants
+                    ]
                 )
-                if pokemon[1] >= 0:
-                    self.move_pheromones[pokemon[0]][pokemon[1]] = (
-                        self.move_pheromones[pokemon[0]][pokemon[1]]
-                        + delta_concentration
-                    )
-
-                if pokemon[2] >= 0:
-                    self.move_pheromones[pokemon[0]][pokemon[2]] = (
-                        self.move_pheromones[pokemon[0]][pokemon[2]]
-                        + delta_concentration
-                    )
-
-                if pokemon[3] >= 0:
-                    self.move_pheromones[pokemon[0]][pokemon[3]] = (
-                        self.move_pheromones[pokemon[0]][pokemon[3]]
-                        + delta_concentration
-                    )
-
-                if pokemon[4] >= 0:
-                    self.move_pheromones[pokemon[0]][pokemon[4]] = (
-                        self.move_pheromones[pokemon[0]][pokemon[4]]
-                        + delta_concentration
-                    )
+                known_movesets = moveset_ids >= 0
+                kernels.deposit(
+                    self.moveset_pheromone_data,
+                    (self.structures.moveset_offsets[species] + moveset_ids)[
+                        known_movesets
+                    ],
+                    deltas[known_movesets],
+                )
+
+        if self.pheromone_update == PheromoneUpdate.MAX_MIN:
+            self.clamp_pheromones()
+
+    def pheromone_deposits(self, candidate_set):
+        """
+        Computes the pheromone each ant deposits and keeps track of the best ant found so far.
+
+        Args:
+            candidate_set (list): The ants of the cooperative candidate set.
+
+        Returns:
+            list: Tuples of ant and pheromone it deposits.
+        """
+        fitness_values = self.population_fitness(candidate_set)
+        for ant, fitness_value in zip(candidate_set, fitness_values):
+            if fitness_value > self.best_fitness:
+                self.best_fitness = fitness_value
+                self.best_ant = np.array(ant)
+        if self.elitist and self.best_ant is not None:
+            candidate_set, fitness_values = [self.best_ant], [self.best_fitness]
+        if self.pheromone_update == PheromoneUpdate.MAX_MIN:
+            # Normalizing by the best fitness makes deposits independent of the objective scale
+            scale = self.best_fitness if self.best_fitness > 0 else 1
+            return [
+                (ant, self.Q * fitness_value / scale)
+                for ant, fitness_value in zip(candidate_set, fitness_values)
+            ]
+        return [
+            (ant, self.Q * fitness_value)
+            for ant, fitness_value in zip(candidate_set, fitness_values)
+        ]
+
+    def clamp_pheromones(self):
+        np.clip(
+            self.pokemon_pheromones,
+            self.tau_min,
+            self.tau_max,
+            out=self.pokemon_pheromones,
+        )
+        np.clip(
+            self.move_pheromone_data,
+            self.tau_min,
+            self.tau_max,
+            out=self.move_pheromone_data,
+        )
+        if self.movesets is not None:
+            np.clip(
+                self.moveset_pheromone_data,
+                self.tau_min,
+                self.tau_max,
+                out=self.moveset_pheromone_data,
+            )
 
     def update_pokemon_prob(self):
         # Update Pokemon Probabilities
         pokemon_numerators = self.numerator_fun(
             self.pokemon_pheromones, self.pokemon_heuritics
         )
-        pokemon_denominators = self.numerator_fun(
-            self.pokemon_pheromones, self.pokemon_heuritics
-        ).sum()
+        pokemon_denominators = pokemon_numerators.sum()
         if pokemon_denominators == 0:
             pokemon_denominators = 1
-        for i in range(0, self.pokemon_probabilities.__len__()):
-            self.pokemon_probabilities[i] = pokemon_numerators[i] / pokemon_denominators
-
-        # Update Attack Probabilities
-        move_numerators = []
-        move_denominators = []
-        for move_pheromone, move_heuristic in zip(
-            self.move_pheromones, self.move_heuristics
-        ):
-            temp = self.numerator_fun(move_pheromone, move_heuristic)
-            move_numerators.append(temp)
-            temp_move_denominator = temp.sum()
-            if temp_move_denominator == 0:
-                temp_move_denominator = 1
-            move_denominators.append(temp_move_denominator)
-
-        for i in range(0, move_numerators.__len__()):
-            for j in range(0, move_numerators[i].__len__()):
-                if move_denominators[i] > 0:
-                    self.move_probabilities[i][j] = (
-                        move_numerators[i][j] / move_denominators[i]
-                    )
+        self.pokemon_probabilities[:] = pokemon_numerators / pokemon_denominators
+
+        # Update Attack Probabilities, over the flat arrays so the per-pokemon views are updated at once
+        self.move_probability_data[:] = normalize_segments(
+            self.numerator_fun(
+                self.move_pheromone_data, self.structures.move_heuristics_data
+            ),
+            self.structures.move_owners,
+            self.structures.size,
+        )
+
+        # Update Moveset Probabilities
+        if self.movesets is not None:
+            self.moveset_probability_data[:] = normalize_segments(
+                self.numerator_fun(
+                    self.moveset_pheromone_data,
+                    self.structures.moveset_heuristics_data,
+                ),
+                self.structures.moveset_owners,
+                self.structures.size,
+            )
 
     def fitness(self, ant):
         fitness_value = self.objective_function(ant)
         return fitness_value
 
-    def heuristic_pokemon_fun(self, pokemon, pokemon_index):
-        heuristic_value = pokemon[pokemon_index].overall_stats() / 500
-        return heuristic_value
+    def population_fitness(self, ants):
+        if len(ants) == 0:
+            return np.empty(0)
+        self.exact_evaluations += len(ants)
+        if self.batch_objective_function is not None:
+            return np.asarray(
+                self.batch_objective_function(np.asarray(ants)), dtype=float
+            )
+        return np.array([self.fitness(ant) for ant in ants], dtype=float)
+
+    def screened_fitness(self):
+        """
+        Evaluates exactly the fraction of the population the surrogate predicts best, plus a few random ants.
+
+        The whole population is evaluated until the surrogate was fitted on a full population. Ants that are not
+        evaluated get a fitness of -inf, and the surrogate is refit with the new exact values.
+
+        Returns:
+            np.ndarray: The fitness of each ant of the population.
+        """
+        if self.surrogate.samples < self.pop_size:
+            exact_ids = np.arange(self.pop_size)
+        else:
+            candidate_size = self.pop_size - ceil(self.pop_size * 0.90)
+            exact_size = min(
+                self.pop_size,
+                max(ceil(self.pop_size * self.surrogate_fraction), candidate_size),
+            )
+            random_size = int(exact_size * surrogate_exploration)
+            order = np.argsort(-self.surrogate.predict(self.population), kind="stable")
+            random_ids = self.rng.choice(
+                order[exact_size - random_size :], size=random_size, replace=False
+            )
+            exact_ids = np.concatenate([order[: exact_size - random_size], random_ids])
+        fitness_values = np.full(self.pop_size, -np.inf)
+        fitness_values[exact_ids] = self.population_fitness(self.population[exact_ids])
+        self.surrogate.fit(self.population[exact_ids], fitness_values[exact_ids])
+        return fitness_values
 
     def candidate_set(self):
-        sorted_population = sorted(self.population, key=self.fitness)
-        return list(sorted_population[ceil(self.pop_size * 0.90) : self.pop_size])
+        fitness_values = (
+            self.screened_fitness()
+            if self.surrogate is not None
+            else self.population_fitness(self.population)
+        )
+        if self.feasibility_function is not None:
+            # Ants that fulfill the roles of the run are selected before the ones that do not
+            order = np.lexsort(
+                (fitness_values, self.feasibility_function(self.population))
+            )
+        else:
+            order = np.argsort(fitness_values, kind="stable")
+        return list(self.population[order[ceil(self.pop_size * 0.90) : self.pop_size]])
 
     def numerator_fun(self, c, n):
         return (c**self.alpha) * (n**self.beta)
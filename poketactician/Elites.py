@@ -0,0 +1,117 @@
+from typing import Callable
+
+import numpy as np
+
+from .models.Team import TeamRecord, ant_dtype
+
+
+class EliteSet:
+    """
+    Best distinct teams found by a run, kept apart by a minimum number of different pokemon.
+
+    Teams are deduplicated by a canonical encoding, with the slots sorted by pokemon and the moves of each slot
+    sorted, so a team built in another order is only kept once. A team that shares too many pokemon with some elites
+    is only admitted when it beats all of them, and then replaces them. Teams that fulfill the roles of the run beat
+    the ones that do not, whatever their values.
+
+    Args:
+        size (int): The maximum number of elites.
+        min_distance (int): The minimum number of pokemon of an elite that are not in any other elite.
+
+    Attributes:
+        records (List[TeamRecord]): The elites, best first.
+        values (dict): The joint objective value of every canonical team seen, by its bytes.
+    """
+
+    def __init__(self, size: int, min_distance: int):
+        self.size = size
+        self.min_distance = min_distance
+        self.records = []
+        self.species = []
+        self.values = {}
+
+    @staticmethod
+    def canonical(ant: np.ndarray) -> np.ndarray:
+        moves = np.asarray(ant[:, 1:5])
+        # Missing moves, -1, are sorted last
+        moves = np.sort(np.where(moves < 0, np.iinfo(ant_dtype).max, moves), axis=1)
+        canonical_ant = np.empty([len(ant), 5], dtype=ant_dtype)
+        canonical_ant[:, 0] = ant[:, 0]
+        canonical_ant[:, 1:5] = np.where(moves == np.iinfo(ant_dtype).max, -1, moves)
+        return canonical_ant[np.argsort(canonical_ant[:, 0], kind="stable")]
+
+    def update(
+        self,
+        ants: np.ndarray,
+        values: np.ndarray,
+        feasibility_function: Callable[[np.ndarray], np.ndarray] = None,
+    ):
+        """
+        Offers a batch of teams to the elite set, only the teams never seen are considered.
+
+        Args:
+            ants (np.ndarray): The [n, team_size, 5] teams.
+            values (np.ndarray): The joint objective values of the teams, already computed by the solver.
+            feasibility_function (Callable[[np.ndarray], np.ndarray], optional): Whether each team of a batch
+                fulfills the roles of the run, only called for the teams never seen. Defaults to None, every team is
+                feasible.
+        """
+        new_ants = {}
+        for ant, value in zip(ants, values):
+            canonical_ant = self.canonical(ant)
+            key = canonical_ant.tobytes()
+            if key not in self.values and key not in new_ants:
+                new_ants[key] = (value, canonical_ant)
+        if not new_ants:
+            return
+        for key, (value, _) in new_ants.items():
+            self.values[key] = value
+        feasible = (
+            feasibility_function(np.array([ant for _, ant in new_ants.values()]))
+            if feasibility_function is not None
+            else np.ones(len(new_ants), dtype=bool)
+        )
+        for (value, ant), ant_feasible in sorted(
+            zip(new_ants.values(), feasible),
+            key=lambda item: (not item[1], -item[0][0]),
+        ):
+            self.add(ant, value, ant_feasible)
+
+    def add(self, ant: np.ndarray, value: float, feasible: bool = True) -> bool:
+        """
+        Admits a team if it is among the best and far enough from the better elites.
+
+        Returns:
+            bool: Whether the team was admitted.
+        """
+        record = TeamRecord(ant, value, feasible)
+        species = frozenset(ant[:, 0].tolist())
+        conflicts = [
+            index
+            for index, elite_species in enumerate(self.species)
+            if len(species - elite_species) < self.min_distance
+        ]
+        if any(self.records[index].rank() >= record.rank() for index in conflicts):
+            return False
+        if not conflicts and len(self.records) >= self.size:
+            if self.records[-1].rank() >= record.rank():
+                return False
+        for index in reversed(conflicts):
+            del self.records[index]
+            del self.species[index]
+        position = next(
+            (
+                index
+                for index, elite in enumerate(self.records)
+                if elite.rank() < record.rank()
+            ),
+            len(self.records),
+        )
+        self.records.insert(position, record)
+        self.species.insert(position, species)
+        del self.records[self.size :]
+        del self.species[self.size :]
+        return True
+
+    def top(self, k: int = None) -> list[TeamRecord]:
+        return self.records[:k]
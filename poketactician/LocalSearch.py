@@ -0,0 +1,172 @@
+import time
+from typing import Callable
+
+import numpy as np
+
+
+class LocalSearch:
+    """
+    Best-improvement local search over single-slot pokemon swaps and single-move swaps.
+
+    Neighbors are scored with the swap_values of the vectorized objective functions, so only the changed slot is
+    recomputed. The search is budgeted by a number of evaluations and a deadline.
+
+    Args:
+        batch_objective_functions (List[Callable]): The vectorized objective functions, all must implement swap_values.
+        species_moves (np.ndarray): The [n, 4] moves given to a pokemon when it is swapped into a team.
+        move_counts (np.ndarray): The number of knowable moves of each pokemon.
+        preselected_size (int): The number of preselected pokemon, their slots are never swapped.
+        preselected_moves (List[List[int]]): The preselected moves of each slot, they are never swapped.
+        rng (np.random.Generator, optional): The random stream used to subsample neighborhoods. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        batch_objective_functions: list[Callable],
+        species_moves: np.ndarray,
+        move_counts: np.ndarray,
+        preselected_size: int,
+        preselected_moves: list[list[int]],
+        rng: np.random.Generator = None,
+    ):
+        self.batch_objective_functions = batch_objective_functions
+        self.species_moves = species_moves
+        self.move_counts = move_counts
+        self.preselected_size = preselected_size
+        self.preselected_moves = preselected_moves
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.evaluations = 0
+        self.max_evaluations = 0
+        self.deadline = None
+
+    @staticmethod
+    def supports(batch_objective_functions: list[Callable] | None) -> bool:
+        return batch_objective_functions is not None and all(
+            hasattr(batch_function, "swap_values")
+            for batch_function in batch_objective_functions
+        )
+
+    def value(self, ant: np.ndarray) -> float:
+        self.evaluations += 1
+        return float(
+            np.prod(
+                [
+                    batch_function(ant[None])[0]
+                    for batch_function in self.batch_objective_functions
+                ]
+            )
+        )
+
+    def swap_values(self, ant: np.ndarray, slot: int, rows: np.ndarray) -> np.ndarray:
+        self.evaluations += len(rows)
+        values = np.ones(len(rows))
+        for batch_function in self.batch_objective_functions:
+            values = values * batch_function.swap_values(ant, slot, rows)
+        return values
+
+    def species_neighbors(self, ant: np.ndarray, slot: int) -> np.ndarray:
+        species = np.setdiff1d(np.arange(len(self.species_moves)), ant[:, 0])
+        rows = np.empty([len(species), 5], dtype=ant.dtype)
+        rows[:, 0] = species
+        rows[:, 1:] = self.species_moves[species]
+        return rows
+
+    def move_neighbors(self, ant: np.ndarray, slot: int) -> np.ndarray:
+        fixed_moves = (
+            len(self.preselected_moves[slot])
+            if slot < len(self.preselected_moves)
+            else 0
+        )
+        unused_moves = np.setdiff1d(
+            np.arange(self.move_counts[ant[slot, 0]]), ant[slot, 1:]
+        )
+        rows = []
+        for position in range(1 + fixed_moves, 5):
+            position_rows = np.tile(ant[slot], (len(unused_moves), 1))
+            position_rows[:, position] = unused_moves
+            rows.append(position_rows)
+        return np.concatenate(rows) if rows else np.empty([0, 5], dtype=ant.dtype)
+
+    def neighborhoods(self, ant: np.ndarray):
+        for slot in range(len(ant)):
+            if slot >= self.preselected_size:
+                yield slot, self.species_neighbors(ant, slot)
+            yield slot, self.move_neighbors(ant, slot)
+
+    def budget_left(self) -> int:
+        if self.deadline is not None and time.time() >= self.deadline:
+            return 0
+        return self.max_evaluations - self.evaluations
+
+    def improve(self, ant: np.ndarray) -> tuple[np.ndarray, float]:
+        """
+        Applies the best improving swap until no swap improves the ant or the budget runs out.
+
+        Args:
+            ant (np.ndarray): The ant to improve.
+
+        Returns:
+            Tuple[np.ndarray, float]: The improved ant and its joint objective value.
+        """
+        ant = np.array(ant)
+        value = self.value(ant)
+        while self.budget_left() > 0:
+            best_value, best_slot, best_row = value, None, None
+            for slot, rows in self.neighborhoods(ant):
+                budget = self.budget_left()
+                if budget <= 0:
+                    break
+                if len(rows) > budget:
+                    rows = rows[self.rng.permutation(len(rows))[:budget]]
+                if len(rows) == 0:
+                    continue
+                values = self.swap_values(ant, slot, rows)
+                best_index = np.argmax(values)
+                if values[best_index] > best_value:
+                    best_value, best_slot, best_row = (
+                        values[best_index],
+                        slot,
+                        rows[best_index],
+                    )
+            if best_slot is None:
+                break
+            ant[best_slot] = best_row
+            value = best_value
+        return ant, value
+
+    def run(
+        self,
+        candidate_set: list[np.ndarray],
+        max_evaluations: int,
+        time_limit: float = None,
+        deadline: float = None,
+    ) -> list[np.ndarray]:
+        """
+        Improves every ant of the candidate set within the evaluation and time budget.
+
+        Args:
+            candidate_set (List[np.ndarray]): The ants to improve.
+            max_evaluations (int): The maximum number of ants evaluated.
+            time_limit (float, optional): The maximum time in seconds. Defaults to None.
+            deadline (float, optional): An absolute time that must not be exceeded. Defaults to None.
+
+        Returns:
+            List[np.ndarray]: The improved candidate set without duplicated ants.
+        """
+        self.evaluations = 0
+        self.max_evaluations = max_evaluations
+        self.deadline = deadline
+        if time_limit is not None:
+            self.deadline = min(
+                time.time() + time_limit,
+                self.deadline if self.deadline is not None else np.inf,
+            )
+        improved_set = []
+        seen = set()
+        for ant in candidate_set:
+            if self.budget_left() > 0:
+                ant, _ = self.improve(ant)
+            if ant.tobytes() not in seen:
+                seen.add(ant.tobytes())
+                improved_set.append(ant)
+        return improved_set
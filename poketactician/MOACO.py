@@ -1,5 +1,4 @@
 import time
-from copy import deepcopy
 from functools import reduce
 from typing import Any, Callable, List, Tuple
 
@@ -8,14 +7,24 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
-from .Colony import Colony
-from .glob_var import CooperationStats, Q, alpha, beta, rho
+from .Archive import SharedArchive
+from .Colony import Colony, PheromoneUpdate
+from .glob_var import (
+    CooperationStats,
+    Q,
+    alpha,
+    beta,
+    rho,
+)
+from .LocalSearch import LocalSearch
 from .models.Pokemon import Pokemon
-from .models.Team import Team
+from .models.Team import ant_dtype
+from .PoolStructures import PoolStructures
+from .Solver import Solver
 from .utils import dominated_candidate_set
 
 
-class MOACO:
+class MOACO(Solver):
     """
     Multi-Objective Ant Colony Optimization (MOACO) class for optimizing team composition in Pokemon battles.
 
@@ -28,6 +37,35 @@ class MOACO:
         alpha (float): The alpha parameter for the ant colony optimization algorithm.
         beta (float): The beta parameter for the ant colony optimization algorithm.
         cooperation_strategy (int, optional): The ID of the cooperation strategy to use. Defaults to 1.
+            CooperationStats.ASYNCHRONOUS runs the colonies in parallel threads through a shared archive.
+        roles (List[str], optional): The names of the roles the team should fulfill, the teams that do not rank
+            after the ones that do, see Solver.feasibility. Defaults to [].
+        objective_movesets (List[List[np.ndarray] | None], optional): The precomputed top-k movesets of each
+            pokemon per objective, colonies of objectives with movesets sample among them instead of single moves.
+            Defaults to None.
+        batch_objective_functions (List[Callable | None], optional): The vectorized version of each objective
+            function, colonies and candidate sets are evaluated with it when available. When all objectives have
+            one and few pokemon slots are left free, every completion is enumerated exactly instead of running the
+            colonies. Defaults to None.
+        local_search_evaluations (int, optional): The number of evaluations the local search can spend on the
+            candidate set every iteration, 0 disables it. It needs swap_values on every vectorized objective.
+            Defaults to 0.
+        local_search_time (float, optional): The maximum time in seconds of the local search every iteration.
+            Defaults to None.
+        objective_heuristics (List[Tuple[np.ndarray, List[np.ndarray]]], optional): The heuristic vectors of the
+            pokemon and their moves per objective. Defaults to None, which uses the overall stats of the pokemon.
+        pheromone_update (PheromoneUpdate | List[PheromoneUpdate], optional): The pheromone update rule of the
+            colonies, or of each colony. Defaults to PheromoneUpdate.ANT_SYSTEM.
+        elitist (bool | List[bool], optional): Whether the colonies, or each colony, only deposit pheromone on
+            the best ant found so far. Defaults to False.
+        seed (int | np.random.SeedSequence | np.random.Generator, optional): The seed of the run, every colony
+            and the local search get an independent child stream spawned from it. Defaults to None.
+        objective_structures (List[PoolStructures | None], optional): The shared colony structures of the pool
+            per objective. When given they replace objective_movesets and objective_heuristics, and colonies only
+            allocate their pheromones. Defaults to None.
+        surrogate_fraction (float | List[float | None], optional): The fraction of the population of the colonies,
+            or of each colony, evaluated exactly after being screened by a surrogate model. None evaluates the whole
+            population. Defaults to None.
 
     Raises:
         ValueError: If totalPopulation is not a positive integer or if alpha or beta are negative.
@@ -41,23 +79,40 @@ class MOACO:
         preSelected (List[int]): A list of pre-selected Pokemon IDs.
         alpha (float): The alpha parameter for the ant colony optimization algorithm.
         beta (float): The beta parameter for the ant colony optimization algorithm.
+        objective_movesets (List[List[np.ndarray] | None]): The precomputed movesets per objective.
+        objective_structures (List[PoolStructures | None]): The shared colony structures per objective.
+        batch_objective_functions (List[Callable | None]): The vectorized objective functions.
+        exhaustive (bool): Whether the solution was found by exact enumeration instead of the colonies.
+        local_search (LocalSearch | None): The local search applied to the candidate set every iteration.
+        rng (np.random.Generator): The random stream of the run, parent of the colony streams.
         colonies (List[Any]): A list of ant colony objects.
         prevCandSet (List[Any]): The previous candidate set.
+        prev_candidate_values (np.ndarray): The joint objective values of the previous candidate set.
+        exact_evaluations (int): The number of ant and objective pairs the solver evaluated exactly when selecting
+            candidate sets and in the local search, besides the evaluations of the colonies.
+        best_record (TeamRecord): The best solution found so far and its joint objective value.
         bestSoFar (List[Any]): The best solution found so far.
         iterNum (int): The current iteration number.
         candSetsPerIter (List[List[Any]]): A list of candidate sets for each iteration.
         jointFun (Callable): The joint objective function.
 
     Methods:
+        can_enumerate: Checks if the remaining search space can be enumerated exactly.
+        enumerate_completions: Enumerates every completion of the preselected pokemon.
         initialize_colonies: Initializes the ant colonies.
         initialize_prev_cand_set: Initializes the previous candidate set.
         optimize: Optimizes the team composition.
+        optimize_asynchronously: Runs the colonies in parallel through a shared archive.
         should_continue: Checks if the optimization should continue.
         iteration_step: Performs a single iteration step of the optimization.
         update_candidate_sets: Updates the candidate sets.
+        intensify_candidate_set: Applies the local search to the candidate set.
         getSolnTeamNames: Returns the names of the Pokemon in the best solution.
         getSoln: Returns the best solution as a Team object.
+        get_solutions: Returns the best distinct teams of the run, best first.
+        get_alternatives: Returns the best distinct teams of the run other than the best solution.
         getObjTeamValue: Returns the objective value of the best solution.
+        get_exact_evaluations: Returns the number of exact objective evaluations of the run.
         plot_soln: Plots the values of the last cooperation candidate set.
         plot_iters: Plots the values of the candidate sets for each iteration.
         plot_averages: Plots the average values of the candidate sets for each iteration.
@@ -75,6 +130,18 @@ class MOACO:
         beta: float,
         cooperation_strategy: Callable = CooperationStats.SELECTION_BY_DOMINANCE,
         roles: list[str] = [],
+        objective_movesets: list[list[np.ndarray] | None] = None,
+        batch_objective_functions: list[Callable | None] = None,
+        local_search_evaluations: int = 0,
+        local_search_time: float = None,
+        objective_heuristics: list[tuple[np.ndarray, list[np.ndarray]]] = None,
+        pheromone_update: PheromoneUpdate | list[PheromoneUpdate] = (
+            PheromoneUpdate.ANT_SYSTEM
+        ),
+        elitist: bool | list[bool] = False,
+        seed: int | np.random.SeedSequence | np.random.Generator = None,
+        objective_structures: list[PoolStructures | None] = None,
+        surrogate_fraction: float | list[float | None] = None,
     ):
         if total_population <= 0:
             raise ValueError("totalPopulation must be a positive integer")
@@ -90,11 +157,48 @@ class MOACO:
         self.alpha = alpha
         self.beta = beta
         self.roles = roles
-        self.colonies = self.initialize_colonies()
-        self.prev_candidate_set = self.initialize_prev_cand_set()
-        self.best_so_far = self.prev_candidate_set[0]
-        self.iteration_number = 1
-        self.candidate_sets_per_iteration = [self.prev_candidate_set]
+        self.objective_movesets = (
+            objective_movesets
+            if objective_movesets is not None
+            else [None] * len(objective_functions_Q_rho)
+        )
+        self.objective_heuristics = (
+            objective_heuristics
+            if objective_heuristics is not None
+            else [(None, None)] * len(objective_functions_Q_rho)
+        )
+        self.objective_structures = (
+            objective_structures
+            if objective_structures is not None
+            else [None] * len(objective_functions_Q_rho)
+        )
+        self.rng = np.random.default_rng(seed)
+        self.colony_rngs = self.rng.spawn(len(objective_functions_Q_rho))
+        self.pheromone_updates = self.per_colony(pheromone_update)
+        self.elitist = self.per_colony(elitist)
+        self.surrogate_fractions = self.per_colony(surrogate_fraction)
+        self.batch_objective_functions = batch_objective_functions
+        self.local_search_evaluations = local_search_evaluations
+        self.local_search_time = local_search_time
+        self.local_search = None
+        self.deadline = None
+        self.exact_evaluations = 0
+        self.slot_role_cache = {}
+        self.exhaustive = self.can_enumerate()
+        if self.exhaustive:
+            self.colonies = []
+            self.prev_candidate_set, self.prev_candidate_values = (
+                self.enumerate_completions()
+            )
+        else:
+            self.colonies = self.initialize_colonies()
+            self.prev_candidate_set, self.prev_candidate_values = (
+                self.initialize_prev_cand_set()
+            )
+            if self.local_search_evaluations > 0 and LocalSearch.supports(
+                self.batch_objective_functions
+            ):
+                self.local_search = self.initialize_local_search()
         self.joint_function = lambda team: reduce(
             lambda acc, f: acc * f(team),
             [
@@ -103,6 +207,21 @@ class MOACO:
             ],
             1,
         )
+        self.initialize_elites()
+        self.initialize_best_record()
+        self.iteration_number = 1
+        self.candidate_sets_per_iteration = [self.prev_candidate_set]
+
+    def per_colony(self, value):
+        """
+        Broadcasts a colony setting to every colony, unless one value per objective is given.
+
+        Returns:
+            List[Any]: The setting of each colony.
+        """
+        if isinstance(value, list):
+            return value
+        return [value] * len(self.objective_functions_Q_rho)
 
     def initialize_colonies(self):
         """
@@ -122,9 +241,39 @@ class MOACO:
                 self.beta,
                 Q,
                 rho,
-                self.roles,
+                movesets,
+                pokemon_heuristics,
+                move_heuristics,
+                pheromone_update,
+                elitist,
+                rng,
+                structures,
+                batch_function,
+                surrogate_fraction,
+                self.feasibility if self.roles else None,
+            )
+            for (
+                (objFunc, Q, rho),
+                movesets,
+                (pokemon_heuristics, move_heuristics),
+                pheromone_update,
+                elitist,
+                rng,
+                structures,
+                batch_function,
+                surrogate_fraction,
+            ) in zip(
+                self.objective_functions_Q_rho,
+                self.objective_movesets,
+                self.objective_heuristics,
+                self.pheromone_updates,
+                self.elitist,
+                self.colony_rngs,
+                self.objective_structures,
+                self.batch_objective_functions
+                or [None] * len(self.objective_functions_Q_rho),
+                self.surrogate_fractions,
             )
-            for objFunc, Q, rho in self.objective_functions_Q_rho
         ]
 
     def initialize_prev_cand_set(self):
@@ -132,15 +281,32 @@ class MOACO:
         Initializes the previous candidate set.
 
         Returns:
-            List[Any]: The previous candidate set.
+            Tuple[np.ndarray, np.ndarray]: The previous candidate set and its joint objective values.
         """
-        cooperative_candidate_set = deepcopy(
-            dominated_candidate_set(
-                [colony.candidate_set() for colony in self.colonies],
-                [objFunc[0] for objFunc in self.objective_functions_Q_rho],
-            )
+        return self.select_candidates(
+            [colony.candidate_set() for colony in self.colonies]
         )
-        return cooperative_candidate_set
+
+    def select_candidates(
+        self, candidate_sets: list[list[np.ndarray]]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Selects the dominant candidates of some candidate sets, counting the exact evaluations it takes.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The selected candidates, best first, and their joint objective values.
+        """
+        self.exact_evaluations += sum(
+            len(candidate_set) for candidate_set in candidate_sets
+        ) * len(self.objective_functions_Q_rho)
+        candidate_set, values = dominated_candidate_set(
+            candidate_sets,
+            [objFunc[0] for objFunc in self.objective_functions_Q_rho],
+            self.batch_objective_functions,
+            return_values=True,
+            feasibility_function=self.feasibility if self.roles else None,
+        )
+        return np.array(candidate_set, dtype=ant_dtype), values
 
     def optimize(self, iters: int = None, time_limit: float = None):
         """
@@ -155,25 +321,56 @@ class MOACO:
         """
         if iters is None and time_limit is None:
             raise Exception("Provide Termination Criteria")
+        if self.exhaustive:
+            # The enumerated solution is already the exact optimum
+            return
         start_time = time.time()
+        self.deadline = start_time + time_limit if time_limit is not None else None
+        if self.cooperation_strategy == CooperationStats.ASYNCHRONOUS:
+            self.optimize_asynchronously(iters, time_limit, start_time)
+            return
         while self.should_continue(iters, time_limit, start_time):
             self.iteration_step()
 
-    def should_continue(self, iters, time_limit, start_time):
+    def optimize_asynchronously(
+        self, iters: int | None, time_limit: float | None, start_time: float
+    ):
         """
-        Checks if the optimization should continue.
+        Runs the colonies in parallel, cooperating through a shared archive instead of synchronized iterations.
+
+        Every colony runs up to the iterations left, so the total work matches the synchronous cooperation, but
+        fast colonies do not wait for slow ones. Every publication to the archive is kept as a candidate set of the
+        run, and the local search is applied once to the final archive.
 
         Args:
-            iters (int): The maximum number of iterations.
-            time_limit (float): The maximum time limit in seconds.
+            iters (int | None): The maximum number of iterations of each colony.
+            time_limit (float | None): The maximum time limit in seconds.
             start_time (float): The start time of the optimization.
-
-        Returns:
-            bool: True if the optimization should continue, False otherwise.
         """
-        return (iters is None or self.iteration_number < iters) and (
-            time_limit is None or (time.time() - start_time) < time_limit
+        archive = SharedArchive(
+            self.prev_candidate_set,
+            self.prev_candidate_values,
+            [objFunc[0] for objFunc in self.objective_functions_Q_rho],
+            self.batch_objective_functions,
+            self.feasibility if self.roles else None,
+        )
+        colony_steps = self.cooperation_strategy(
+            self.colonies,
+            archive,
+            lambda steps: self.should_continue(
+                None if iters is None else iters - steps, time_limit, start_time
+            ),
         )
+        self.iteration_number += max(colony_steps, default=0)
+        self.candidate_sets_per_iteration += archive.history
+        self.exact_evaluations += archive.exact_evaluations
+        for candidate_set, values in zip(archive.history, archive.history_values):
+            self.update_best_record(candidate_set[0], values[0])
+            self.update_elites(candidate_set, values)
+        self.prev_candidate_set = archive.snapshot()
+        self.prev_candidate_values = archive.values
+        if self.local_search is not None and archive.history:
+            self.intensify_candidate_set()
 
     def iteration_step(self):
         """
@@ -183,82 +380,73 @@ class MOACO:
         cooperation_function = self.cooperation_strategy
         self.colonies = cooperation_function(self.colonies, self.prev_candidate_set)
         self.update_candidate_sets()
+        if self.local_search is not None:
+            self.intensify_candidate_set()
 
     def update_candidate_sets(self):
         """
         Updates the candidate sets.
         """
-        current_candidate_set = deepcopy(
-            dominated_candidate_set(
-                [colony.candidate_set() for colony in self.colonies],
-                [objFunc[0] for objFunc in self.objective_functions_Q_rho],
-            )
+        # Candidate sets are stored as compact arrays, which also copies them out of the population buffers
+        current_candidate_set, _ = self.select_candidates(
+            [colony.candidate_set() for colony in self.colonies]
         )
-        self.prev_candidate_set = deepcopy(
-            dominated_candidate_set(
-                [self.prev_candidate_set, current_candidate_set],
-                [objFunc[0] for objFunc in self.objective_functions_Q_rho],
-            )
+        self.prev_candidate_set, self.prev_candidate_values = self.select_candidates(
+            [list(self.prev_candidate_set), list(current_candidate_set)]
         )
         self.candidate_sets_per_iteration.append(self.prev_candidate_set)
-        iteration_best = self.prev_candidate_set[0]
-        self.best_so_far = max(
-            [iteration_best, self.best_so_far], key=self.joint_function
+        self.update_best_record(
+            self.prev_candidate_set[0], self.prev_candidate_values[0]
         )
+        self.update_elites(self.prev_candidate_set, self.prev_candidate_values)
 
-    def get_solution_team_names(self):
+    def intensify_candidate_set(self):
         """
-        Returns the names of the Pokemon in the best solution.
+        Applies the local search to the candidate set and feeds the improved teams back into it.
 
-        Returns:
-            List[str]: A list of Pokemon names.
-
-        Raises:
-            Exception: If the optimization has not been run.
+        The improved teams compete with the candidate set instead of replacing it, as the local search does not
+        check the roles and can swap out the pokemon that fulfill them.
         """
-        team = []
-        if self.best_so_far is not None:
-            for pok in self.best_so_far:
-                team += [self.pokemon_pop[pok[0]].name]
-            return team
-        else:
-            raise Exception("Optimization has not been run.")
-
-    def get_solution(self):
-        """
-        Returns the best solution as a Team object.
-
-        Returns:
-            Team: The best solution as a Team object.
-
-        Raises:
-            Exception: If the optimization has not been run.
-        """
-        team = Team()
-        if self.best_so_far is not None:
-            for pok in self.best_so_far:
-                temp_pokemon = Pokemon.from_json(self.pokemon_pop[pok[0]].serialize())
-                for move_index in pok[1:]:
-                    temp_pokemon.teach_move(move_index)
-                team.add_pokemon(temp_pokemon)
-            return team
-        else:
-            raise Exception("Optimization has not been run.")
+        candidate_size = len(self.prev_candidate_set)
+        seen = {ant.tobytes() for ant in self.prev_candidate_set}
+        improved_candidate_set = [
+            ant
+            for ant in np.array(
+                self.local_search.run(
+                    self.prev_candidate_set,
+                    self.local_search_evaluations,
+                    self.local_search_time,
+                    self.deadline,
+                ),
+                dtype=ant_dtype,
+            )
+            if ant.tobytes() not in seen
+        ]
+        self.exact_evaluations += self.local_search.evaluations * len(
+            self.objective_functions_Q_rho
+        )
+        candidate_set, values = self.select_candidates(
+            [list(self.prev_candidate_set) + improved_candidate_set]
+        )
+        self.prev_candidate_set = candidate_set[:candidate_size]
+        self.prev_candidate_values = values[:candidate_size]
+        self.candidate_sets_per_iteration[-1] = self.prev_candidate_set
+        self.update_best_record(
+            self.prev_candidate_set[0], self.prev_candidate_values[0]
+        )
+        self.update_elites(self.prev_candidate_set, self.prev_candidate_values)
 
-    def get_objective_value(self):
+    def get_exact_evaluations(self) -> int:
         """
-        Returns the objective value of the best solution.
+        Returns the number of ant and objective pairs evaluated with the exact objective functions, by the colonies,
+        when selecting the candidate sets and by the local search.
 
         Returns:
-            float: The objective value of the best solution.
-
-        Raises:
-            Exception: If the optimization has not been run.
+            int: The number of exact evaluations of the run.
         """
-        if self.best_so_far is not None:
-            return self.joint_function(self.best_so_far)
-        else:
-            raise Exception("Optimization has not been run.")
+        return self.exact_evaluations + sum(
+            colony.exact_evaluations for colony in self.colonies
+        )
 
     def plot_soln(self, sorted_iterations):
         """
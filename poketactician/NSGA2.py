@@ -0,0 +1,461 @@
+import time
+from functools import reduce
+from math import ceil
+from typing import Callable, Tuple
+
+import numpy as np
+
+from . import kernels
+from .LocalSearch import LocalSearch
+from .models.Pokemon import Pokemon
+from .models.Team import ant_dtype
+from .PoolStructures import PoolStructures
+from .Solver import Solver
+
+
+def nondominated_ranks(values: np.ndarray, feasible: np.ndarray) -> np.ndarray:
+    """
+    Sorts the solutions into non-dominated fronts, all objectives are maximized.
+
+    Feasible solutions dominate infeasible ones, solutions with the same feasibility are compared by Pareto
+    dominance.
+
+    Args:
+        values (np.ndarray): The [n, objectives] objective values.
+        feasible (np.ndarray): Whether each solution fulfills the constraints.
+
+    Returns:
+        np.ndarray: The front of each solution, 0 is the non-dominated front.
+    """
+    # Built one objective at a time, reductions over the short objective axis are slow
+    greater_equal = np.ones([len(values), len(values)], dtype=bool)
+    greater = np.zeros([len(values), len(values)], dtype=bool)
+    for objective_values in values.T:
+        greater_equal &= objective_values[:, None] >= objective_values[None, :]
+        greater |= objective_values[:, None] > objective_values[None, :]
+    pareto = greater_equal & greater
+    dominates = np.where(
+        feasible[:, None] == feasible[None, :],
+        pareto,
+        feasible[:, None] & ~feasible[None, :],
+    )
+    # Dominators come first in lexicographic order, so the front of every solution is one past the last front of
+    # its dominators when the solutions are visited in that order
+    order = np.lexsort(np.vstack([-values.T[::-1], ~feasible]))
+    dominated_by = np.ascontiguousarray(dominates.T)
+    ranks = np.zeros(len(values), dtype=int)
+    for solution in order:
+        dominators = dominated_by[solution]
+        if dominators.any():
+            ranks[solution] = ranks[dominators].max() + 1
+    return ranks
+
+
+def crowding_distances(values: np.ndarray, ranks: np.ndarray) -> np.ndarray:
+    """
+    Computes the crowding distance of every solution within its front, the extremes of a front get infinity.
+
+    Returns:
+        np.ndarray: The crowding distance of each solution.
+    """
+    distances = np.zeros(len(values))
+    for front in np.unique(ranks):
+        members = np.flatnonzero(ranks == front)
+        for objective in range(values.shape[1]):
+            order = members[np.argsort(values[members, objective], kind="stable")]
+            distances[order[[0, -1]]] = np.inf
+            span = values[order[-1], objective] - values[order[0], objective]
+            if span > 0 and len(order) > 2:
+                distances[order[1:-1]] += (
+                    values[order[2:], objective] - values[order[:-2], objective]
+                ) / span
+    return distances
+
+
+class NSGA2(Solver):
+    """
+    NSGA-II genetic engine for optimizing team composition, an alternative to the colonies of MOACO.
+
+    Individuals are ants, so the engine shares the objective functions, vectorized evaluation kernels, exact
+    enumeration and local search of MOACO. The initial population and every new pokemon or moveset are sampled from
+    the heuristic probabilities of the pool structures. Offspring are built by uniform crossover on the team slots,
+    repaired so no pokemon is repeated, and mutated by replacing pokemon and resampling the moves of slots.
+    Parents and offspring compete for survival by non-dominated front and crowding distance, and teams that do not
+    fulfill the roles are dominated by the ones that do.
+
+    Args:
+        total_population (int): The population size, every generation builds as many offspring.
+        objective_functions_Q_rho (List[Tuple[Callable, float, float]]): The objective functions, Q and rho are
+            ignored.
+        pokemon_pop (List[Pokemon]): The available Pokemon population.
+        preselected_pokemons (List[int]): The indexes of the preselected pokemon, they are in every team.
+        preselected_moves (List[List[int]]): The preselected moves of each preselected pokemon.
+        roles (List[str], optional): The names of the roles the team should fulfill, the teams that do not rank
+            after the ones that do, see Solver.feasibility. Defaults to [].
+        batch_objective_functions (List[Callable | None], optional): The vectorized version of each objective
+            function. Defaults to None.
+        local_search_evaluations (int, optional): The number of evaluations the local search can spend on the
+            candidate set every generation, 0 disables it. Defaults to 0.
+        local_search_time (float, optional): The maximum time in seconds of the local search every generation.
+            Defaults to None.
+        seed (int | np.random.SeedSequence | np.random.Generator, optional): The seed of the run. Defaults to None.
+        objective_structures (List[PoolStructures | None], optional): The structures of the pool per objective,
+            the first one given is used to sample pokemon and moves. Defaults to None, which uses the overall
+            stats of the pokemon.
+        crossover_rate (float, optional): The probability that a pair of parents is recombined. Defaults to 0.9.
+        mutation_rate (float, optional): The probability that the pokemon, or the moves, of a slot are mutated.
+            Defaults to None, which is one over the team size.
+
+    Raises:
+        ValueError: If total_population is not a positive integer.
+
+    Attributes:
+        population (np.ndarray): The [total_population, team_size, 5] current population.
+        objective_values (np.ndarray): The objective values of each individual of the population.
+        prev_candidate_set (np.ndarray): The non-dominated individuals sorted by joint objective value.
+        prev_candidate_values (np.ndarray): The joint objective values of the candidate set.
+        candidate_sets_per_iteration (List[np.ndarray]): The candidate set of every generation.
+        exact_evaluations (int): The number of individual and objective pairs evaluated exactly.
+    """
+
+    def __init__(
+        self,
+        total_population: int,
+        objective_functions_Q_rho: list[Tuple[Callable, float, float]],
+        pokemon_pop: list[Pokemon],
+        preselected_pokemons: list[int],
+        preselected_moves: list[list[int]],
+        roles: list[str] = [],
+        batch_objective_functions: list[Callable | None] = None,
+        local_search_evaluations: int = 0,
+        local_search_time: float = None,
+        seed: int | np.random.SeedSequence | np.random.Generator = None,
+        objective_structures: list[PoolStructures | None] = None,
+        crossover_rate: float = 0.9,
+        mutation_rate: float = None,
+    ):
+        if total_population <= 0:
+            raise ValueError("totalPopulation must be a positive integer")
+
+        self.total_population = total_population
+        self.objective_functions_Q_rho = objective_functions_Q_rho
+        self.pokemon_pop = pokemon_pop
+        self.preselected_pokemons = preselected_pokemons
+        self.preSelected_moves = preselected_moves
+        self.roles = roles
+        self.batch_objective_functions = batch_objective_functions
+        self.local_search_evaluations = local_search_evaluations
+        self.local_search_time = local_search_time
+        self.local_search = None
+        self.deadline = None
+        self.rng = np.random.default_rng(seed)
+        self.exact_evaluations = 0
+        self.slot_role_cache = {}
+        self.crossover_rate = crossover_rate
+
+        # Team Layout, preselected pokemon and their moves never change
+        self.team_size = min(6, len(pokemon_pop))
+        self.preselected_size = len(preselected_pokemons)
+        self.mutation_rate = (
+            mutation_rate if mutation_rate is not None else 1 / self.team_size
+        )
+        self.preselected_move_counts = np.zeros(self.team_size, dtype=np.int64)
+        self.preselected_move_table = np.full([self.team_size, 4], -1, dtype=np.int64)
+        for slot, moves in enumerate(preselected_moves[: self.team_size]):
+            self.preselected_move_counts[slot] = len(moves)
+            self.preselected_move_table[slot, : len(moves)] = moves
+
+        # Sampling Structures
+        self.structures = next(
+            (
+                structures
+                for structures in (objective_structures or [])
+                if structures is not None
+            ),
+            None,
+        )
+        if self.structures is None:
+            self.structures = PoolStructures(pokemon_pop)
+
+        self.joint_function = lambda team: reduce(
+            lambda acc, f: acc * f(team),
+            [
+                objective_function[0]
+                for objective_function in self.objective_functions_Q_rho
+            ],
+            1,
+        )
+        self.exhaustive = self.can_enumerate()
+        if self.exhaustive:
+            self.prev_candidate_set, self.prev_candidate_values = (
+                self.enumerate_completions()
+            )
+        else:
+            self.population = self.canonical(self.construct(total_population))
+            self.objective_values = self.evaluate(self.population)
+            self.feasible = self.feasibility(self.population)
+            self.ranks = nondominated_ranks(self.objective_values, self.feasible)
+            self.crowding = crowding_distances(self.objective_values, self.ranks)
+            self.prev_candidate_set, self.prev_candidate_values = (
+                self.front_candidate_set()
+            )
+            if self.local_search_evaluations > 0 and LocalSearch.supports(
+                self.batch_objective_functions
+            ):
+                self.local_search = self.initialize_local_search()
+        self.initialize_elites()
+        self.initialize_best_record()
+        self.iteration_number = 1
+        self.candidate_sets_per_iteration = [self.prev_candidate_set]
+
+    def construct(self, size: int) -> np.ndarray:
+        """
+        Samples complete ants from the heuristic probabilities of the pool.
+
+        Returns:
+            np.ndarray: The [size, team_size, 5] ants.
+        """
+        ants = np.full([size, self.team_size, 5], -1, dtype=ant_dtype)
+        ants[:, : self.preselected_size, 0] = self.preselected_pokemons
+        if self.preselected_size < self.team_size:
+            ants[:, self.preselected_size :, 0] = kernels.sample_pokemon(
+                self.structures.pokemon_probabilities,
+                np.asarray(self.preselected_pokemons, dtype=np.int64),
+                1 - self.rng.random([size, self.team_size - self.preselected_size]),
+            )
+        ant_ids, slots = np.indices([size, self.team_size]).reshape(2, -1)
+        self.resample_moves(ants, ant_ids, slots)
+        return ants
+
+    def resample_moves(self, ants: np.ndarray, ant_ids: np.ndarray, slots: np.ndarray):
+        """
+        Samples new moves in place for the given slots of the given ants, keeping the preselected moves.
+
+        Slots with preselected moves sample single moves, the rest sample whole movesets when available, as the
+        colonies do.
+        """
+        if len(slots) == 0:
+            return
+        species = ants[ant_ids, slots, 0][None]
+        uniforms = 1 - self.rng.random([1, len(slots), 4])
+        move_slots = (
+            self.preselected_move_counts[slots] > 0
+            if self.structures.movesets is not None
+            else np.ones(len(slots), dtype=bool)
+        )
+        moves = np.empty([len(slots), 4], dtype=np.int64)
+        if move_slots.any():
+            moves[move_slots] = kernels.sample_moves(
+                species[:, move_slots],
+                uniforms[:, move_slots],
+                self.structures.move_probabilities_data,
+                self.structures.move_offsets,
+                self.structures.move_counts,
+                self.preselected_move_table[slots[move_slots]],
+                self.preselected_move_counts[slots[move_slots]],
+            )[0]
+        if not move_slots.all():
+            moves[~move_slots] = kernels.sample_movesets(
+                species[:, ~move_slots],
+                uniforms[:, ~move_slots, 0],
+                self.structures.moveset_probabilities_data,
+                self.structures.moveset_offsets,
+                self.structures.moveset_counts,
+                self.structures.moveset_data,
+            )[0]
+        ants[ant_ids, slots, 1:5] = moves
+
+    def replace_pokemon(self, ants: np.ndarray, replaced: np.ndarray):
+        """
+        Replaces in place the pokemon of the marked slots with pokemon not in the team, and samples their moves.
+
+        Args:
+            ants (np.ndarray): The [n, team_size, 5] ants.
+            replaced (np.ndarray): The [n, team_size] slots to replace, preselected slots are never replaced.
+        """
+        rows = np.arange(len(ants))
+        for slot in range(self.preselected_size, self.team_size):
+            ant_ids = rows[replaced[:, slot]]
+            if len(ant_ids) == 0:
+                continue
+            weights = np.tile(self.structures.pokemon_probabilities, (len(ant_ids), 1))
+            weights[np.arange(len(ant_ids))[:, None], ants[ant_ids, :, 0]] = 0
+            cumulative = np.cumsum(weights, axis=1)
+            # Teams that already hold every pokemon with a positive weight keep their pokemon
+            available = cumulative[:, -1] > 0
+            ant_ids, cumulative = ant_ids[available], cumulative[available]
+            thresholds = (1 - self.rng.random(len(ant_ids))) * cumulative[:, -1]
+            ants[ant_ids, slot, 0] = (cumulative < thresholds[:, None]).sum(axis=1)
+            self.resample_moves(ants, ant_ids, np.full(len(ant_ids), slot))
+
+    def canonical(self, ants: np.ndarray) -> np.ndarray:
+        """
+        Sorts the free slots of every ant by pokemon, so equal teams have equal ants and crossover aligns pokemon.
+        """
+        order = np.argsort(ants[:, self.preselected_size :, 0], axis=1, kind="stable")
+        ants[:, self.preselected_size :] = np.take_along_axis(
+            ants[:, self.preselected_size :], order[..., None], axis=1
+        )
+        return ants
+
+    def evaluate(self, ants: np.ndarray) -> np.ndarray:
+        """
+        Evaluates every objective on a batch of ants, with the vectorized functions when available.
+
+        Returns:
+            np.ndarray: The [n, objectives] objective values.
+        """
+        batch_objective_functions = self.batch_objective_functions or [None] * len(
+            self.objective_functions_Q_rho
+        )
+        values = np.empty([len(ants), len(self.objective_functions_Q_rho)])
+        for objective, ((objective_function, _, _), batch_function) in enumerate(
+            zip(self.objective_functions_Q_rho, batch_objective_functions)
+        ):
+            if batch_function is not None:
+                values[:, objective] = batch_function(ants)
+            else:
+                values[:, objective] = [objective_function(ant) for ant in ants]
+        self.exact_evaluations += values.size
+        return values
+
+    def tournament(self, size: int) -> np.ndarray:
+        """
+        Selects parents by binary tournaments on front and crowding distance.
+
+        Returns:
+            np.ndarray: The indexes of the selected individuals.
+        """
+        first, second = self.rng.integers(len(self.population), size=(2, size))
+        second_wins = (self.ranks[second] < self.ranks[first]) | (
+            (self.ranks[second] == self.ranks[first])
+            & (self.crowding[second] > self.crowding[first])
+        )
+        return np.where(second_wins, second, first)
+
+    def offspring(self) -> np.ndarray:
+        """
+        Builds a generation of offspring by slot crossover, repair and mutation.
+
+        Returns:
+            np.ndarray: The [total_population, team_size, 5] offspring.
+        """
+        size = self.total_population
+        first_parents = self.population[self.tournament(size)]
+        second_parents = self.population[self.tournament(size)]
+
+        # Uniform crossover on the slots, a slot carries its pokemon and its moves
+        children = first_parents.copy()
+        crossed = (self.rng.random([size, self.team_size]) < 0.5) & (
+            self.rng.random(size) < self.crossover_rate
+        )[:, None]
+        children[crossed] = second_parents[crossed]
+
+        # Repeated pokemon are replaced as if mutated, together with the mutated slots
+        species = children[..., 0]
+        repeated = (
+            (species[:, :, None] == species[:, None, :])
+            & np.tri(self.team_size, k=-1, dtype=bool)
+        ).any(axis=-1)
+        replaced = repeated | (
+            self.rng.random([size, self.team_size]) < self.mutation_rate
+        )
+        replaced[:, : self.preselected_size] = False
+        self.replace_pokemon(children, replaced)
+
+        moves_mutated = ~replaced & (
+            self.rng.random([size, self.team_size]) < self.mutation_rate
+        )
+        self.resample_moves(children, *np.nonzero(moves_mutated))
+        return self.canonical(children)
+
+    def survive(self, ants: np.ndarray, values: np.ndarray, feasible: np.ndarray):
+        """
+        Keeps the best total_population distinct individuals of the population and the new ants.
+        """
+        ants = np.concatenate([self.population, ants])
+        values = np.concatenate([self.objective_values, values])
+        feasible = np.concatenate([self.feasible, feasible])
+        _, distinct = np.unique(ants.reshape(len(ants), -1), axis=0, return_index=True)
+        distinct = np.sort(distinct)
+        ants, values, feasible = ants[distinct], values[distinct], feasible[distinct]
+
+        ranks = nondominated_ranks(values, feasible)
+        crowding = crowding_distances(values, ranks)
+        survivors = np.lexsort((-crowding, ranks))[: self.total_population]
+        self.population = ants[survivors]
+        self.objective_values = values[survivors]
+        self.feasible = feasible[survivors]
+        # Whole fronts survive before the last one, so the fronts of the survivors are unchanged
+        self.ranks = ranks[survivors]
+        self.crowding = crowding[survivors]
+
+    def front_candidate_set(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the non-dominated individuals, sorted by joint objective value and limited to a tenth of the
+        population, with their joint objective values.
+        """
+        candidate_size = max(
+            1, self.total_population - ceil(self.total_population * 0.90)
+        )
+        front = np.flatnonzero(self.ranks == 0)
+        joint_values = self.objective_values[front].prod(axis=1)
+        order = np.argsort(-joint_values, kind="stable")[:candidate_size]
+        return self.population[front[order]].copy(), joint_values[order]
+
+    def optimize(self, iters: int = None, time_limit: float = None):
+        """
+        Optimizes the team composition.
+
+        Args:
+            iters (int, optional): The maximum number of generations. Defaults to None.
+            time_limit (float, optional): The maximum time limit in seconds. Defaults to None.
+
+        Raises:
+            Exception: If neither iters nor time_limit is provided.
+        """
+        if iters is None and time_limit is None:
+            raise Exception("Provide Termination Criteria")
+        if self.exhaustive:
+            # The enumerated solution is already the exact optimum
+            return
+        start_time = time.time()
+        self.deadline = start_time + time_limit if time_limit is not None else None
+        while self.should_continue(iters, time_limit, start_time):
+            self.iteration_step()
+
+    def iteration_step(self):
+        """
+        Performs a single generation, the candidate set improved by the local search competes with the offspring.
+        """
+        self.iteration_number += 1
+        children = self.offspring()
+        if self.local_search is not None:
+            improved_candidate_set = self.local_search.run(
+                self.prev_candidate_set,
+                self.local_search_evaluations,
+                self.local_search_time,
+                self.deadline,
+            )
+            self.exact_evaluations += self.local_search.evaluations * len(
+                self.objective_functions_Q_rho
+            )
+            children = np.concatenate(
+                [children, self.canonical(np.array(improved_candidate_set))]
+            )
+        self.survive(children, self.evaluate(children), self.feasibility(children))
+        self.prev_candidate_set, self.prev_candidate_values = self.front_candidate_set()
+        self.candidate_sets_per_iteration.append(self.prev_candidate_set)
+        self.update_best_record(
+            self.prev_candidate_set[0], self.prev_candidate_values[0]
+        )
+        self.update_elites(self.prev_candidate_set, self.prev_candidate_values)
+
+    def get_exact_evaluations(self) -> int:
+        """
+        Returns the number of individual and objective pairs evaluated with the exact objective functions.
+
+        Returns:
+            int: The number of exact evaluations of the run.
+        """
+        return self.exact_evaluations
@@ -0,0 +1,218 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from .heuristics import HEURISTIC_FLOOR, get_heuristics, stats_pokemon_heuristic
+from .models.Pokemon import Pokemon
+from .movesets import get_movesets
+
+# Number of pools whose structures are kept, the least recently used pool is dropped first
+POOL_STRUCTURES_CACHE_SIZE = 16
+
+_pool_structures_cache = OrderedDict()
+
+
+def segment_sums(values: np.ndarray, owners: np.ndarray, size: int) -> np.ndarray:
+    return np.bincount(owners, weights=values, minlength=size)
+
+
+def normalize_segments(values: np.ndarray, owners: np.ndarray, size: int) -> np.ndarray:
+    """
+    Normalizes every segment of a flat array to sum 1, segments that sum 0 are left untouched.
+    """
+    denominators = segment_sums(values, owners, size)
+    denominators[denominators == 0] = 1
+    return values / denominators[owners]
+
+
+class PoolStructures:
+    """
+    Static structures of the colonies over a pokemon pool: decision spaces, heuristics and initial probabilities.
+
+    They only depend on the pool, the objective and beta, so they are built once and shared by every colony over
+    the pool. Values per move and per moveset are stored in flat read-only arrays, one segment per pokemon, and
+    colonies only allocate their pheromones and probabilities as copies of these arrays.
+
+    Args:
+        pokemon_list (List[Pokemon]): The pokemon in the decision space.
+        movesets (List[np.ndarray], optional): The precomputed movesets of each pokemon. Defaults to None.
+        pokemon_heuristics (np.ndarray, optional): The heuristic of each pokemon, the overall stats if None.
+        move_heuristics (List[np.ndarray], optional): The heuristic of each knowable move, uniform if None.
+        beta (float): The relative importance of the heuristics. Defaults to 1.
+
+    Attributes:
+        move_counts (np.ndarray): The number of knowable moves of each pokemon.
+        move_offsets (np.ndarray): The start of the move segment of each pokemon, pokemon without moves keep one slot.
+        move_owners (np.ndarray): The pokemon of each entry of the flat move arrays.
+        moveset_data (np.ndarray): The flat [total, 4] movesets of all the pokemon.
+        moveset_counts (np.ndarray): The number of movesets of each pokemon.
+        moveset_offsets (np.ndarray): The start of the moveset segment of each pokemon.
+        moveset_owners (np.ndarray): The pokemon of each entry of the flat moveset arrays.
+    """
+
+    def __init__(
+        self,
+        pokemon_list: list[Pokemon],
+        movesets: list[np.ndarray] = None,
+        pokemon_heuristics: np.ndarray = None,
+        move_heuristics: list[np.ndarray] = None,
+        beta: float = 1,
+    ):
+        self.size = len(pokemon_list)
+        self.beta = beta
+
+        # Decision Spaces
+        self.decision_space_pokemon = np.arange(self.size)
+        self.move_counts = np.array(
+            [len(pokemon.knowable_moves) for pokemon in pokemon_list], dtype=int
+        )
+        move_range = np.arange(self.move_counts.max(initial=0))
+        self.decision_space_moves = [move_range[:count] for count in self.move_counts]
+
+        # Move Segments
+        move_sizes = np.maximum(self.move_counts, 1)
+        self.move_offsets = np.concatenate([[0], np.cumsum(move_sizes)])
+        self.move_owners = np.repeat(self.decision_space_pokemon, move_sizes)
+
+        # Heuristics
+        if pokemon_heuristics is None:
+            pokemon_heuristics = np.array(
+                [stats_pokemon_heuristic(pokemon) for pokemon in pokemon_list]
+            )
+        self.pokemon_heuristics = np.asarray(pokemon_heuristics, dtype=float)
+        if move_heuristics is None:
+            # Neutral heuristic, a zero heuristic would forbid every move when beta > 0
+            self.move_heuristics_data = np.ones(self.move_offsets[-1])
+        else:
+            self.move_heuristics_data = np.concatenate(
+                [
+                    np.asarray(move_heuristic, dtype=float)[:size]
+                    for move_heuristic, size in zip(move_heuristics, move_sizes)
+                ]
+                or [np.empty(0)]
+            )
+
+        # Initial Probabilities, they follow the heuristics until pheromones are deposited
+        pokemon_weights = self.pokemon_heuristics**beta
+        self.pokemon_probabilities = pokemon_weights / pokemon_weights.sum()
+        self.move_probabilities_data = normalize_segments(
+            self.move_heuristics_data**beta, self.move_owners, self.size
+        )
+
+        # Movesets, the heuristic of a moveset is the sum of the heuristics of its moves
+        self.movesets = movesets
+        if self.movesets is not None:
+            self.moveset_counts = np.array(
+                [len(pokemon_movesets) for pokemon_movesets in movesets], dtype=int
+            )
+            self.moveset_offsets = np.concatenate([[0], np.cumsum(self.moveset_counts)])
+            self.moveset_owners = np.repeat(
+                self.decision_space_pokemon, self.moveset_counts
+            )
+            self.moveset_data = np.concatenate(
+                [np.reshape(pokemon_movesets, (-1, 4)) for pokemon_movesets in movesets]
+                or [np.empty([0, 4], dtype=int)]
+            ).astype(int)
+            moveset_move_heuristics = np.where(
+                self.moveset_data >= 0,
+                self.move_heuristics_data[
+                    self.move_offsets[self.moveset_owners][:, None]
+                    + np.maximum(self.moveset_data, 0)
+                ],
+                0,
+            ).sum(axis=1)
+            self.moveset_heuristics_data = np.where(
+                moveset_move_heuristics > 0, moveset_move_heuristics, HEURISTIC_FLOOR
+            )
+            self.moveset_probabilities_data = normalize_segments(
+                self.moveset_heuristics_data**beta, self.moveset_owners, self.size
+            )
+            self.moveset_indices = [
+                {
+                    frozenset(moveset[moveset >= 0]): moveset_index
+                    for moveset_index, moveset in enumerate(pokemon_movesets)
+                }
+                for pokemon_movesets in movesets
+            ]
+            self.moveset_heuristics = self.moveset_segments(
+                self.moveset_heuristics_data
+            )
+
+        self.move_heuristics = self.move_segments(self.move_heuristics_data)
+        for array in [
+            self.pokemon_heuristics,
+            self.pokemon_probabilities,
+            self.move_heuristics_data,
+            self.move_probabilities_data,
+        ]:
+            array.flags.writeable = False
+        if self.movesets is not None:
+            self.moveset_heuristics_data.flags.writeable = False
+            self.moveset_probabilities_data.flags.writeable = False
+
+    def move_segments(self, data: np.ndarray, lengths: np.ndarray = None) -> list:
+        """
+        Splits a flat move array into views, one per pokemon.
+
+        Args:
+            data (np.ndarray): A flat array aligned with the move segments.
+            lengths (np.ndarray, optional): The length of each view, the whole segment if None.
+
+        Returns:
+            List[np.ndarray]: The view of each pokemon, writes to a view are writes to the flat array.
+        """
+        ends = (
+            self.move_offsets[1:]
+            if lengths is None
+            else self.move_offsets[:-1] + lengths
+        )
+        return [data[start:end] for start, end in zip(self.move_offsets[:-1], ends)]
+
+    def moveset_segments(self, data: np.ndarray) -> list:
+        return [
+            data[start:end]
+            for start, end in zip(self.moveset_offsets[:-1], self.moveset_offsets[1:])
+        ]
+
+
+def get_pool_structures(
+    pokemon_list: list[Pokemon],
+    objective: str,
+    beta: float,
+    use_movesets: bool = True,
+    table: dict = {},
+) -> PoolStructures:
+    """
+    Returns the cached structures of the colonies of an objective over a pokemon pool, building them on a miss.
+
+    Args:
+        pokemon_list (List[Pokemon]): The filtered pokemon pool.
+        objective (str): The value of the objective of the colonies.
+        beta (float): The relative importance of the heuristics.
+        use_movesets (bool, optional): Whether colonies sample precomputed movesets. Defaults to True.
+        table (dict, optional): The precomputed moveset table. Defaults to {}.
+
+    Returns:
+        PoolStructures: The shared structures, they must not be modified.
+    """
+    key = (
+        objective,
+        beta,
+        use_movesets,
+        tuple(pokemon.id for pokemon in pokemon_list),
+    )
+    if key in _pool_structures_cache:
+        _pool_structures_cache.move_to_end(key)
+        return _pool_structures_cache[key]
+    pokemon_heuristics, move_heuristics = get_heuristics(pokemon_list, objective)
+    structures = PoolStructures(
+        pokemon_list,
+        get_movesets(pokemon_list, objective, table) if use_movesets else None,
+        pokemon_heuristics,
+        move_heuristics,
+        beta,
+    )
+    _pool_structures_cache[key] = structures
+    if len(_pool_structures_cache) > POOL_STRUCTURES_CACHE_SIZE:
+        _pool_structures_cache.popitem(last=False)
+    return structures
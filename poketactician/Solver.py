@@ -0,0 +1,373 @@
+import time
+from abc import ABC, abstractmethod
+from itertools import combinations, islice
+from math import ceil
+
+import numpy as np
+
+from .Elites import EliteSet
+from .features import RequestFeatures
+from .glob_var import elite_min_distance, elite_size, exhaustive_batch_size
+from .LocalSearch import LocalSearch
+from .models import Roles
+from .models.Pokemon import Pokemon
+from .models.Team import Team, TeamRecord, ant_dtype
+
+
+class Solver(ABC):
+    """
+    Common interface of the search engines of team composition.
+
+    Every engine works on the same [team_size, 5] ant encoding, with the same objective functions, vectorized
+    objective functions, preselection and roles, so they are interchangeable for a request. Roles are names of the
+    role checkers of models.Roles, and teams that do not fulfill them rank after the ones that do, see feasibility.
+    The shared exact enumeration, local search and solution accessors rely on the attributes below, which every
+    engine sets.
+
+    Attributes:
+        total_population (int): The total population size.
+        objective_functions_Q_rho (List[Tuple[Callable, float, float]]): The objective functions with their Q and
+            rho, engines without pheromones ignore the latter.
+        pokemon_pop (List[Pokemon]): The available Pokemon population.
+        preselected_pokemons (List[int]): The indexes of the preselected pokemon.
+        preSelected_moves (List[List[int]]): The preselected moves of each preselected pokemon.
+        roles (List[str]): The roles the team should fulfill.
+        slot_role_cache (dict): Whether a team slot fulfills each role, by the bytes of the slot.
+        batch_objective_functions (List[Callable | None]): The vectorized objective functions.
+        rng (np.random.Generator): The random stream of the run.
+        iteration_number (int): The current iteration number.
+        prev_candidate_set (np.ndarray): The candidate set of the last iteration, best first.
+        prev_candidate_values (np.ndarray): The joint objective values of the candidate set.
+        exact_evaluations (int): The number of ant and objective pairs evaluated with the exact objective functions.
+        best_record (TeamRecord): The best solution found so far and its joint objective value.
+        elites (EliteSet): The best distinct teams found so far.
+        joint_function (Callable): The joint objective function.
+
+    Methods:
+        optimize: Optimizes the team composition.
+        get_exact_evaluations: Returns the number of exact objective evaluations of the run.
+    """
+
+    @abstractmethod
+    def optimize(self, iters: int = None, time_limit: float = None):
+        """
+        Optimizes the team composition.
+
+        Args:
+            iters (int, optional): The maximum number of iterations. Defaults to None.
+            time_limit (float, optional): The maximum time limit in seconds. Defaults to None.
+        """
+
+    @abstractmethod
+    def get_exact_evaluations(self) -> int:
+        """
+        Returns the number of ants evaluated with the exact objective functions.
+        """
+
+    def initialize_local_search(self):
+        """
+        Initializes the local search applied to the candidate set every iteration.
+
+        Returns:
+            LocalSearch: The local search over the pokemon population.
+        """
+        return LocalSearch(
+            self.batch_objective_functions,
+            self.completion_moves(np.arange(len(self.pokemon_pop))),
+            np.array([len(pokemon.knowable_moves) for pokemon in self.pokemon_pop]),
+            len(self.preselected_pokemons),
+            self.preSelected_moves,
+            self.rng.spawn(1)[0],
+        )
+
+    def can_enumerate(self):
+        """
+        Checks if the remaining search space is small enough to be enumerated exactly.
+
+        Every objective needs a vectorized version, and at most one of them can depend on the moves so the best
+        moveset of each completion is known without searching.
+
+        Returns:
+            bool: True if all completions of the preselected pokemon can be enumerated, False otherwise.
+        """
+        return RequestFeatures.from_request(
+            self.pokemon_pop,
+            self.preselected_pokemons,
+            self.objective_functions_Q_rho,
+            self.batch_objective_functions,
+        ).enumerable
+
+    def move_objective_functions(self):
+        return [
+            batch_function
+            for batch_function in self.batch_objective_functions
+            if hasattr(batch_function, "best_moves")
+        ]
+
+    def completion_moves(self, species: np.ndarray, fixed_moves: list[int] = []):
+        """
+        Returns the best moves of each pokemon for the enumerated completions.
+
+        Args:
+            species (np.ndarray): The indexes of the pokemon.
+            fixed_moves (list[int], optional): Preselected moves of the pokemon. Defaults to [].
+
+        Returns:
+            np.ndarray: A [len(species), 4] array of move indexes padded with -1.
+        """
+        move_objective_functions = self.move_objective_functions()
+        if move_objective_functions:
+            return move_objective_functions[0].best_moves(species, fixed_moves)
+        # No objective depends on the moves, any valid moveset is optimal
+        move_counts = np.array(
+            [len(self.pokemon_pop[i].knowable_moves) for i in species]
+        )
+        # The free positions take the lowest moves that are not fixed
+        free_moves = [move for move in range(8) if move not in fixed_moves][
+            : 4 - len(fixed_moves)
+        ]
+        moves = np.tile(np.array(list(fixed_moves) + free_moves), (len(species), 1))
+        free = np.arange(4) >= len(fixed_moves)
+        return np.where(free & (moves >= move_counts[:, None]), -1, moves)
+
+    def enumerate_completions(self):
+        """
+        Enumerates every completion of the preselected pokemon in vectorized batches.
+
+        The completions that fulfill the roles of the run rank before the ones that do not, the roles of every
+        pokemon are checked once with the moves the enumeration gives it.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The best completions sorted by feasibility and joint objective value, the
+                first one is the exact optimum, and their joint objective values.
+        """
+        team_size = min(6, len(self.pokemon_pop))
+        preselected_size = len(self.preselected_pokemons)
+        free_slots = team_size - preselected_size
+        pop_size = int(self.total_population / len(self.objective_functions_Q_rho))
+        candidate_size = max(1, pop_size - ceil(pop_size * 0.90))
+
+        preselected_slots = np.ones([preselected_size, 5], dtype=int) * (-1)
+        for i, pokemon in enumerate(self.preselected_pokemons):
+            preselected_slots[i, 0] = pokemon
+            preselected_slots[i, 1:] = self.completion_moves(
+                np.array([pokemon]),
+                (self.preSelected_moves[i] if i < len(self.preSelected_moves) else []),
+            )[0]
+        free_pokemon = np.setdiff1d(
+            np.arange(len(self.pokemon_pop)), self.preselected_pokemons
+        )
+        free_pokemon_moves = self.completion_moves(free_pokemon)
+        preselected_roles = np.zeros(len(self.roles), dtype=bool)
+        free_roles = np.zeros([len(free_pokemon), len(self.roles)], dtype=bool)
+        if self.roles:
+            for slot in preselected_slots.astype(ant_dtype):
+                preselected_roles |= self.slot_roles(slot)
+            for index, (pokemon, moves) in enumerate(
+                zip(free_pokemon, free_pokemon_moves)
+            ):
+                free_roles[index] = self.slot_roles(
+                    np.concatenate([[pokemon], moves]).astype(ant_dtype)
+                )
+
+        best_ants = np.empty([0, team_size, 5], dtype=ant_dtype)
+        best_values = np.empty(0)
+        best_feasible = np.empty(0, dtype=bool)
+        completions = combinations(range(len(free_pokemon)), free_slots)
+        while True:
+            batch = list(islice(completions, exhaustive_batch_size))
+            if not batch:
+                break
+            batch = np.array(batch, dtype=int).reshape(len(batch), free_slots)
+            ants = np.empty([batch.shape[0], team_size, 5], dtype=ant_dtype)
+            ants[:, :preselected_size] = preselected_slots
+            ants[:, preselected_size:, 0] = free_pokemon[batch]
+            ants[:, preselected_size:, 1:] = free_pokemon_moves[batch]
+            values = np.ones(batch.shape[0])
+            for batch_function in self.batch_objective_functions:
+                values = values * batch_function(ants)
+            self.exact_evaluations += values.size * len(self.batch_objective_functions)
+            feasible = (preselected_roles | free_roles[batch].any(axis=1)).all(axis=1)
+            best_ants = np.concatenate([best_ants, ants])
+            best_values = np.concatenate([best_values, values])
+            best_feasible = np.concatenate([best_feasible, feasible])
+            best = np.lexsort((-best_values, ~best_feasible))[:candidate_size]
+            best_ants, best_values = best_ants[best], best_values[best]
+            best_feasible = best_feasible[best]
+
+        return best_ants, best_values
+
+    def should_continue(self, iters, time_limit, start_time):
+        """
+        Checks if the optimization should continue.
+
+        Args:
+            iters (int): The maximum number of iterations.
+            time_limit (float): The maximum time limit in seconds.
+            start_time (float): The start time of the optimization.
+
+        Returns:
+            bool: True if the optimization should continue, False otherwise.
+        """
+        return (iters is None or self.iteration_number < iters) and (
+            time_limit is None or (time.time() - start_time) < time_limit
+        )
+
+    def feasibility(self, ants: np.ndarray) -> np.ndarray:
+        """
+        Returns whether each ant fulfills every role of the run with at least one of its pokemon.
+        """
+        if len(self.roles) == 0:
+            return np.ones(len(ants), dtype=bool)
+        return np.array(
+            [
+                np.any([self.slot_roles(slot) for slot in ant], axis=0).all()
+                for ant in np.asarray(ants, dtype=ant_dtype)
+            ],
+            dtype=bool,
+        )
+
+    def slot_roles(self, slot: np.ndarray) -> tuple[bool, ...]:
+        # Ants share most of their slots, so the roles of every pokemon and moveset are only checked once
+        key = slot.tobytes()
+        if key not in self.slot_role_cache:
+            pokemon = Team.ant_to_team([slot], self.pokemon_pop).pokemons[0]
+            self.slot_role_cache[key] = tuple(
+                pokemon.is_role(getattr(Roles, role)) > 0 for role in self.roles
+            )
+        return self.slot_role_cache[key]
+
+    def initialize_best_record(self):
+        """
+        Initializes the best solution of the run with the first candidate of the first candidate set.
+        """
+        self.best_record = TeamRecord(
+            self.prev_candidate_set[0],
+            self.prev_candidate_values[0],
+            self.feasibility(self.prev_candidate_set[:1])[0],
+        )
+
+    def update_best_record(self, ant: np.ndarray, value: float):
+        """
+        Replaces the best solution found so far if the ant beats it, a team that fulfills the roles beats one that
+        does not, and teams of the same feasibility are compared by joint objective value.
+
+        Args:
+            ant (np.ndarray): The best ant of the iteration.
+            value (float): The joint objective value of the ant, already computed with the candidate set.
+        """
+        record = TeamRecord(ant, value, self.feasibility(np.array([ant]))[0])
+        if record.rank() > self.best_record.rank():
+            self.best_record = record
+
+    def initialize_elites(self):
+        """
+        Initializes the elite set of the run with the first candidate set.
+        """
+        self.elites = EliteSet(elite_size, elite_min_distance)
+        self.update_elites(self.prev_candidate_set, self.prev_candidate_values)
+
+    def update_elites(self, candidate_set: np.ndarray, values: np.ndarray):
+        """
+        Offers a candidate set to the elite set of the run, with the joint objective values computed when it was
+        selected.
+        """
+        self.elites.update(
+            candidate_set, values, self.feasibility if self.roles else None
+        )
+
+    @property
+    def best_so_far(self):
+        return self.best_record.ant
+
+    def get_solution_team_names(self):
+        """
+        Returns the names of the Pokemon in the best solution.
+
+        Returns:
+            List[str]: A list of Pokemon names.
+
+        Raises:
+            Exception: If the optimization has not been run.
+        """
+        team = []
+        if self.best_so_far is not None:
+            for pok in self.best_so_far:
+                team += [self.pokemon_pop[pok[0]].name]
+            return team
+        else:
+            raise Exception("Optimization has not been run.")
+
+    def get_solution(self):
+        """
+        Returns the best solution as a Team object.
+
+        Returns:
+            Team: The best solution as a Team object.
+
+        Raises:
+            Exception: If the optimization has not been run.
+        """
+        if self.best_so_far is not None:
+            return self.ant_to_solution(self.best_so_far)
+        else:
+            raise Exception("Optimization has not been run.")
+
+    def get_solutions(self, k: int = None) -> list[Team]:
+        """
+        Returns the best distinct teams of the run, so alternatives are served without running again.
+
+        Args:
+            k (int, optional): The maximum number of teams. Defaults to None, every elite.
+
+        Returns:
+            List[Team]: The teams, best first.
+        """
+        return [self.ant_to_solution(record.ant) for record in self.elites.top(k)]
+
+    def get_alternatives(self, k: int = None) -> list[tuple[Team, float]]:
+        """
+        Returns the best distinct teams of the run other than the best solution, with their joint objective values.
+
+        Args:
+            k (int, optional): The maximum number of teams. Defaults to None, every other elite.
+
+        Returns:
+            List[Tuple[Team, float]]: The teams and their joint objective values, best first.
+        """
+        best_key = EliteSet.canonical(self.best_so_far).tobytes()
+        return [
+            (self.ant_to_solution(record.ant), record.value)
+            for record in self.elites.top()
+            if record.ant.tobytes() != best_key
+        ][:k]
+
+    def get_objective_values(self, k: int = None) -> list[float]:
+        """
+        Returns the joint objective values of the teams of get_solutions.
+        """
+        return [record.value for record in self.elites.top(k)]
+
+    def ant_to_solution(self, ant: np.ndarray) -> Team:
+        team = Team()
+        for pok in ant:
+            temp_pokemon = Pokemon.from_json(self.pokemon_pop[pok[0]].serialize())
+            for move_index in pok[1:]:
+                temp_pokemon.teach_move(move_index)
+            team.add_pokemon(temp_pokemon)
+        return team
+
+    def get_objective_value(self):
+        """
+        Returns the objective value of the best solution.
+
+        Returns:
+            float: The objective value of the best solution.
+
+        Raises:
+            Exception: If the optimization has not been run.
+        """
+        if self.best_so_far is not None:
+            return self.best_record.value
+        else:
+            raise Exception("Optimization has not been run.")
@@ -0,0 +1,89 @@
+import numpy as np
+
+from .PoolStructures import PoolStructures
+
+
+class AdditiveSurrogate:
+    """
+    Additive per-slot model of an objective, fitted online from the ants evaluated exactly.
+
+    The value of an ant is modeled as a bias plus one weight per pokemon in the team and one weight per move of each
+    pokemon. Every fit moves the weights towards the residuals of the new ants, each feature with a step that
+    decreases with the number of times it was seen, so the model is refit incrementally at almost no cost.
+    Values are modeled relative to the largest value seen, which keeps the steps independent of the objective scale.
+
+    Args:
+        structures (PoolStructures): The structures of the pool, they define the move features.
+        epochs (int, optional): The number of passes over every new batch. Defaults to 2.
+
+    Attributes:
+        samples (int): The number of ants the model was fitted on.
+    """
+
+    def __init__(self, structures: PoolStructures, epochs: int = 2):
+        self.move_offsets = structures.move_offsets
+        self.epochs = epochs
+        self.bias = 0.0
+        self.scale = 0.0
+        self.samples = 0
+        self.species_weights = np.zeros(structures.size)
+        self.species_counts = np.zeros(structures.size)
+        self.move_weights = np.zeros(structures.move_offsets[-1])
+        self.move_counts = np.zeros(structures.move_offsets[-1])
+
+    def features(self, ants: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        species = ants[..., 0].astype(np.int64)
+        moves = ants[..., 1:5]
+        known_moves = moves >= 0
+        move_features = self.move_offsets[species][..., None] + np.maximum(moves, 0)
+        return species, move_features, known_moves
+
+    def predict(self, ants: np.ndarray) -> np.ndarray:
+        """
+        Predicts the objective value of a batch of [ants, team_size, 5] ants.
+        """
+        species, move_features, known_moves = self.features(ants)
+        relative_values = (
+            self.bias
+            + self.species_weights[species].sum(axis=-1)
+            + (self.move_weights[move_features] * known_moves).sum(axis=(-2, -1))
+        )
+        return relative_values * self.scale
+
+    def fit(self, ants: np.ndarray, values: np.ndarray):
+        """
+        Updates the model with a batch of ants and their exact objective values.
+        """
+        if len(ants) == 0:
+            return
+        scale = max(self.scale, np.abs(values).max()) or 1.0
+        if self.scale > 0 and scale != self.scale:
+            # Keep the predictions of the fitted weights when the scale grows
+            self.bias *= self.scale / scale
+            self.species_weights *= self.scale / scale
+            self.move_weights *= self.scale / scale
+        self.scale = scale
+        species, move_features, known_moves = self.features(ants)
+        feature_counts = species.shape[-1] + known_moves.sum(axis=(-2, -1))
+        np.add.at(self.species_counts, species.ravel(), 1)
+        np.add.at(self.move_counts, move_features[known_moves], 1)
+        for _ in range(self.epochs):
+            residuals = values / self.scale - self.predict(ants) / self.scale
+            self.bias += residuals.mean() / 2
+            # Half of the residual is shared among the features of the ant, the bias takes the other half
+            shares = residuals / (2 * feature_counts)
+            species_updates = np.bincount(
+                species.ravel(),
+                weights=np.repeat(shares, species.shape[-1]),
+                minlength=len(self.species_weights),
+            )
+            move_updates = np.bincount(
+                move_features[known_moves],
+                weights=np.broadcast_to(shares[:, None, None], known_moves.shape)[
+                    known_moves
+                ],
+                minlength=len(self.move_weights),
+            )
+            self.species_weights += species_updates / np.maximum(self.species_counts, 1)
+            self.move_weights += move_updates / np.maximum(self.move_counts, 1)
+        self.samples += len(ants)
@@ -0,0 +1,306 @@
+"""
+Benchmark of search configurations over representative team-suggestion requests.
+
+Run from the repository root, so the data files are found:
+
+    python -m poketactician.benchmark --seeds 5 --iters 25
+
+Every configuration is run with each kernel backend given, numba is only available when installed.
+"""
+
+import argparse
+import json
+import time
+from dataclasses import asdict
+
+import numpy as np
+
+from . import kernels
+from .engines import CONFIGURATIONS, SolverEngine, create_solver
+from .features import RequestFeatures
+from .glob_var import (
+    alpha,
+    beta,
+    iterations,
+    pok_pre_filter,
+    total_population,
+)
+from .models.Pokemon import Pokemon
+from .models.Types import PokemonType
+from .objectives import ObjectiveFunctions
+
+
+def default_pool(pokemon: Pokemon) -> bool:
+    """
+    Mirrors the default filters of the app: no megas, battle only forms, totems or legendaries.
+    """
+    return not (
+        pokemon.mega
+        or pokemon.battle_only
+        or "totem" in pokemon.name
+        or pokemon.legendary
+        or pokemon.mythical
+    )
+
+
+# Representative request shapes: the pokemon pool, the objectives and the number of preselected pokemon
+SCENARIOS = {
+    "full-dex": {
+        "pool": lambda pokemon: True,
+        "objectives": ["Attack", "Team Coverage"],
+        "preselected": 0,
+    },
+    "full-dex-attack": {
+        "pool": lambda pokemon: True,
+        "objectives": ["Attack"],
+        "preselected": 0,
+    },
+    "mono-water": {
+        "pool": lambda pokemon: pokemon.type1 == PokemonType.WATER
+        and pokemon.type2 is None,
+        "objectives": ["Attack", "Team Coverage"],
+        "preselected": 0,
+    },
+    "generation-1": {
+        "pool": lambda pokemon: pokemon.id <= 151,
+        "objectives": ["Attack", "Team Coverage"],
+        "preselected": 2,
+    },
+}
+
+
+def build_problem(scenario: dict, beta: float = beta) -> tuple[list[Pokemon], dict]:
+    """
+    Builds the pokemon pool and the MOACO keyword arguments of a scenario.
+
+    Args:
+        scenario (dict): The scenario, as in SCENARIOS.
+        beta (float, optional): The relative importance of the heuristics. Defaults to glob_var.beta.
+
+    Returns:
+        Tuple[List[Pokemon], dict]: The pokemon pool and the MOACO keyword arguments.
+    """
+    pool = [
+        pokemon
+        for pokemon in pok_pre_filter
+        if default_pool(pokemon) and scenario["pool"](pokemon)
+    ]
+    objectives = [ObjectiveFunctions(objective) for objective in scenario["objectives"]]
+    return pool, {
+        "objective_functions_Q_rho": [
+            objective.get_function(pool) for objective in objectives
+        ],
+        "pokemon_pop": pool,
+        "preselected_pokemons": list(range(scenario["preselected"])),
+        "preselected_moves": [[] for _ in range(scenario["preselected"])],
+        "batch_objective_functions": [
+            objective.get_batch_function(pool) for objective in objectives
+        ],
+        "objective_structures": [
+            objective.get_pool_structures(pool, beta) for objective in objectives
+        ],
+    }
+
+
+def run_scenario(
+    scenario_name: str,
+    configuration_name: str,
+    seed: int,
+    total_population: int = total_population,
+    iters: int = iterations,
+    configurations: dict = CONFIGURATIONS,
+    backend: str = kernels.KernelBackend.NUMPY.value,
+) -> dict:
+    """
+    Runs one configuration on one scenario with a kernel backend.
+
+    Returns:
+        dict: The record of the run, with its wall time in seconds, joint objective value and the features of the
+            request.
+    """
+    kernels.set_backend(backend)
+    kernels.warm_up()
+    pool, problem = build_problem(SCENARIOS[scenario_name])
+    features = RequestFeatures.from_request(
+        pool,
+        problem["preselected_pokemons"],
+        problem["objective_functions_Q_rho"],
+        problem["batch_objective_functions"],
+    )
+    options = dict(configurations[configuration_name])
+    engine = options.pop("engine", SolverEngine.MOACO)
+    start_time = time.time()
+    m_col = create_solver(
+        engine,
+        total_population,
+        alpha=alpha,
+        beta=beta,
+        **problem,
+        seed=seed,
+        **options,
+    )
+    m_col.optimize(iters=iters)
+    return {
+        "scenario": scenario_name,
+        "configuration": configuration_name,
+        "backend": backend,
+        "seed": seed,
+        "time": time.time() - start_time,
+        "value": float(m_col.get_objective_value()),
+        "exact_evaluations": m_col.get_exact_evaluations(),
+        "exhaustive": m_col.exhaustive,
+        "total_population": total_population,
+        "iterations": iters,
+        **asdict(features),
+    }
+
+
+def run_benchmark(
+    scenario_names: list[str],
+    configuration_names: list[str],
+    seeds: int,
+    total_population: int = total_population,
+    iters: int = iterations,
+    configurations: dict = CONFIGURATIONS,
+    backends: list[str] = [kernels.KernelBackend.NUMPY.value],
+) -> list[dict]:
+    return [
+        run_scenario(
+            scenario_name,
+            configuration_name,
+            seed,
+            total_population,
+            iters,
+            configurations,
+            backend,
+        )
+        for scenario_name in scenario_names
+        for configuration_name in configuration_names
+        for backend in backends
+        for seed in range(seeds)
+    ]
+
+
+def summarize(records: list[dict]) -> list[dict]:
+    """
+    Averages the records per scenario and configuration, values are relative to the best configuration.
+
+    Returns:
+        List[dict]: One row per scenario and configuration.
+    """
+    rows = []
+    for scenario in dict.fromkeys(record["scenario"] for record in records):
+        scenario_records = [
+            record for record in records if record["scenario"] == scenario
+        ]
+        configurations = dict.fromkeys(
+            record["configuration"] for record in scenario_records
+        )
+        means = {
+            configuration: (
+                np.mean(
+                    [
+                        record["value"]
+                        for record in scenario_records
+                        if record["configuration"] == configuration
+                    ]
+                ),
+                np.mean(
+                    [
+                        record["time"]
+                        for record in scenario_records
+                        if record["configuration"] == configuration
+                    ]
+                ),
+            )
+            for configuration in configurations
+        }
+        best_value = max(value for value, _ in means.values())
+        for configuration, (value, elapsed_time) in means.items():
+            rows.append(
+                {
+                    "scenario": scenario,
+                    "configuration": configuration,
+                    "value": value,
+                    "relative_value": value / best_value if best_value else 0,
+                    "time": elapsed_time,
+                }
+            )
+    return rows
+
+
+def summarize_backends(records: list[dict]) -> list[dict]:
+    """
+    Averages the wall time per scenario and backend, the speedup is relative to the NumPy backend.
+
+    Returns:
+        List[dict]: One row per scenario and backend.
+    """
+    rows = []
+    for scenario in dict.fromkeys(record["scenario"] for record in records):
+        times = {}
+        for backend in dict.fromkeys(record["backend"] for record in records):
+            backend_times = [
+                record["time"]
+                for record in records
+                if record["scenario"] == scenario and record["backend"] == backend
+            ]
+            if backend_times:
+                times[backend] = np.mean(backend_times)
+        baseline = times.get(kernels.KernelBackend.NUMPY.value)
+        for backend, elapsed_time in times.items():
+            rows.append(
+                {
+                    "scenario": scenario,
+                    "backend": backend,
+                    "time": elapsed_time,
+                    "speedup": baseline / elapsed_time if baseline else None,
+                }
+            )
+    return rows
+
+
+def print_summary(rows: list[dict]):
+    print(f"{'scenario':<20}{'configuration':<24}{'rel. value':>12}{'time (s)':>12}")
+    for row in rows:
+        print(
+            f"{row['scenario']:<20}{row['configuration']:<24}"
+            f"{row['relative_value']:>12.3f}{row['time']:>12.3f}"
+        )
+
+
+def print_backend_summary(rows: list[dict]):
+    print(f"{'scenario':<20}{'backend':<24}{'time (s)':>12}{'speedup':>12}")
+    for row in rows:
+        speedup = f"{row['speedup']:>12.2f}" if row["speedup"] else f"{'-':>12}"
+        print(f"{row['scenario']:<20}{row['backend']:<24}{row['time']:>12.3f}{speedup}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS))
+    parser.add_argument("--configurations", nargs="+", default=list(CONFIGURATIONS))
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        default=[backend.value for backend in kernels.available_backends()],
+    )
+    parser.add_argument("--seeds", type=int, default=3)
+    parser.add_argument("--population", type=int, default=total_population)
+    parser.add_argument("--iters", type=int, default=iterations)
+    parser.add_argument("--output", default="data/benchmark_results.json")
+    args = parser.parse_args()
+
+    records = run_benchmark(
+        args.scenarios,
+        args.configurations,
+        args.seeds,
+        args.population,
+        args.iters,
+        backends=args.backends,
+    )
+    print_summary(summarize(records))
+    print()
+    print_backend_summary(summarize_backends(records))
+    with open(args.output, "w") as json_file:
+        json.dump(records, json_file, indent=4)
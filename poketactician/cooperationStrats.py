@@ -1,5 +1,14 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable
+
 from .Colony import Colony
 
+if TYPE_CHECKING:
+    # Archive depends on utils, which imports glob_var, so it is only imported for type checking
+    from .Archive import SharedArchive
+
 
 def selectionByDominance(colonies: list[Colony], prev_candidate_set):
     for colony in colonies:
@@ -7,3 +16,37 @@ def selectionByDominance(colonies: list[Colony], prev_candidate_set):
         colony.update_pokemon_prob()
         colony.ACO()
     return colonies
+
+
+def asynchronousCooperation(
+    colonies: list[Colony],
+    archive: SharedArchive,
+    should_continue: Callable[[int], bool],
+) -> list[int]:
+    """
+    Runs every colony in its own thread, without a barrier between iterations.
+
+    Every step a colony reads the latest archive, updates its pheromones, builds a new population and publishes its
+    candidate set, so slow colonies never hold back the faster ones.
+
+    Args:
+        colonies (List[Colony]): The colonies, each one is only used by its own thread.
+        archive (SharedArchive): The archive shared by the colonies.
+        should_continue (Callable[[int], bool]): Whether a colony that ran the given number of steps continues.
+
+    Returns:
+        List[int]: The number of steps run by each colony.
+    """
+
+    def run_colony(colony: Colony) -> int:
+        steps = 0
+        while should_continue(steps):
+            colony.update_ph_concentration(archive.snapshot())
+            colony.update_pokemon_prob()
+            colony.ACO()
+            archive.publish(colony.candidate_set())
+            steps += 1
+        return steps
+
+    with ThreadPoolExecutor(max_workers=max(1, len(colonies))) as executor:
+        return list(executor.map(run_colony, colonies))
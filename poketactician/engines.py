@@ -0,0 +1,79 @@
+from enum import Enum
+from typing import Callable, Tuple
+
+from .Colony import PheromoneUpdate
+from .glob_var import CooperationStats, surrogate_fraction
+from .MOACO import MOACO
+from .models.Pokemon import Pokemon
+from .NSGA2 import NSGA2
+from .Solver import Solver
+
+
+class SolverEngine(Enum):
+    """
+    Search engines of team composition, every member is a Solver class over the same problem arguments.
+    """
+
+    MOACO = MOACO
+    NSGA2 = NSGA2
+
+
+# Search configurations of the benchmark and the portfolio, as keyword arguments of the solver, the engine defaults
+# to MOACO
+CONFIGURATIONS = {
+    "ant-system": {},
+    "max-min": {"pheromone_update": PheromoneUpdate.MAX_MIN},
+    "max-min-elitist": {"pheromone_update": PheromoneUpdate.MAX_MIN, "elitist": True},
+    "asynchronous": {"cooperation_strategy": CooperationStats.ASYNCHRONOUS},
+    "surrogate": {"surrogate_fraction": surrogate_fraction},
+    "nsga2": {"engine": SolverEngine.NSGA2},
+}
+
+
+def create_solver(
+    engine: SolverEngine,
+    total_population: int,
+    objective_functions_Q_rho: list[Tuple[Callable, float, float]],
+    pokemon_pop: list[Pokemon],
+    preselected_pokemons: list[int],
+    preselected_moves: list[list[int]],
+    alpha: float,
+    beta: float,
+    **options,
+) -> Solver:
+    """
+    Builds the solver of an engine for a request.
+
+    Args:
+        engine (SolverEngine): The search engine.
+        total_population (int): The total population size.
+        objective_functions_Q_rho (List[Tuple[Callable, float, float]]): The objective functions with their Q and rho.
+        pokemon_pop (List[Pokemon]): The available Pokemon population.
+        preselected_pokemons (List[int]): The indexes of the preselected pokemon.
+        preselected_moves (List[List[int]]): The preselected moves of each preselected pokemon.
+        alpha (float): The relative importance of pheromones, only used by the colonies.
+        beta (float): The relative importance of heuristics, only used by the colonies.
+        **options: Keyword arguments of the engine, e.g. roles, batch_objective_functions or seed.
+
+    Returns:
+        Solver: The solver, ready to optimize.
+    """
+    if engine == SolverEngine.MOACO:
+        return MOACO(
+            total_population,
+            objective_functions_Q_rho,
+            pokemon_pop,
+            preselected_pokemons,
+            preselected_moves,
+            alpha,
+            beta,
+            **options,
+        )
+    return engine.value(
+        total_population,
+        objective_functions_Q_rho,
+        pokemon_pop,
+        preselected_pokemons,
+        preselected_moves,
+        **options,
+    )
@@ -0,0 +1,67 @@
+from dataclasses import dataclass
+from math import comb
+from typing import Callable
+
+from .glob_var import exhaustive_limit
+from .models.Pokemon import Pokemon
+
+
+@dataclass(frozen=True)
+class RequestFeatures:
+    """
+    Cheap features of the shape of a team-suggestion request, known before any search.
+
+    Attributes:
+        pool_size (int): The number of pokemon in the pool, preselected ones included.
+        free_slots (int): The number of team slots left after the preselected pokemon.
+        objectives (int): The number of objective functions, strategies included.
+        vectorized (bool): Whether every objective has a vectorized function.
+        completions (int): The number of teams completing the preselected pokemon.
+        enumerable (bool): Whether the completions can be enumerated exactly instead of searched.
+    """
+
+    pool_size: int
+    free_slots: int
+    objectives: int
+    vectorized: bool
+    completions: int
+    enumerable: bool
+
+    @classmethod
+    def from_request(
+        cls,
+        pokemon_pop: list[Pokemon],
+        preselected_pokemons: list[int],
+        objective_functions: list,
+        batch_objective_functions: list[Callable | None] = None,
+    ) -> "RequestFeatures":
+        """
+        Computes the features of a request.
+
+        Every objective needs a vectorized version to enumerate the completions, and at most one of them can depend
+        on the moves so the best moveset of each completion is known without searching.
+        """
+        team_size = min(6, len(pokemon_pop))
+        free_slots = team_size - len(preselected_pokemons)
+        completions = comb(len(pokemon_pop) - len(preselected_pokemons), free_slots)
+        vectorized = batch_objective_functions is not None and all(
+            batch_function is not None for batch_function in batch_objective_functions
+        )
+        move_objectives = (
+            sum(
+                hasattr(batch_function, "best_moves")
+                for batch_function in batch_objective_functions
+            )
+            if vectorized
+            else 0
+        )
+        return cls(
+            pool_size=len(pokemon_pop),
+            free_slots=free_slots,
+            objectives=len(objective_functions),
+            vectorized=vectorized,
+            completions=completions,
+            enumerable=(
+                vectorized and move_objectives <= 1 and completions <= exhaustive_limit
+            ),
+        )
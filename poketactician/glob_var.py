@@ -1,9 +1,11 @@
 import json
 from enum import Enum
 
-from .cooperationStrats import selectionByDominance
+from .cooperationStrats import asynchronousCooperation, selectionByDominance
+from .kernels import set_backend
 from .models.Move import Move
 from .models.Pokemon import Pokemon
+from .movesets import load_moveset_table
 
 # from models import Pokemon
 
@@ -16,11 +18,66 @@ rho = 0.1
 
 # Relative importance of pheromones (alpha) vs heuristic (beta)
 alpha = 1
-beta = 0
+beta = 1
+
+# Total number of ants of a request, shared by the colonies, and number of iterations
+total_population = 400
+iterations = 25
+
+# Search engine of the requests, the name of a member of engines.SolverEngine: "MOACO" or "NSGA2"
+solver_engine = "MOACO"
+
+# Sample whole precomputed movesets instead of single moves for decomposable objectives
+use_movesets = True
+
+# Maximum number of team completions enumerated exactly instead of running the colonies
+exhaustive_limit = 250000
+# Number of completions evaluated per vectorized batch
+exhaustive_batch_size = 8192
+
+# Evaluation and time budget of the local search applied to the candidate set every iteration, 0 disables it
+local_search_evaluations = 2000
+local_search_time = 0.05
+
+# Number of distinct teams kept per run for get_solutions, and minimum number of different pokemon between them
+elite_size = 10
+elite_min_distance = 2
+
+# Number of alternative teams served with a team suggestion, taken from the distinct teams of the run
+suggested_alternatives = 3
+
+# Fraction of the population of a colony evaluated exactly after a surrogate screening, used for the objectives
+# without a vectorized function, which are the expensive ones
+surrogate_fraction = 0.3
+
+
+# Function to load the hyperparameters written by the tuning tool, python -m poketactician.tuning
+def load_tuned_profile(file_name):
+    try:
+        with open(file_name, "r") as json_file:
+            return json.load(json_file)["parameters"]
+    except FileNotFoundError:
+        return {}
+
+
+# Tuned values override the defaults above
+tuned_profile = load_tuned_profile("data/tuned_profile.json")
+Q = tuned_profile.get("Q", Q)
+rho = tuned_profile.get("rho", rho)
+alpha = tuned_profile.get("alpha", alpha)
+beta = tuned_profile.get("beta", beta)
+total_population = tuned_profile.get("total_population", total_population)
+iterations = tuned_profile.get("iterations", iterations)
+
+# Backend of the construction, deposit and evaluation kernels: "numpy", "numba" or "auto" (numba when installed)
+kernel_backend = "auto"
+set_backend(kernel_backend)
 
 
 class CooperationStats(Enum):
     SELECTION_BY_DOMINANCE = selectionByDominance
+    # Colonies run in parallel threads and cooperate through a shared archive, see MOACO.optimize_asynchronously
+    ASYNCHRONOUS = asynchronousCooperation
 
 
 # Save to a JSON file the pokemon_list
@@ -47,3 +104,4 @@ def load_moves_from_json(file_name):
 
 pok_pre_filter = load_pokemon_from_json("data/pokemon_data.json")
 moves = load_moves_from_json("data/move_data.json")
+moveset_table = load_moveset_table("data/moveset_data.json")
@@ -0,0 +1,93 @@
+import numpy as np
+
+from .models.Pokemon import Pokemon
+from .models.Types import type_chart, type_order
+from .movesets import attack_move_scores
+
+# Floor of every heuristic value, a zero heuristic would forbid the choice whenever beta > 0
+HEURISTIC_FLOOR = 1e-3
+
+# Heuristic vectors per (objective, pokemon id), shared across requests since they only depend on the pokemon
+_pokemon_heuristic_cache = {}
+_move_heuristic_cache = {}
+
+
+def stats_pokemon_heuristic(pokemon: Pokemon) -> float:
+    return pokemon.overall_stats() / 500
+
+
+def uniform_move_heuristic(pokemon: Pokemon) -> np.ndarray:
+    return np.ones(max(1, len(pokemon.knowable_moves)))
+
+
+def attack_pokemon_heuristic(pokemon: Pokemon) -> float:
+    """
+    Expected power of the best moveset of the pokemon, STAB and split adjusted.
+    """
+    scores = attack_move_scores(pokemon)
+    return np.sort(scores)[::-1][:4].sum()
+
+
+def attack_move_heuristic(pokemon: Pokemon) -> np.ndarray:
+    """
+    Expected power of each knowable move relative to the best move of the pokemon.
+    """
+    scores = attack_move_scores(pokemon)
+    if scores.size == 0 or scores.max() <= 0:
+        return uniform_move_heuristic(pokemon)
+    return scores / scores.max()
+
+
+def coverage_pokemon_heuristic(pokemon: Pokemon) -> float:
+    """
+    Defensive type profile of the pokemon, team coverage grows with the types brought to the team and with the
+    weaknesses and resistances that can cover the rest of the team.
+    """
+    pokemon_types = [
+        pok_type for pok_type in [pokemon.type1, pokemon.type2] if pok_type is not None
+    ]
+    defense = np.ones(len(type_order))
+    for pok_type in pokemon_types:
+        defense = defense * type_chart[:, type_order.index(pok_type)]
+    return len(pokemon_types) * (1 + (defense != 1).sum())
+
+
+# Objective value -> (pokemon heuristic, move heuristic)
+OBJECTIVE_HEURISTICS = {
+    "Attack": (attack_pokemon_heuristic, attack_move_heuristic),
+    "Team Coverage": (coverage_pokemon_heuristic, uniform_move_heuristic),
+}
+
+
+def get_heuristics(
+    pokemon_list: list[Pokemon], objective: str
+) -> tuple[np.ndarray, list[np.ndarray]]:
+    """
+    Returns the heuristic vectors of the pokemon and their moves for an objective.
+
+    Objectives without a specific heuristic fall back to the overall stats of the pokemon and uniform moves.
+
+    Args:
+        pokemon_list (list[Pokemon]): The pokemon in the decision space.
+        objective (str): The value of the objective the heuristics guide.
+
+    Returns:
+        Tuple[np.ndarray, List[np.ndarray]]: The heuristic of each pokemon and of each of its knowable moves.
+    """
+    pokemon_heuristic, move_heuristic = OBJECTIVE_HEURISTICS.get(
+        objective, (stats_pokemon_heuristic, uniform_move_heuristic)
+    )
+    pokemon_heuristics = np.zeros(len(pokemon_list))
+    move_heuristics = []
+    for i, pokemon in enumerate(pokemon_list):
+        key = (objective, pokemon.id)
+        if key not in _pokemon_heuristic_cache:
+            _pokemon_heuristic_cache[key] = max(
+                pokemon_heuristic(pokemon), HEURISTIC_FLOOR
+            )
+            _move_heuristic_cache[key] = np.maximum(
+                move_heuristic(pokemon), HEURISTIC_FLOOR
+            )
+        pokemon_heuristics[i] = _pokemon_heuristic_cache[key]
+        move_heuristics.append(_move_heuristic_cache[key])
+    return pokemon_heuristics, move_heuristics
@@ -0,0 +1,477 @@
+"""
+Kernels of the colonies: ant construction, pheromone deposit and objective evaluation.
+
+Every kernel has a NumPy implementation and, when numba is installed, a compiled one that releases the GIL. Random
+numbers are always drawn with NumPy by the caller and both implementations perform the same floating point operations
+in the same order, so the backends give bit-identical results and the NumPy one is a drop-in fallback.
+
+Roulette selections draw u in (0, 1] and pick the first choice whose cumulative weight reaches u times the total
+weight, choices already taken are given a zero weight.
+"""
+
+from enum import Enum
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+class KernelBackend(Enum):
+    NUMPY = "numpy"
+    NUMBA = "numba"
+
+
+def available_backends() -> list[KernelBackend]:
+    return [KernelBackend.NUMPY] + ([KernelBackend.NUMBA] if numba is not None else [])
+
+
+######### NumPy
+
+
+def numpy_sample_pokemon(
+    probabilities: np.ndarray, preselected: np.ndarray, uniforms: np.ndarray
+) -> np.ndarray:
+    """
+    Samples the free pokemon of every ant without replacement, ants whose remaining weights are all zero draw
+    uniformly among the pokemon they do not hold yet.
+
+    Args:
+        probabilities (np.ndarray): The [n] selection weights of the pokemon.
+        preselected (np.ndarray): The pokemon already in every ant, they are never sampled.
+        uniforms (np.ndarray): The [ants, free_slots] uniform numbers in (0, 1].
+
+    Returns:
+        np.ndarray: The [ants, free_slots] sampled pokemon.
+    """
+    weights = np.tile(probabilities, (uniforms.shape[0], 1))
+    weights[:, preselected] = 0
+    unused = np.ones(weights.shape, dtype=bool)
+    unused[:, preselected] = False
+    species = np.empty(uniforms.shape, dtype=np.int64)
+    rows = np.arange(uniforms.shape[0])
+    for slot in range(uniforms.shape[1]):
+        exhausted = ~(weights > 0).any(axis=1)
+        weights[exhausted] = unused[exhausted]
+        cumulative = np.cumsum(weights, axis=1)
+        thresholds = uniforms[:, slot] * cumulative[:, -1]
+        species[:, slot] = (cumulative < thresholds[:, None]).sum(axis=1)
+        weights[rows, species[:, slot]] = 0
+        unused[rows, species[:, slot]] = False
+    return species
+
+
+def gather_segments(
+    data: np.ndarray, offsets: np.ndarray, counts: np.ndarray, owners: np.ndarray
+) -> np.ndarray:
+    """
+    Gathers the segments of a flat array of the given owners into a zero padded [..., max_count] array.
+    """
+    width = max(int(counts.max(initial=0)), 1)
+    positions = np.arange(width)
+    indices = offsets[owners][..., None] + positions
+    return np.where(
+        positions < counts[owners][..., None],
+        data[np.minimum(indices, len(data) - 1)],
+        0,
+    )
+
+
+def numpy_sample_moves(
+    species: np.ndarray,
+    uniforms: np.ndarray,
+    move_probabilities: np.ndarray,
+    move_offsets: np.ndarray,
+    move_counts: np.ndarray,
+    preselected_moves: np.ndarray,
+    preselected_counts: np.ndarray,
+) -> np.ndarray:
+    """
+    Samples the moves of every slot of every ant without replacement, keeping the preselected moves.
+
+    Args:
+        species (np.ndarray): The [ants, slots] pokemon of the ants.
+        uniforms (np.ndarray): The [ants, slots, 4] uniform numbers in (0, 1].
+        move_probabilities (np.ndarray): The flat move selection weights, one segment per pokemon.
+        move_offsets (np.ndarray): The start of the move segment of each pokemon.
+        move_counts (np.ndarray): The number of knowable moves of each pokemon.
+        preselected_moves (np.ndarray): The [slots, 4] preselected moves of each slot, padded with -1.
+        preselected_counts (np.ndarray): The number of preselected moves of each slot.
+
+    Returns:
+        np.ndarray: The [ants, slots, 4] sampled moves, -1 where no move is sampled.
+    """
+    weights = gather_segments(move_probabilities, move_offsets, move_counts, species)
+    counts = move_counts[species]
+    ants, slots = np.indices(species.shape)
+    for position in range(4):
+        preselected = position < preselected_counts
+        if preselected.any():
+            fixed_moves = np.broadcast_to(preselected_moves[:, position], species.shape)
+            weights[
+                ants[:, preselected], slots[:, preselected], fixed_moves[:, preselected]
+            ] = 0
+    moves = np.full(species.shape + (4,), -1, dtype=np.int64)
+    for position in range(4):
+        cumulative = np.cumsum(weights, axis=-1)
+        thresholds = uniforms[..., position] * cumulative[..., -1]
+        selected = (cumulative < thresholds[..., None]).sum(axis=-1)
+        preselected = position < preselected_counts
+        # As in the original sampler, the position is only filled while more moves than positions are known
+        sampled = ~preselected & (counts - position - 1 > 0)
+        moves[..., position] = np.where(
+            preselected, preselected_moves[:, position], np.where(sampled, selected, -1)
+        )
+        weights[ants[sampled], slots[sampled], selected[sampled]] = 0
+    return moves
+
+
+def numpy_sample_movesets(
+    species: np.ndarray,
+    uniforms: np.ndarray,
+    moveset_probabilities: np.ndarray,
+    moveset_offsets: np.ndarray,
+    moveset_counts: np.ndarray,
+    moveset_data: np.ndarray,
+) -> np.ndarray:
+    """
+    Samples one precomputed moveset for every slot of every ant.
+
+    Args:
+        species (np.ndarray): The [ants, slots] pokemon of the ants.
+        uniforms (np.ndarray): The [ants, slots] uniform numbers in (0, 1].
+        moveset_probabilities (np.ndarray): The flat moveset selection weights, one segment per pokemon.
+        moveset_offsets (np.ndarray): The start of the moveset segment of each pokemon.
+        moveset_counts (np.ndarray): The number of movesets of each pokemon.
+        moveset_data (np.ndarray): The flat [total, 4] movesets.
+
+    Returns:
+        np.ndarray: The [ants, slots, 4] moves of the sampled movesets.
+    """
+    weights = gather_segments(
+        moveset_probabilities, moveset_offsets, moveset_counts, species
+    )
+    cumulative = np.cumsum(weights, axis=-1)
+    thresholds = uniforms * cumulative[..., -1]
+    selected = (cumulative < thresholds[..., None]).sum(axis=-1)
+    return moveset_data[moveset_offsets[species] + selected]
+
+
+def numpy_deposit(pheromones: np.ndarray, indices: np.ndarray, deltas: np.ndarray):
+    np.add.at(pheromones, indices, deltas)
+
+
+def numpy_attack_values(move_power: np.ndarray, ants: np.ndarray) -> np.ndarray:
+    # Sums are chained left to right, NumPy reductions use a different order than the compiled loops
+    move_values = move_power[ants[..., :1], ants[..., 1:5]]
+    slot_values = move_values[..., 0]
+    for position in range(1, 4):
+        slot_values = slot_values + move_values[..., position]
+    values = np.zeros(ants.shape[0])
+    for slot in range(ants.shape[1]):
+        values = values + slot_values[:, slot]
+    return values
+
+
+def numpy_coverage_values(
+    weaknesses: np.ndarray, resistances: np.ndarray, types: np.ndarray, ants: np.ndarray
+) -> np.ndarray:
+    species = ants[..., 0]
+    team_weaknesses = weaknesses[species]
+    team_resistances = resistances[species]
+    omega = team_resistances.sum(axis=-2, keepdims=True)
+    cw = (team_weaknesses * (omega - team_resistances)).sum(axis=(-2, -1))
+    unique_types = types[species].any(axis=-2).sum(axis=-1)
+    return cw * unique_types + 1
+
+
+######### Loops, compiled with numba
+
+
+def loop_roulette(weights, threshold_uniform):
+    total = 0.0
+    for choice in range(weights.shape[0]):
+        total += weights[choice]
+    threshold = threshold_uniform * total
+    cumulative = 0.0
+    for choice in range(weights.shape[0]):
+        cumulative += weights[choice]
+        if cumulative >= threshold:
+            return choice
+    return weights.shape[0]
+
+
+def loop_sample_pokemon(probabilities, preselected, uniforms):
+    species = np.empty(uniforms.shape, dtype=np.int64)
+    weights = np.empty(probabilities.shape[0])
+    unused = np.empty(probabilities.shape[0], dtype=np.bool_)
+    for ant in range(uniforms.shape[0]):
+        weights[:] = probabilities
+        unused[:] = True
+        for pokemon in preselected:
+            weights[pokemon] = 0
+            unused[pokemon] = False
+        for slot in range(uniforms.shape[1]):
+            exhausted = True
+            for choice in range(weights.shape[0]):
+                if weights[choice] > 0:
+                    exhausted = False
+                    break
+            if exhausted:
+                for choice in range(weights.shape[0]):
+                    weights[choice] = 1.0 if unused[choice] else 0.0
+            selected = loop_roulette(weights, uniforms[ant, slot])
+            species[ant, slot] = selected
+            weights[selected] = 0
+            unused[selected] = False
+    return species
+
+
+def loop_sample_moves(
+    species,
+    uniforms,
+    move_probabilities,
+    move_offsets,
+    move_counts,
+    preselected_moves,
+    preselected_counts,
+):
+    moves = np.full((species.shape[0], species.shape[1], 4), -1, dtype=np.int64)
+    for ant in range(species.shape[0]):
+        for slot in range(species.shape[1]):
+            pokemon = species[ant, slot]
+            count = move_counts[pokemon]
+            weights = move_probabilities[
+                move_offsets[pokemon] : move_offsets[pokemon] + count
+            ].copy()
+            for position in range(preselected_counts[slot]):
+                weights[preselected_moves[slot, position]] = 0
+            for position in range(4):
+                if position < preselected_counts[slot]:
+                    moves[ant, slot, position] = preselected_moves[slot, position]
+                elif count - position - 1 > 0:
+                    selected = loop_roulette(weights, uniforms[ant, slot, position])
+                    moves[ant, slot, position] = selected
+                    weights[selected] = 0
+    return moves
+
+
+def loop_sample_movesets(
+    species,
+    uniforms,
+    moveset_probabilities,
+    moveset_offsets,
+    moveset_counts,
+    moveset_data,
+):
+    moves = np.empty((species.shape[0], species.shape[1], 4), dtype=moveset_data.dtype)
+    for ant in range(species.shape[0]):
+        for slot in range(species.shape[1]):
+            pokemon = species[ant, slot]
+            start = moveset_offsets[pokemon]
+            selected = loop_roulette(
+                moveset_probabilities[start : start + moveset_counts[pokemon]],
+                uniforms[ant, slot],
+            )
+            moves[ant, slot] = moveset_data[start + selected]
+    return moves
+
+
+def loop_deposit(pheromones, indices, deltas):
+    for i in range(indices.shape[0]):
+        pheromones[indices[i]] += deltas[i]
+
+
+def loop_attack_values(move_power, ants):
+    values = np.empty(ants.shape[0])
+    for ant in range(ants.shape[0]):
+        value = 0.0
+        for slot in range(ants.shape[1]):
+            slot_value = move_power[ants[ant, slot, 0], ants[ant, slot, 1]]
+            for position in range(2, 5):
+                slot_value += move_power[ants[ant, slot, 0], ants[ant, slot, position]]
+            value += slot_value
+        values[ant] = value
+    return values
+
+
+def loop_coverage_values(weaknesses, resistances, types, ants):
+    values = np.empty(ants.shape[0], dtype=np.int64)
+    for ant in range(ants.shape[0]):
+        cw = 0
+        unique_types = 0
+        for pok_type in range(weaknesses.shape[1]):
+            omega = 0
+            present = False
+            for slot in range(ants.shape[1]):
+                omega += resistances[ants[ant, slot, 0], pok_type]
+                present = present or types[ants[ant, slot, 0], pok_type]
+            for slot in range(ants.shape[1]):
+                pokemon = ants[ant, slot, 0]
+                cw += weaknesses[pokemon, pok_type] * (
+                    omega - resistances[pokemon, pok_type]
+                )
+            unique_types += present
+        values[ant] = cw * unique_types + 1
+    return values
+
+
+NUMPY_KERNELS = {
+    "sample_pokemon": numpy_sample_pokemon,
+    "sample_moves": numpy_sample_moves,
+    "sample_movesets": numpy_sample_movesets,
+    "deposit": numpy_deposit,
+    "attack_values": numpy_attack_values,
+    "coverage_values": numpy_coverage_values,
+}
+
+if numba is not None:
+    loop_roulette = numba.njit(cache=True, nogil=True)(loop_roulette)
+    NUMBA_KERNELS = {
+        "sample_pokemon": numba.njit(cache=True, nogil=True)(loop_sample_pokemon),
+        "sample_moves": numba.njit(cache=True, nogil=True)(loop_sample_moves),
+        "sample_movesets": numba.njit(cache=True, nogil=True)(loop_sample_movesets),
+        "deposit": numba.njit(cache=True, nogil=True)(loop_deposit),
+        "attack_values": numba.njit(cache=True, nogil=True)(loop_attack_values),
+        "coverage_values": numba.njit(cache=True, nogil=True)(loop_coverage_values),
+    }
+else:
+    NUMBA_KERNELS = {}
+
+_kernels = NUMPY_KERNELS
+backend = KernelBackend.NUMPY
+
+
+def set_backend(name: str | KernelBackend = "auto") -> KernelBackend:
+    """
+    Selects the backend of the kernels, "auto" uses numba when it is installed.
+
+    Raises:
+        ValueError: If the backend is unknown or not installed.
+    """
+    global _kernels, backend
+    if name == "auto":
+        backend = available_backends()[-1]
+    else:
+        backend = KernelBackend(name.value if isinstance(name, KernelBackend) else name)
+    if backend not in available_backends():
+        raise ValueError(f"The {backend.value} backend is not installed")
+    _kernels = NUMBA_KERNELS if backend == KernelBackend.NUMBA else NUMPY_KERNELS
+    return backend
+
+
+def warm_up():
+    """
+    Compiles the kernels of the current backend on a tiny problem, so compilation is not timed as search.
+    """
+    ants = np.zeros([1, 1, 5], dtype=np.int16)
+    species = ants[..., 0]
+    sample_pokemon(np.ones(2), np.empty(0, dtype=np.int64), np.ones([1, 1]))
+    sample_moves(
+        species,
+        np.ones([1, 1, 4]),
+        np.ones(1),
+        np.zeros(2, dtype=np.int64),
+        np.ones(1, dtype=np.int64),
+        np.full([1, 4], -1, dtype=np.int64),
+        np.zeros(1, dtype=np.int64),
+    )
+    sample_movesets(
+        species,
+        np.ones([1, 1]),
+        np.ones(1),
+        np.zeros(2, dtype=np.int64),
+        np.ones(1, dtype=np.int64),
+        np.zeros([1, 4], dtype=np.int64),
+    )
+    deposit(np.zeros(1), np.zeros(1, dtype=np.int64), np.ones(1))
+    attack_values(np.zeros([1, 2]), ants)
+    coverage_values(
+        np.zeros([1, 1], dtype=np.int64),
+        np.zeros([1, 1], dtype=np.int64),
+        np.zeros([1, 1], dtype=bool),
+        ants,
+    )
+
+
+# Arguments are passed as contiguous arrays of fixed dtypes, so numba compiles a single specialization per kernel
+
+
+def indexes(array):
+    return np.ascontiguousarray(array, dtype=np.int64)
+
+
+def floats(array):
+    return np.ascontiguousarray(array, dtype=np.float64)
+
+
+def sample_pokemon(probabilities, preselected, uniforms):
+    return _kernels["sample_pokemon"](
+        floats(probabilities), indexes(preselected), floats(uniforms)
+    )
+
+
+def sample_moves(
+    species,
+    uniforms,
+    move_probabilities,
+    move_offsets,
+    move_counts,
+    preselected_moves,
+    preselected_counts,
+):
+    return _kernels["sample_moves"](
+        indexes(species),
+        floats(uniforms),
+        floats(move_probabilities),
+        indexes(move_offsets),
+        indexes(move_counts),
+        indexes(preselected_moves),
+        indexes(preselected_counts),
+    )
+
+
+def sample_movesets(
+    species,
+    uniforms,
+    moveset_probabilities,
+    moveset_offsets,
+    moveset_counts,
+    moveset_data,
+):
+    return _kernels["sample_movesets"](
+        indexes(species),
+        floats(uniforms),
+        floats(moveset_probabilities),
+        indexes(moveset_offsets),
+        indexes(moveset_counts),
+        indexes(moveset_data),
+    )
+
+
+def deposit(pheromones, indices, deltas):
+    """
+    Adds the deltas to the pheromones at the indices in order, pheromones are updated in place.
+    """
+    _kernels["deposit"](pheromones, indexes(indices), floats(deltas))
+
+
+def attack_values(move_power, ants):
+    """
+    Attack objective of a batch of ants, [ants, team_size, 5] -> [ants].
+    """
+    return _kernels["attack_values"](floats(move_power), indexes(ants))
+
+
+def coverage_values(weaknesses, resistances, types, ants):
+    """
+    Team coverage objective of a batch of ants, [ants, team_size, 5] -> [ants].
+    """
+    return _kernels["coverage_values"](
+        indexes(weaknesses),
+        indexes(resistances),
+        np.ascontiguousarray(types, dtype=bool),
+        indexes(ants),
+    )
@@ -36,7 +36,8 @@ class Pokemon:
         teachMove(index): Adds a knowable move to the learnt moves list.
         overall_stats(): Calculates the sum of stats.
         current_power(): Calculates the current power of the Pokemon based on stats, attacks, and type.
-        isRole(role_checker): Checks if the Pokemon fulfills a specific role.
+        move_power(move): Calculates the expected power of a single move for the Pokemon.
+        is_role(role_checker): Checks if the Pokemon fulfills a specific role.
     """
 
     id: int
@@ -238,18 +239,19 @@ class Pokemon:
         """
         current_power = 0
         for learned_move in self.learnt_moves:
-            move_type = learned_move.type
-            move_power = learned_move.power
-            move_damage_class = learned_move.damage_class
-            move_accuracy = learned_move.accuracy
-            stab = 1.5 if (move_type == self.type1 or move_type == self.type2) else 1
-            split = (
-                self.att if (move_damage_class == DamageClass.PHYSICAL) else self.spatt
-            )
-            expected_power = (stab * move_power) * split * move_accuracy
-            current_power += expected_power
+            current_power += self.move_power(learned_move)
         return current_power
 
+    def move_power(self, move: Move) -> float:
+        """
+        Calculates the expected power of a single move when used by this pokemon, based on Stats, Accuracy and Type
+        :param move: The move to evaluate
+        :return: Returns the STAB and split adjusted expected power of the move
+        """
+        stab = 1.5 if (move.type == self.type1 or move.type == self.type2) else 1
+        split = self.att if (move.damage_class == DamageClass.PHYSICAL) else self.spatt
+        return (stab * move.power) * split * move.accuracy
+
     def is_role(self, role_checker: callable) -> bool:
         """
         Checks if the Pokemon fulfills a specific role.
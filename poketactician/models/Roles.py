@@ -46,15 +46,12 @@ def has_ability(pokemon: Pokemon, abilities: list) -> float:
     Returns:
         bool: True if the Pokemon has the ability, False otherwise.
     """
+    # The loaded Pokemon data has no abilities yet, so no Pokemon has one
     return (
         any(
             [
-                ability in abilities
-                for ability in [
-                    pokemon.ability1,
-                    pokemon.ability2,
-                    pokemon.hiddenAbility,
-                ]
+                getattr(pokemon, attribute, None) in abilities
+                for attribute in ["ability1", "ability2", "hiddenAbility"]
             ]
         )
         * 1.0
@@ -414,7 +411,7 @@ def is_suicide_lead(pokemon: Pokemon) -> float:
                 "taunt",
             ],
         )
-        * has_good_stat(pokemon, "spe")
+        * has_good_stat(pokemon, ["spe"])
     )
 
 
@@ -1,7 +1,34 @@
 from dataclasses import dataclass, field
 
+import numpy as np
+
 from .Pokemon import Pokemon
 
+# Ants hold pokemon and move indexes, which fit in 16 bits, -1 marks an empty move
+ant_dtype = np.int16
+
+
+class TeamRecord:
+    """
+    Compact record of an archived solution, the ant, its joint objective value and whether it fulfills the roles.
+
+    Attributes:
+        ant (np.ndarray): The [team_size, 5] ant.
+        value (float): The joint objective value of the ant.
+        feasible (bool): Whether the ant fulfills the roles of the run.
+    """
+
+    __slots__ = ("ant", "value", "feasible")
+
+    def __init__(self, ant: np.ndarray, value: float, feasible: bool = True):
+        self.ant = np.array(ant, dtype=ant_dtype)
+        self.value = value
+        self.feasible = bool(feasible)
+
+    def rank(self) -> tuple[bool, float]:
+        # Feasible solutions beat infeasible ones, whatever their values
+        return self.feasible, self.value
+
 
 @dataclass
 class Team:
@@ -29,7 +56,7 @@ class Team:
         for role in roles:
             role_fulfilled = False
             for pokemon in self.pokemons:
-                if pokemon.isRole(role) > 0:
+                if pokemon.is_role(role) > 0:
                     role_fulfilled = True
                     break
             if not role_fulfilled:
@@ -41,12 +68,12 @@ class Team:
         Calculates the total score of Pokémon in a team that have the specified roles.
 
         Args:
-            roles (list, optional): A list of strings representing the roles to check. Defaults to [].
+            roles (list, optional): A list of role checkers, see models.Roles. Defaults to [].
 
         Returns:
             float: The total number of Pokémon in the team that have the specified roles.
         """
-        return sum([pok.isRole(role) for pok in self.pokemons for role in roles])
+        return sum([pok.is_role(role) for pok in self.pokemons for role in roles])
 
     def serialize(self) -> list:
         return [pokemon.serialize_instance() for pokemon in self.pokemons]
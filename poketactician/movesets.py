@@ -0,0 +1,124 @@
+import json
+from itertools import combinations
+
+import numpy as np
+
+from .models.Pokemon import Pokemon
+
+# Number of movesets kept per species and decomposable objective
+MOVESET_TOP_K = 8
+
+
+def attack_move_scores(pokemon: Pokemon) -> np.ndarray:
+    """
+    Scores every knowable move of a pokemon by its contribution to the attack objective.
+
+    Args:
+        pokemon (Pokemon): The pokemon whose knowable moves are scored.
+
+    Returns:
+        np.ndarray: The expected power of each knowable move, in knowable_moves order.
+    """
+    return np.array(
+        [pokemon.move_power(move) for move in pokemon.knowable_moves], dtype=float
+    )
+
+
+# Objectives whose value is a sum over the team of a per-move score, so the best
+# moveset of a species can be computed independently of the rest of the team
+DECOMPOSABLE_MOVE_SCORES = {
+    "Attack": attack_move_scores,
+}
+
+
+def top_k_movesets(scores: np.ndarray, k: int = MOVESET_TOP_K) -> np.ndarray:
+    """
+    Finds the k best 4-move subsets for an additive per-move score.
+
+    Any of the k best subsets only uses moves among the k + 3 best moves, so only those
+    combinations are enumerated instead of C(n, 4).
+
+    Args:
+        scores (np.ndarray): The score of each knowable move.
+        k (int, optional): The number of movesets to keep. Defaults to MOVESET_TOP_K.
+
+    Returns:
+        np.ndarray: A [k', 4] array of move indices sorted from best to worst, padded with -1
+            for pokemon that know less than 4 moves.
+    """
+    moveset_size = min(4, len(scores))
+    if moveset_size == 0:
+        return np.full((1, 4), -1)
+    best_moves = np.argsort(-scores, kind="stable")[: k + moveset_size - 1]
+    subsets = np.array(list(combinations(best_moves, moveset_size)))
+    order = np.argsort(-scores[subsets].sum(axis=1), kind="stable")[:k]
+    movesets = np.full((len(order), 4), -1)
+    movesets[:, :moveset_size] = subsets[order]
+    return movesets
+
+
+def build_moveset_table(pokemon_list: list[Pokemon], k: int = MOVESET_TOP_K) -> dict:
+    """
+    Precomputes the top-k movesets of every pokemon for each decomposable objective.
+
+    Args:
+        pokemon_list (list[Pokemon]): The pokemon to precompute.
+        k (int, optional): The number of movesets to keep per pokemon. Defaults to MOVESET_TOP_K.
+
+    Returns:
+        dict: A mapping objective -> pokemon id -> list of movesets.
+    """
+    return {
+        objective: {
+            str(pokemon.id): top_k_movesets(move_scores(pokemon), k).tolist()
+            for pokemon in pokemon_list
+        }
+        for objective, move_scores in DECOMPOSABLE_MOVE_SCORES.items()
+    }
+
+
+def save_moveset_table(table: dict, file_name: str):
+    with open(file_name, "w") as json_file:
+        json.dump(table, json_file)
+
+
+def load_moveset_table(file_name: str) -> dict:
+    try:
+        with open(file_name, "r") as json_file:
+            return json.load(json_file)
+    except FileNotFoundError:
+        return {}
+
+
+def get_movesets(
+    pokemon_list: list[Pokemon], objective: str, table: dict = {}
+) -> list[np.ndarray] | None:
+    """
+    Returns the top-k movesets of each pokemon in the list for a decomposable objective.
+
+    Precomputed movesets are taken from the table, pokemon missing from it (or with a stale
+    entry) are computed on the fly.
+
+    Args:
+        pokemon_list (list[Pokemon]): The pokemon in the decision space.
+        objective (str): The value of the objective the movesets optimize.
+        table (dict, optional): A table built by build_moveset_table. Defaults to {}.
+
+    Returns:
+        list[np.ndarray] | None: The [k, 4] movesets of each pokemon, or None if the objective
+            is not decomposable.
+    """
+    if objective not in DECOMPOSABLE_MOVE_SCORES:
+        return None
+    objective_table = table.get(objective, {})
+    movesets = []
+    for pokemon in pokemon_list:
+        pokemon_movesets = np.array(objective_table.get(str(pokemon.id), []), dtype=int)
+        if pokemon_movesets.size == 0 or pokemon_movesets.max() >= len(
+            pokemon.knowable_moves
+        ):
+            pokemon_movesets = top_k_movesets(
+                DECOMPOSABLE_MOVE_SCORES[objective](pokemon)
+            )
+        movesets.append(pokemon_movesets)
+    return movesets
@@ -3,11 +3,15 @@ from functools import lru_cache
 
 import numpy as np
 
-from .glob_var import Q, rho
+from .glob_var import Q, moveset_table, rho
+from .heuristics import get_heuristics
+from .kernels import attack_values, coverage_values
 from .models.Pokemon import Pokemon
 from .models.Roles import *
 from .models.Team import Team
 from .models.Types import type_chart, type_order
+from .movesets import attack_move_scores, get_movesets
+from .PoolStructures import get_pool_structures
 from .utils import (
     dominated_candidate_set,
     get_learned_moves,
@@ -29,6 +33,161 @@ def attack_obj_fun(ant: np.ndarray, pokemon_list: list[Pokemon]) -> float:
     )
 
 
+def move_power_table(pokemon_list: list[Pokemon]) -> np.ndarray:
+    """
+    Tabulates the expected power of every knowable move of every pokemon.
+
+    The table has one extra zero column at the end, so indexing it with the move index -1 (no move) scores nothing.
+
+    Args:
+        pokemon_list (list[Pokemon]): The pokemon in the decision space.
+
+    Returns:
+        np.ndarray: A [len(pokemon_list), max_moves + 1] array of move powers.
+    """
+    max_moves = max(len(pokemon.knowable_moves) for pokemon in pokemon_list)
+    table = np.zeros((len(pokemon_list), max_moves + 1))
+    for i, pokemon in enumerate(pokemon_list):
+        table[i, : len(pokemon.knowable_moves)] = attack_move_scores(pokemon)
+    return table
+
+
+class AttackBatch:
+    """
+    Vectorized version of attack_obj_fun, evaluates arrays of ants of shape [..., team_size, 5] at once.
+    """
+
+    def __init__(self, pokemon_list: list[Pokemon]):
+        self.move_power = move_power_table(pokemon_list)
+        self.move_counts = np.array(
+            [len(pokemon.knowable_moves) for pokemon in pokemon_list]
+        )
+
+    def slot_values(self, ants: np.ndarray) -> np.ndarray:
+        ants = np.asarray(ants)
+        return self.move_power[ants[..., :1], ants[..., 1:5]].sum(axis=-1)
+
+    def __call__(self, ants: np.ndarray) -> np.ndarray:
+        ants = np.asarray(ants)
+        return attack_values(
+            self.move_power, ants.reshape((-1,) + ants.shape[-2:])
+        ).reshape(ants.shape[:-2])
+
+    def swap_values(self, ant: np.ndarray, slot: int, rows: np.ndarray) -> np.ndarray:
+        """
+        Scores the ant with one slot replaced by each of the rows, only the changed slot is recomputed.
+
+        Args:
+            ant (np.ndarray): The [team_size, 5] ant.
+            slot (int): The slot to replace.
+            rows (np.ndarray): The [B, 5] replacements of the slot.
+
+        Returns:
+            np.ndarray: The [B] objective values of the modified ants.
+        """
+        slot_values = self.slot_values(ant)
+        return slot_values.sum() - slot_values[slot] + self.slot_values(rows)
+
+    def best_moves(self, species: np.ndarray, fixed_moves: list[int] = []):
+        """
+        Returns the moves maximizing the attack of each pokemon, keeping the fixed moves.
+
+        Args:
+            species (np.ndarray): The indexes of the pokemon.
+            fixed_moves (list[int], optional): Moves that must be part of the moveset. Defaults to [].
+
+        Returns:
+            np.ndarray: A [len(species), 4] array of move indexes padded with -1.
+        """
+        scores = self.move_power[species, :-1].copy()
+        scores[np.arange(scores.shape[1]) >= self.move_counts[species][:, None]] = (
+            -np.inf
+        )
+        scores[:, fixed_moves] = -np.inf
+        free_moves = min(4 - len(fixed_moves), scores.shape[1])
+        order = np.argsort(-scores, axis=1, kind="stable")[:, :free_moves]
+        valid = np.take_along_axis(scores, order, axis=1) > -np.inf
+        moves = np.full((len(species), 4), -1)
+        moves[:, : len(fixed_moves)] = fixed_moves
+        moves[:, len(fixed_moves) : len(fixed_moves) + free_moves] = np.where(
+            valid, order, -1
+        )
+        return moves
+
+
+def type_profile_table(pokemon_list: list[Pokemon]):
+    """
+    Tabulates the binary weaknesses, resistances and types of every pokemon.
+
+    Args:
+        pokemon_list (list[Pokemon]): The pokemon in the decision space.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: The [n, 18] weakness, resistance and type membership arrays.
+    """
+    weaknesses = np.zeros((len(pokemon_list), len(type_order)), dtype=int)
+    resistances = np.zeros((len(pokemon_list), len(type_order)), dtype=int)
+    types = np.zeros((len(pokemon_list), len(type_order)), dtype=bool)
+    for i, pokemon in enumerate(pokemon_list):
+        pokemon_types = tuple(
+            pok_type
+            for pok_type in [pokemon.type1, pokemon.type2]
+            if pok_type is not None
+        )
+        weaknesses[i] = bin_weakness(defense(pokemon_types))
+        resistances[i] = bin_resistance(defense(pokemon_types))
+        types[i, [type_order.index(pok_type) for pok_type in pokemon_types]] = True
+    return weaknesses, resistances, types
+
+
+class TeamCoverageBatch:
+    """
+    Vectorized version of team_coverage_fun, evaluates arrays of ants of shape [..., team_size, 5] at once.
+    """
+
+    def __init__(self, pokemon_list: list[Pokemon]):
+        self.weaknesses, self.resistances, self.types = type_profile_table(pokemon_list)
+
+    def __call__(self, ants: np.ndarray) -> np.ndarray:
+        ants = np.asarray(ants)
+        return coverage_values(
+            self.weaknesses,
+            self.resistances,
+            self.types,
+            ants.reshape((-1,) + ants.shape[-2:]),
+        ).reshape(ants.shape[:-2])
+
+    def swap_values(self, ant: np.ndarray, slot: int, rows: np.ndarray) -> np.ndarray:
+        """
+        Scores the ant with one slot replaced by each of the rows, aggregating the unchanged slots only once.
+
+        Args:
+            ant (np.ndarray): The [team_size, 5] ant.
+            slot (int): The slot to replace.
+            rows (np.ndarray): The [B, 5] replacements of the slot.
+
+        Returns:
+            np.ndarray: The [B] objective values of the modified ants.
+        """
+        others = np.delete(np.asarray(ant)[:, 0], slot)
+        other_weaknesses = self.weaknesses[others]
+        other_resistances = self.resistances[others]
+        omega = other_resistances.sum(axis=0)
+        species = np.asarray(rows)[:, 0]
+        # CW = W . (O + r) - X + w . O, with W, O and X aggregated over the unchanged slots
+        cw = (
+            (other_weaknesses.sum(axis=0) * (omega + self.resistances[species])).sum(
+                axis=-1
+            )
+            - (other_weaknesses * other_resistances).sum()
+            + (self.weaknesses[species] * omega).sum(axis=-1)
+        )
+        unique_types = (self.types[others].any(axis=0) | self.types[species]).sum(
+            axis=-1
+        )
+        return cw * unique_types + 1
+
+
 # def compute_weaknesses_and_coverage(team_types, typeChart):
 #     num_types = typeChart.shape[0]
 #     team_weaknesses = np.ones(num_types)  # Assume all types are covered initially
@@ -242,6 +401,50 @@ class ObjectiveFunctions(Enum):
             # ObjectiveFunctions.SELF_COVERAGE: (lambda team:self_coverage_fun,, Q, rho),
         }[self]
 
+    def get_movesets(self, pok_list: list[Pokemon]):
+        """
+        Returns the precomputed top-k movesets of each pokemon for the objective function.
+
+        Returns:
+            list[np.ndarray] | None: The movesets of each pokemon, or None if the objective is not decomposable per
+                pokemon.
+        """
+        return get_movesets(pok_list, self.value, moveset_table)
+
+    def get_heuristics(self, pok_list: list[Pokemon]):
+        """
+        Returns the cached heuristic vectors of the pokemon and their moves for the objective function.
+
+        Returns:
+            tuple[np.ndarray, list[np.ndarray]]: The heuristic of each pokemon and of each of its knowable moves.
+        """
+        return get_heuristics(pok_list, self.value)
+
+    def get_pool_structures(
+        self, pok_list: list[Pokemon], beta: float, use_movesets: bool = True
+    ):
+        """
+        Returns the cached colony structures of the objective function over the pokemon pool.
+
+        Returns:
+            PoolStructures: The decision spaces, heuristics and initial probabilities shared by the colonies.
+        """
+        return get_pool_structures(
+            pok_list, self.value, beta, use_movesets, moveset_table
+        )
+
+    def get_batch_function(self, pok_list: list[Pokemon]):
+        """
+        Returns the vectorized version of the objective function, which evaluates arrays of ants.
+
+        Returns:
+            AttackBatch | TeamCoverageBatch: The vectorized objective function.
+        """
+        return {
+            ObjectiveFunctions.ATTACK: AttackBatch,
+            ObjectiveFunctions.TEAM_COVERAGE: TeamCoverageBatch,
+        }[self](pok_list)
+
 
 class StrategyFunctions(Enum):
     """
@@ -276,3 +479,41 @@ class StrategyFunctions(Enum):
                 0.15,
             ),
         }[self]
+
+    def get_movesets(self, pok_list: list[Pokemon]):
+        """
+        Strategy functions depend on the whole team, so they have no per-pokemon movesets.
+
+        Returns:
+            None
+        """
+        return None
+
+    def get_heuristics(self, pok_list: list[Pokemon]):
+        """
+        Returns the cached heuristic vectors of the pokemon and their moves for the strategy function.
+
+        Returns:
+            tuple[np.ndarray, list[np.ndarray]]: The heuristic of each pokemon and of each of its knowable moves.
+        """
+        return get_heuristics(pok_list, self.value)
+
+    def get_pool_structures(
+        self, pok_list: list[Pokemon], beta: float, use_movesets: bool = True
+    ):
+        """
+        Returns the cached colony structures of the strategy function over the pokemon pool, without movesets.
+
+        Returns:
+            PoolStructures: The decision spaces, heuristics and initial probabilities shared by the colonies.
+        """
+        return get_pool_structures(pok_list, self.value, beta, False)
+
+    def get_batch_function(self, pok_list: list[Pokemon]):
+        """
+        Strategy functions are not vectorized yet.
+
+        Returns:
+            None
+        """
+        return None
@@ -0,0 +1,244 @@
+"""
+Portfolio of search engines, the engine and its settings are chosen per request from cheap features of its shape.
+
+The rules are fitted on recorded benchmark runs. For every recorded request shape, the configuration, population
+and iterations with the best quality per millisecond, among the ones within a quality floor of the best value,
+become a rule, and a request follows the rule of the nearest recorded shape. Requests small enough to be enumerated
+exactly skip the rules. Fit them from the repository root, on the serving hardware, over one or more benchmark
+records, see the README for Docker images:
+
+    python -m poketactician.benchmark --configurations ant-system max-min nsga2 --population 200 \
+        --output data/benchmark_200.json
+    python -m poketactician.portfolio data/benchmark_results.json data/benchmark_200.json
+"""
+
+import argparse
+import json
+import logging
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .engines import CONFIGURATIONS, SolverEngine
+from .features import RequestFeatures
+from .glob_var import iterations, solver_engine, total_population
+
+logger = logging.getLogger(__name__)
+
+PORTFOLIO_RULES_FILE = "data/portfolio_rules.json"
+
+# Features of the request shape a rule is fitted and matched on
+SHAPE_FEATURES = ("pool_size", "free_slots", "objectives", "vectorized")
+
+
+@dataclass(frozen=True)
+class PortfolioChoice:
+    """
+    Search engine and settings chosen for a request.
+
+    Attributes:
+        engine (SolverEngine): The search engine.
+        total_population (int): The total population size.
+        iterations (int): The number of iterations.
+        configuration (str | None): The benchmark configuration of the engine options, None for the defaults.
+        options (dict): The keyword arguments of the engine.
+        reason (str): Why the engine was chosen, for the logs.
+    """
+
+    engine: SolverEngine
+    total_population: int
+    iterations: int
+    configuration: str | None = None
+    options: dict = field(default_factory=dict)
+    reason: str = "default settings"
+
+
+def shape_distance(features: RequestFeatures, rule: dict) -> float:
+    # Pool sizes are compared in orders of magnitude, and a vectorization mismatch outweighs the other differences
+    return (
+        abs(np.log2(max(features.pool_size, 1) / max(rule["pool_size"], 1)))
+        + abs(features.free_slots - rule["free_slots"]) / 2
+        + abs(features.objectives - rule["objectives"])
+        + 4 * (features.vectorized != rule["vectorized"])
+    )
+
+
+def fit_rules(records: list[dict], min_quality: float = 0.95) -> list[dict]:
+    """
+    Fits one rule per request shape of the benchmark records.
+
+    Runs solved by exact enumeration are ignored, as every engine enumerates the same way.
+
+    Args:
+        records (List[dict]): The benchmark records, see benchmark.run_scenario.
+        min_quality (float, optional): The mean value relative to the best setting of the shape below which a
+            setting is never chosen. Defaults to 0.95.
+
+    Returns:
+        List[dict]: The rules, with the shape features, the chosen setting and its relative value and time.
+    """
+    records = [
+        record
+        for record in records
+        if "pool_size" in record and not record.get("exhaustive", False)
+    ]
+    rules = []
+    for shape in dict.fromkeys(
+        tuple(record[key] for key in SHAPE_FEATURES) for record in records
+    ):
+        shape_records = [
+            record
+            for record in records
+            if tuple(record[key] for key in SHAPE_FEATURES) == shape
+        ]
+        means = {}
+        for setting in dict.fromkeys(
+            (record["configuration"], record["total_population"], record["iterations"])
+            for record in shape_records
+        ):
+            setting_records = [
+                record
+                for record in shape_records
+                if (
+                    record["configuration"],
+                    record["total_population"],
+                    record["iterations"],
+                )
+                == setting
+            ]
+            means[setting] = (
+                np.mean([record["value"] for record in setting_records]),
+                np.mean([record["time"] for record in setting_records]),
+            )
+        best_value = max(value for value, _ in means.values())
+
+        def quality_per_ms(setting):
+            value, elapsed_time = means[setting]
+            quality = value / best_value if best_value > 0 else 1
+            if quality < min_quality:
+                return 0
+            return quality / max(elapsed_time * 1000, 1e-3)
+
+        best_setting = max(means, key=quality_per_ms)
+        configuration, population, iters = best_setting
+        value, elapsed_time = means[best_setting]
+        rules.append(
+            {
+                **dict(zip(SHAPE_FEATURES, shape)),
+                "configuration": configuration,
+                "total_population": population,
+                "iterations": iters,
+                "relative_value": value / best_value if best_value > 0 else 1,
+                "time": elapsed_time,
+                "runs": len(shape_records),
+            }
+        )
+    return rules
+
+
+class Portfolio:
+    """
+    Chooses the search engine and its settings for every request, and logs the choice.
+
+    Args:
+        rules (List[dict], optional): The rules fitted by fit_rules, rules of unknown configurations are ignored.
+            Defaults to None, which always chooses the default engine and settings of glob_var.
+    """
+
+    def __init__(self, rules: list[dict] = None):
+        self.rules = [
+            rule for rule in (rules or []) if rule["configuration"] in CONFIGURATIONS
+        ]
+
+    @classmethod
+    def load(cls, file_name: str = PORTFOLIO_RULES_FILE) -> "Portfolio":
+        try:
+            with open(file_name, "r") as json_file:
+                return cls(json.load(json_file)["rules"])
+        except FileNotFoundError:
+            logger.warning(
+                "No portfolio rules at %s, every request runs with the default settings",
+                file_name,
+            )
+            return cls()
+
+    def choose(self, features: RequestFeatures) -> PortfolioChoice:
+        """
+        Chooses the engine and settings of a request.
+
+        Args:
+            features (RequestFeatures): The features of the request.
+
+        Returns:
+            PortfolioChoice: The engine, its options, population and iterations.
+        """
+        if features.enumerable:
+            # Every engine enumerates small requests exactly, so the settings do not matter
+            choice = PortfolioChoice(
+                SolverEngine[solver_engine],
+                total_population,
+                iterations,
+                reason=f"exact enumeration of {features.completions} completions",
+            )
+        elif self.rules:
+            rule = min(self.rules, key=lambda rule: shape_distance(features, rule))
+            options = dict(CONFIGURATIONS[rule["configuration"]])
+            choice = PortfolioChoice(
+                options.pop("engine", SolverEngine.MOACO),
+                rule["total_population"],
+                rule["iterations"],
+                rule["configuration"],
+                options,
+                reason=(
+                    f"nearest benchmark shape: pool {rule['pool_size']}, {rule['free_slots']} free slots, "
+                    f"{rule['objectives']} objectives"
+                ),
+            )
+        else:
+            choice = PortfolioChoice(
+                SolverEngine[solver_engine], total_population, iterations
+            )
+        logger.info(
+            "%s -> %s, configuration %s, population %d, iterations %d (%s)",
+            features,
+            choice.engine.name,
+            choice.configuration,
+            choice.total_population,
+            choice.iterations,
+            choice.reason,
+        )
+        return choice
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("benchmarks", nargs="+")
+    parser.add_argument("--min-quality", type=float, default=0.95)
+    parser.add_argument("--output", default=PORTFOLIO_RULES_FILE)
+    args = parser.parse_args()
+
+    records = []
+    for file_name in args.benchmarks:
+        with open(file_name, "r") as json_file:
+            records += json.load(json_file)
+    rules = fit_rules(records, args.min_quality)
+    print(
+        f"{'pool':>6}{'free':>6}{'obj.':>6}  {'configuration':<24}"
+        f"{'population':>12}{'iters':>8}{'rel. value':>12}{'time (s)':>10}"
+    )
+    for rule in rules:
+        print(
+            f"{rule['pool_size']:>6}{rule['free_slots']:>6}{rule['objectives']:>6}  "
+            f"{rule['configuration']:<24}{rule['total_population']:>12}{rule['iterations']:>8}"
+            f"{rule['relative_value']:>12.3f}{rule['time']:>10.3f}"
+        )
+    with open(args.output, "w") as json_file:
+        json.dump(
+            {
+                "rules": rules,
+                "min_quality": args.min_quality,
+                "benchmarks": args.benchmarks,
+            },
+            json_file,
+            indent=4,
+        )
@@ -0,0 +1,284 @@
+"""
+Offline racing of the hyperparameters of the optimizer over the benchmark scenarios, in the spirit of irace.
+
+Sampled configurations are evaluated instance by instance, an instance being a scenario and a seed, on a process
+pool. After a few instances the configurations whose mean rank is significantly worse than the best one are
+discarded, so the budget is spent on the promising ones. The winner is written to the tuned profile loaded by
+glob_var at startup. Run from the repository root, so the data files are found:
+
+    python -m poketactician.tuning --configurations 24 --seeds 4 --workers 4
+"""
+
+import argparse
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .benchmark import SCENARIOS, build_problem
+from .glob_var import (
+    Q,
+    alpha,
+    beta,
+    iterations,
+    local_search_evaluations,
+    local_search_time,
+    rho,
+    total_population,
+)
+from .MOACO import MOACO
+
+# Values raced for each hyperparameter
+PARAMETER_SPACE = {
+    "alpha": [0.5, 1, 2],
+    "beta": [0, 0.5, 1, 2, 3],
+    "rho": [0.05, 0.1, 0.2, 0.3],
+    "Q": [0.5, 1, 2],
+    "total_population": [100, 200, 400, 800],
+    "iterations": [10, 25, 50],
+}
+
+# Critical values of the studentized range over sqrt(2) at the 0.05 level, per number of configurations
+NEMENYI_CRITICAL_VALUES = {
+    2: 1.960,
+    3: 2.343,
+    4: 2.569,
+    5: 2.728,
+    6: 2.850,
+    7: 2.949,
+    8: 3.031,
+    9: 3.102,
+    10: 3.164,
+}
+
+
+def default_configuration() -> dict:
+    return {
+        "alpha": alpha,
+        "beta": beta,
+        "rho": rho,
+        "Q": Q,
+        "total_population": total_population,
+        "iterations": iterations,
+    }
+
+
+def sample_configurations(
+    size: int, rng: np.random.Generator, space: dict = PARAMETER_SPACE
+) -> list[dict]:
+    """
+    Samples distinct configurations from the parameter space, the current defaults are always raced.
+
+    Returns:
+        List[dict]: The configurations, the defaults first.
+    """
+    configurations = [default_configuration()]
+    max_size = int(np.prod([len(values) for values in space.values()])) + 1
+    while len(configurations) < min(size, max_size):
+        configuration = {
+            parameter: values[rng.integers(len(values))]
+            for parameter, values in space.items()
+        }
+        if configuration not in configurations:
+            configurations.append(configuration)
+    return configurations
+
+
+def run_configuration(configuration: dict, scenario_name: str, seed: int) -> dict:
+    """
+    Runs a configuration on an instance the way the app runs a request.
+
+    Returns:
+        dict: The wall time in seconds and the joint objective value of the run.
+    """
+    _, problem = build_problem(SCENARIOS[scenario_name], configuration["beta"])
+    problem["objective_functions_Q_rho"] = [
+        (objective_function, configuration["Q"], configuration["rho"])
+        for objective_function, _, _ in problem["objective_functions_Q_rho"]
+    ]
+    start_time = time.time()
+    m_col = MOACO(
+        configuration["total_population"],
+        alpha=configuration["alpha"],
+        beta=configuration["beta"],
+        **problem,
+        local_search_evaluations=local_search_evaluations,
+        local_search_time=local_search_time,
+        seed=seed,
+    )
+    m_col.optimize(iters=configuration["iterations"])
+    return {
+        "time": time.time() - start_time,
+        "value": float(m_col.get_objective_value()),
+    }
+
+
+def instance_scores(results: list[dict], min_quality: float) -> np.ndarray:
+    """
+    Scores the runs of the configurations on one instance by quality per millisecond.
+
+    The quality of a run is its value relative to the best value found on the instance, runs below min_quality
+    score 0 so fast but poor configurations cannot win.
+
+    Returns:
+        np.ndarray: The score of each configuration.
+    """
+    values = np.array([result["value"] for result in results])
+    times = np.array([result["time"] for result in results])
+    best_value = values.max()
+    quality = values / best_value if best_value > 0 else np.ones(len(values))
+    return np.where(quality >= min_quality, quality / np.maximum(times * 1000, 1e-3), 0)
+
+
+def average_ranks(scores: np.ndarray) -> np.ndarray:
+    """
+    Ranks of the scores of every instance, 1 is the best score and tied scores share the mean of their ranks.
+
+    Args:
+        scores (np.ndarray): The [instances, configurations] scores.
+
+    Returns:
+        np.ndarray: The [instances, configurations] ranks.
+    """
+    ranks = np.empty(scores.shape)
+    for row, row_scores in enumerate(scores):
+        values, inverse, counts = np.unique(
+            -row_scores, return_inverse=True, return_counts=True
+        )
+        # Tied scores take the mean of the ranks they span
+        last_ranks = np.cumsum(counts)
+        ranks[row] = (last_ranks - (counts - 1) / 2)[inverse]
+    return ranks
+
+
+def critical_difference(configurations: int, instances: int) -> float:
+    """
+    Nemenyi critical difference of the mean ranks of the configurations over the instances.
+    """
+    critical_value = NEMENYI_CRITICAL_VALUES.get(
+        configurations, 3.164 + 0.04 * max(configurations - 10, 0)
+    )
+    return critical_value * np.sqrt(
+        configurations * (configurations + 1) / (6 * instances)
+    )
+
+
+def race(
+    configurations: list[dict],
+    instances: list[tuple[str, int]],
+    workers: int = None,
+    first_test: int = 3,
+    min_quality: float = 0.95,
+    max_experiments: int = None,
+) -> tuple[dict, list[dict]]:
+    """
+    Races the configurations over the instances, discarding the ones significantly worse than the best.
+
+    Args:
+        configurations (List[dict]): The configurations raced.
+        instances (List[Tuple[str, int]]): The scenario name and seed of each instance, in racing order.
+        workers (int, optional): The number of processes. Defaults to the number of CPUs.
+        first_test (int, optional): The number of instances run before discarding configurations. Defaults to 3.
+        min_quality (float, optional): The relative value below which a run scores 0. Defaults to 0.95.
+        max_experiments (int, optional): The maximum number of runs. Defaults to no limit.
+
+    Returns:
+        Tuple[dict, List[dict]]: The best configuration and the log of every instance.
+    """
+    alive = list(range(len(configurations)))
+    scores = []
+    log = []
+    experiments = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for scenario_name, seed in instances:
+            if (
+                max_experiments is not None
+                and experiments + len(alive) > max_experiments
+            ):
+                break
+            results = list(
+                executor.map(
+                    run_configuration,
+                    [configurations[index] for index in alive],
+                    [scenario_name] * len(alive),
+                    [seed] * len(alive),
+                )
+            )
+            experiments += len(alive)
+            score_row = np.full(len(configurations), np.nan)
+            score_row[alive] = instance_scores(results, min_quality)
+            scores.append(score_row)
+            log.append(
+                {
+                    "scenario": scenario_name,
+                    "seed": seed,
+                    "runs": [
+                        {"configuration": index, **result}
+                        for index, result in zip(alive, results)
+                    ],
+                }
+            )
+
+            # Rank the alive configurations on every instance, 1 is the best score
+            alive_scores = np.array(scores)[:, alive]
+            ranks = average_ranks(alive_scores)
+            mean_ranks = ranks.mean(axis=0)
+            if len(scores) >= first_test and len(alive) > 1:
+                threshold = mean_ranks.min() + critical_difference(
+                    len(alive), len(scores)
+                )
+                alive = [
+                    index
+                    for index, mean_rank in zip(alive, mean_ranks)
+                    if mean_rank <= threshold
+                ]
+            if len(alive) == 1:
+                break
+
+    alive_scores = np.array(scores)[:, alive]
+    best = alive[int(np.argmax(np.nanmean(alive_scores, axis=0)))]
+    return configurations[best], log
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS))
+    parser.add_argument("--configurations", type=int, default=24)
+    parser.add_argument("--seeds", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--first-test", type=int, default=3)
+    parser.add_argument("--min-quality", type=float, default=0.95)
+    parser.add_argument("--max-experiments", type=int, default=None)
+    parser.add_argument("--random-seed", type=int, default=0)
+    parser.add_argument("--output", default="data/tuned_profile.json")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.random_seed)
+    configurations = sample_configurations(args.configurations, rng)
+    # Instances interleave the scenarios, so every elimination is based on the whole request mix
+    instances = [
+        (scenario_name, seed)
+        for seed in range(args.seeds)
+        for scenario_name in args.scenarios
+    ]
+    best_configuration, log = race(
+        configurations,
+        instances,
+        args.workers,
+        args.first_test,
+        args.min_quality,
+        args.max_experiments,
+    )
+    print(json.dumps(best_configuration, indent=4))
+    with open(args.output, "w") as json_file:
+        json.dump(
+            {
+                "parameters": best_configuration,
+                "scenarios": args.scenarios,
+                "configurations": configurations,
+                "race": log,
+            },
+            json_file,
+            indent=4,
+        )
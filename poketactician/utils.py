@@ -99,7 +99,13 @@ def get_team_names(team, pokList):
 
 
 # Add feature to choose cooperation algorithms
-def dominated_candidate_set(candidate_sets, objective_functions):
+def dominated_candidate_set(
+    candidate_sets,
+    objective_functions,
+    batch_objective_functions=None,
+    return_values=False,
+    feasibility_function=None,
+):
     """
     Performs multi-objective optimization using a cooperative colony approach.
     The function operates as follows:
@@ -112,18 +118,34 @@ def dominated_candidate_set(candidate_sets, objective_functions):
     Args:
     - candSets (list): A list of candidate sets, each containing potential solutions to the optimization problem.
     - objFuns (list): A list of objective functions representing different objectives to optimize.
+    - batch_objective_functions (list, optional): The vectorized version of each objective function, or None,
+      used instead of evaluating the candidates one by one when available.
+    - return_values (bool, optional): Whether to also return the joint objective value of the selected candidates,
+      so callers reuse the evaluations instead of repeating them.
+    - feasibility_function (callable, optional): Whether each candidate of a batch fulfills the constraints of the
+      problem, the feasible candidates are selected before the infeasible ones.
 
     Returns:
     - list: A subset of candidate solutions from the input sets that dominate across multiple objectives.
+    - np.ndarray: The joint objective values of the subset, only when return_values is set.
     """
 
     total_candidate_sets = []
     normalized_objectives = []
+    joint_values = np.ones(sum(len(i) for i in candidate_sets))
     for i in candidate_sets:
         total_candidate_sets += i
 
-    for j in objective_functions:
-        candidate_set_objectives_temp = np.array(list(map(j, total_candidate_sets)))
+    if batch_objective_functions is None:
+        batch_objective_functions = [None] * len(objective_functions)
+    for j, batch_j in zip(objective_functions, batch_objective_functions):
+        if batch_j is not None and total_candidate_sets:
+            candidate_set_objectives_temp = np.asarray(
+                batch_j(np.array(total_candidate_sets)), dtype=float
+            )
+        else:
+            candidate_set_objectives_temp = np.array(list(map(j, total_candidate_sets)))
+        joint_values = joint_values * candidate_set_objectives_temp
         normalized_objectives += [
             candidate_set_objectives_temp / (candidate_set_objectives_temp.max())
         ]
@@ -133,13 +155,18 @@ def dominated_candidate_set(candidate_sets, objective_functions):
     for x in normalized_objectives:
         dominance_vector = np.multiply(dominance_vector, x)
 
-    dominated_candidate_set = [
-        x
-        for _, x in sorted(
-            zip(dominance_vector, total_candidate_sets),
-            key=lambda pair: pair[0],
-            reverse=True,
-        )
-    ][0 : int(dominance_vector.__len__() / candidate_sets.__len__())]
-
+    feasible = (
+        feasibility_function(np.array(total_candidate_sets))
+        if feasibility_function is not None and total_candidate_sets
+        else np.ones(total_candidate_sets.__len__(), dtype=bool)
+    )
+    dominated_indexes = sorted(
+        range(dominance_vector.__len__()),
+        key=lambda index: (feasible[index], dominance_vector[index]),
+        reverse=True,
+    )[0 : int(dominance_vector.__len__() / candidate_sets.__len__())]
+    dominated_candidate_set = [total_candidate_sets[i] for i in dominated_indexes]
+
+    if return_values:
+        return dominated_candidate_set, joint_values[dominated_indexes]
     return dominated_candidate_set
@@ -0,0 +1,11 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The app runs from the repository root with dash_app on the path, poketactician.glob_var loads data/ from there
+sys.path[:0] = [ROOT, os.path.join(ROOT, "dash_app")]
+os.chdir(ROOT)
+
+# Modules that load the Pokémon list only run when it has been built, see data/DB_Query.py
+HAS_POKEMON_DATA = os.path.exists(os.path.join(ROOT, "data", "pokemon_data.json"))
@@ -0,0 +1,82 @@
+import admission
+import pytest
+from admission import AdmissionController, AdmissionDecision
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(admission, "time", clock)
+    return clock
+
+
+def decisions(controller, client, queue_depth, count):
+    return [controller.admit(client, queue_depth).decision for _ in range(count)]
+
+
+def test_queue_depth_thresholds(clock):
+    controller = AdmissionController(
+        degrade_depth=2, reject_depth=4, rate=60, burst=100
+    )
+    assert controller.admit("a", 0).decision == AdmissionDecision.ADMIT
+    assert controller.admit("a", 1).decision == AdmissionDecision.ADMIT
+    assert controller.admit("a", 2).decision == AdmissionDecision.DEGRADE
+    assert controller.admit("a", 3).decision == AdmissionDecision.DEGRADE
+    rejected = controller.admit("a", 4)
+    assert rejected.decision == AdmissionDecision.REJECT
+    assert rejected.reason
+
+
+def test_rejected_by_depth_spends_no_token(clock):
+    controller = AdmissionController(degrade_depth=2, reject_depth=4, rate=60, burst=1)
+    assert decisions(controller, "a", 4, 3) == [AdmissionDecision.REJECT] * 3
+    assert controller.admit("a", 0).decision == AdmissionDecision.ADMIT
+
+
+def test_token_bucket_refills_at_the_rate(clock):
+    controller = AdmissionController(
+        degrade_depth=10, reject_depth=20, rate=60, burst=2
+    )
+    assert decisions(controller, "a", 0, 3) == [
+        AdmissionDecision.ADMIT,
+        AdmissionDecision.ADMIT,
+        AdmissionDecision.REJECT,
+    ]
+    # 60 requests per minute refill a token every second
+    clock.now += 0.5
+    assert controller.admit("a", 0).decision == AdmissionDecision.REJECT
+    clock.now += 0.5
+    assert controller.admit("a", 0).decision == AdmissionDecision.ADMIT
+    # The bucket never holds more than the burst
+    clock.now += 3600
+    assert decisions(controller, "a", 0, 3) == [
+        AdmissionDecision.ADMIT,
+        AdmissionDecision.ADMIT,
+        AdmissionDecision.REJECT,
+    ]
+
+
+def test_clients_have_their_own_bucket(clock):
+    controller = AdmissionController(degrade_depth=10, reject_depth=20, rate=6, burst=1)
+    assert controller.admit("a", 0).decision == AdmissionDecision.ADMIT
+    assert controller.admit("a", 0).decision == AdmissionDecision.REJECT
+    assert controller.admit("b", 0).decision == AdmissionDecision.ADMIT
+
+
+def test_least_recent_clients_are_dropped(clock):
+    controller = AdmissionController(
+        degrade_depth=10, reject_depth=20, rate=6, burst=1, max_clients=2
+    )
+    for client in ["a", "b", "a", "c"]:
+        controller.admit(client, 0)
+    assert list(controller.buckets) == ["a", "c"]
+    # A dropped client starts again with a full bucket
+    assert controller.admit("b", 0).decision == AdmissionDecision.ADMIT
@@ -0,0 +1,93 @@
+import os
+
+import cache
+import pytest
+from cache import ResultCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", clock)
+    return clock
+
+
+def disk_keys(directory) -> set[str]:
+    return {
+        name[: -len(".pkl")] for name in os.listdir(directory) if name.endswith(".pkl")
+    }
+
+
+def test_lru_evicts_the_least_recent(clock):
+    result_cache = ResultCache(size=2, ttl=60)
+    result_cache.set("a", 1)
+    result_cache.set("b", 2)
+    assert result_cache.get("a") == 1
+    result_cache.set("c", 3)
+    assert result_cache.get("b") is None
+    assert result_cache.get("a") == 1
+    assert result_cache.get("c") == 3
+    assert result_cache.stats() == {
+        "entries": 2,
+        "hits": 3,
+        "misses": 1,
+        "evictions": 1,
+        "expirations": 0,
+    }
+
+
+def test_entries_expire(clock):
+    result_cache = ResultCache(size=2, ttl=60)
+    result_cache.set("a", 1)
+    clock.now += 60
+    assert result_cache.get("a") == 1
+    clock.now += 1
+    assert result_cache.get("a") is None
+    assert result_cache.stats()["expirations"] == 1
+    assert result_cache.stats()["entries"] == 0
+
+
+def test_disk_tier_survives_a_restart(clock, tmp_path):
+    ResultCache(size=2, ttl=60, directory=tmp_path).set("a", {"team": [1, 2]})
+    restarted = ResultCache(size=2, ttl=60, directory=tmp_path)
+    assert restarted.get("a") == {"team": [1, 2]}
+    assert restarted.stats()["hits"] == 1
+    # Entries evicted from memory are still answered from disk
+    restarted.set("b", 2)
+    restarted.set("c", 3)
+    assert restarted.get("a") == {"team": [1, 2]}
+
+
+def test_disk_entries_expire(clock, tmp_path):
+    ResultCache(size=2, ttl=60, directory=tmp_path).set("a", 1)
+    clock.now += 61
+    restarted = ResultCache(size=2, ttl=60, directory=tmp_path)
+    assert restarted.get("a") is None
+    assert restarted.stats()["expirations"] == 1
+    assert disk_keys(tmp_path) == set()
+
+
+def test_disk_evicts_the_oldest_files(clock, tmp_path):
+    result_cache = ResultCache(size=1, ttl=60, directory=tmp_path, disk_size=2)
+    for age, key in enumerate(["a", "b"]):
+        result_cache.set(key, key)
+        os.utime(result_cache.path(key), (age, age))
+    result_cache.set("c", "c")
+    assert disk_keys(tmp_path) == {"b", "c"}
+    assert result_cache.stats()["evictions"] == 3
+
+
+def test_unreadable_disk_entries_are_misses(clock, tmp_path):
+    result_cache = ResultCache(size=2, ttl=60, directory=tmp_path)
+    with open(result_cache.path("a"), "wb") as cache_file:
+        cache_file.write(b"not a pickle")
+    assert result_cache.get("a") is None
+    assert result_cache.stats()["misses"] == 1
@@ -0,0 +1,73 @@
+import numpy as np
+
+from poketactician.Elites import EliteSet
+from poketactician.models.Team import ant_dtype
+
+
+def make_ant(species: list[int], moves: list[int] = [0, 1, 2, 3]) -> np.ndarray:
+    ant = np.empty([len(species), 5], dtype=ant_dtype)
+    ant[:, 0] = species
+    ant[:, 1:5] = moves
+    return ant
+
+
+def species_of(elites: EliteSet) -> list[set[int]]:
+    return [set(record.ant[:, 0].tolist()) for record in elites.top()]
+
+
+def test_canonical_ignores_slot_and_move_order():
+    ant = make_ant([4, 1, 3], [2, -1, 0, 1])
+    shuffled = ant[[2, 0, 1]][:, [0, 3, 1, 4, 2]]
+    canonical = EliteSet.canonical(ant)
+    assert canonical.tobytes() == EliteSet.canonical(shuffled).tobytes()
+    assert canonical[:, 0].tolist() == [1, 3, 4]
+    # Missing moves are sorted last
+    assert canonical[0, 1:].tolist() == [0, 1, 2, -1]
+
+
+def test_update_keeps_a_team_once():
+    elites = EliteSet(size=5, min_distance=1)
+    ant = make_ant([0, 1, 2, 3, 4, 5])
+    elites.update(np.array([ant, ant[::-1], ant[:, [0, 4, 3, 2, 1]]]), np.ones(3))
+    elites.update(np.array([ant[[1, 0, 2, 3, 4, 5]]]), np.ones(1))
+    assert len(elites.top()) == 1
+    assert len(elites.values) == 1
+
+
+def test_close_teams_only_replace_worse_elites():
+    elites = EliteSet(size=5, min_distance=2)
+    assert elites.add(EliteSet.canonical(make_ant([0, 1, 2, 3, 4, 5])), 10)
+    # One different pokemon is too close, the team must beat the elite to replace it
+    assert not elites.add(EliteSet.canonical(make_ant([0, 1, 2, 3, 4, 6])), 5)
+    assert species_of(elites) == [{0, 1, 2, 3, 4, 5}]
+    assert elites.add(EliteSet.canonical(make_ant([0, 1, 2, 3, 4, 6])), 20)
+    assert species_of(elites) == [{0, 1, 2, 3, 4, 6}]
+    # Two different pokemon are far enough
+    assert elites.add(EliteSet.canonical(make_ant([0, 1, 2, 3, 7, 8])), 1)
+    assert [record.value for record in elites.top()] == [20, 1]
+
+
+def test_size_keeps_the_best():
+    elites = EliteSet(size=3, min_distance=2)
+    ants = np.array([make_ant(range(6 * i, 6 * i + 6)) for i in range(6)])
+    elites.update(ants, np.array([3.0, 6.0, 1.0, 5.0, 2.0, 4.0]))
+    assert [record.value for record in elites.top()] == [6, 5, 4]
+    assert [record.value for record in elites.top(2)] == [6, 5]
+    assert not elites.add(EliteSet.canonical(make_ant(range(100, 106))), 3)
+
+
+def test_feasible_teams_rank_first():
+    elites = EliteSet(size=3, min_distance=2)
+    ants = np.array([make_ant(range(6 * i, 6 * i + 6)) for i in range(4)])
+
+    # Teams with the pokemon 0 fulfill the roles
+    def feasibility(batch):
+        return (batch[:, :, 0] == 0).any(axis=1)
+
+    elites.update(ants, np.array([1.0, 4.0, 3.0, 2.0]), feasibility)
+    assert [record.value for record in elites.top()] == [1, 4, 3]
+    assert [bool(record.feasible) for record in elites.top()] == [True, False, False]
+    # An infeasible team never replaces a close feasible one
+    assert not elites.add(EliteSet.canonical(make_ant([0, 1, 2, 3, 4, 50])), 9, False)
+    assert elites.add(EliteSet.canonical(make_ant([0, 1, 2, 3, 4, 50])), 9, True)
+    assert [record.value for record in elites.top()] == [9, 4, 3]
@@ -0,0 +1,105 @@
+import random
+
+import pytest
+from filters import (
+    FilterIndex,
+    filter_games,
+    filter_generations,
+    filter_legendaries,
+    filter_types,
+    hand_removed,
+    remove_battle_only,
+    remove_megas,
+    remove_totems,
+    split_preselected,
+)
+
+from poketactician.models.Pokemon import Pokemon
+from poketactician.models.Types import PokemonType
+
+GAMES = ["red", "gold", "ruby"]
+GENERATIONS = [[1, 40], [41, 80], [81, 120]]
+TYPES = [pokemon_type.value for pokemon_type in PokemonType]
+HAND_SELECTED = [7, 8]
+
+
+def make_pokemon_list(rng: random.Random) -> list[Pokemon]:
+    pokemon_list = []
+    for id in range(1, 121):
+        type1, type2 = rng.sample(list(PokemonType), 2)
+        pokemon_list.append(
+            Pokemon(
+                id,
+                f"pokemon-{id}-totem" if id % 23 == 0 else f"pokemon-{id}",
+                *[rng.randint(30, 150) for _ in range(6)],
+                type1,
+                type2 if rng.random() < 0.5 else None,
+                mythical=rng.random() < 0.05,
+                legendary=rng.random() < 0.05,
+                battle_only=rng.random() < 0.05,
+                mega=rng.random() < 0.05,
+                games={game: int(rng.random() < 0.7) for game in GAMES},
+            )
+        )
+    return pokemon_list
+
+
+def filter_chain(
+    pokemon_list, pre_selected, types, mono_type, generations, legendaries, games
+):
+    # The filters of the UI before the index
+    pok_list = hand_removed(pokemon_list, HAND_SELECTED)
+    pok_list = remove_megas(pok_list)
+    pok_list = remove_battle_only(pok_list)
+    pok_list = remove_totems(pok_list)
+    preselected, pok_list = split_preselected(pok_list, pre_selected)
+    pok_list = filter_types(pok_list, types, mono_type)
+    pok_list = filter_generations(pok_list, generations)
+    pok_list = filter_legendaries(pok_list, legendaries)
+    pok_list = filter_games(pok_list, games)
+    return preselected + pok_list
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_index_matches_the_filter_chain(seed):
+    rng = random.Random(seed)
+    pokemon_list = make_pokemon_list(rng)
+    index = FilterIndex(pokemon_list, HAND_SELECTED)
+    for _ in range(100):
+        selections = (
+            rng.sample(range(50), rng.randint(0, 3)),
+            rng.sample(TYPES, rng.choice([0, 0, 1, 3])),
+            rng.random() < 0.3,
+            rng.sample(GENERATIONS, rng.randint(0, 2)),
+            rng.random() < 0.5,
+            rng.sample(GAMES, rng.randint(0, 2)),
+        )
+        expected = filter_chain(pokemon_list, *selections)
+        assert [pok.id for pok in index.filter(*selections)] == [
+            pok.id for pok in expected
+        ]
+        # The preview ignores the preselection
+        expected_pool = filter_chain(pokemon_list, [], *selections[1:])
+        assert index.preview(*selections[1:], size=3) == (
+            len(expected_pool),
+            expected_pool[:3],
+        )
+
+
+def test_signatures_ignore_the_order_of_the_selections():
+    pokemon_list = make_pokemon_list(random.Random(0))
+    index = FilterIndex(pokemon_list)
+    pool = index.pool(
+        *index.signature(
+            ["fire", "water"], False, [[41, 80], [1, 40]], True, ["red", "gold"]
+        )
+    )
+    assert (
+        index.pool(
+            *index.signature(
+                ["water", "fire"], 0, [[1, 40], [41, 80]], 1, ["gold", "red"]
+            )
+        )
+        is pool
+    )
+    assert not pool.flags.writeable
@@ -0,0 +1,139 @@
+import numpy as np
+import pytest
+
+from poketactician import kernels
+from poketactician.kernels import KernelBackend
+
+BACKENDS = kernels.available_backends()
+
+
+@pytest.fixture(autouse=True)
+def restore_backend():
+    backend = kernels.backend
+    yield
+    kernels.set_backend(backend)
+
+
+def segments(rng, pokemon, low, high):
+    counts = rng.integers(low, high, pokemon)
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    return offsets, counts
+
+
+def kernel_arguments(rng):
+    """
+    Arguments of every kernel on a random problem of 30 pokemon and 50 ants of 6 slots.
+    """
+    pokemon, ants, team_size = 30, 50, 6
+    probabilities = rng.random(pokemon)
+    probabilities[rng.random(pokemon) < 0.3] = 0
+    species = rng.integers(0, pokemon, [ants, team_size])
+    species[:, 0] = 0
+
+    move_offsets, move_counts = segments(rng, pokemon, 1, 12)
+    move_counts[0] = 8
+    preselected_moves = np.full([team_size, 4], -1)
+    preselected_moves[0, :2] = [1, 5]
+    preselected_counts = (preselected_moves >= 0).sum(axis=1)
+
+    moveset_offsets, moveset_counts = segments(rng, pokemon, 1, 5)
+
+    team = np.zeros([ants, team_size, 5], dtype=np.int16)
+    team[..., 0] = species
+    team[..., 1:5] = rng.integers(-1, 10, [ants, team_size, 4])
+    return {
+        "sample_pokemon": (probabilities, np.array([3, 7]), 1 - rng.random([ants, 5])),
+        "sample_moves": (
+            species,
+            1 - rng.random([ants, team_size, 4]),
+            rng.random(move_counts.sum()),
+            move_offsets,
+            move_counts,
+            preselected_moves,
+            preselected_counts,
+        ),
+        "sample_movesets": (
+            species,
+            1 - rng.random([ants, team_size]),
+            rng.random(moveset_counts.sum()),
+            moveset_offsets,
+            moveset_counts,
+            rng.integers(-1, 10, [moveset_counts.sum(), 4]),
+        ),
+        "attack_values": (rng.random([pokemon, 11]), team),
+        "coverage_values": (
+            rng.integers(0, 2, [pokemon, 18]),
+            rng.integers(0, 2, [pokemon, 18]),
+            rng.random([pokemon, 18]) < 0.1,
+            team,
+        ),
+    }
+
+
+@pytest.mark.skipif(
+    KernelBackend.NUMBA not in BACKENDS, reason="numba is not installed"
+)
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize(
+    "kernel",
+    [
+        "sample_pokemon",
+        "sample_moves",
+        "sample_movesets",
+        "attack_values",
+        "coverage_values",
+    ],
+)
+def test_backends_are_bit_identical(kernel, seed):
+    arguments = kernel_arguments(np.random.default_rng(seed))[kernel]
+    results = []
+    for backend in BACKENDS:
+        kernels.set_backend(backend)
+        results.append(getattr(kernels, kernel)(*arguments))
+    assert results[0].dtype == results[1].dtype
+    assert results[0].tobytes() == results[1].tobytes()
+
+
+@pytest.mark.skipif(
+    KernelBackend.NUMBA not in BACKENDS, reason="numba is not installed"
+)
+def test_deposit_backends_are_bit_identical():
+    rng = np.random.default_rng(0)
+    indices = rng.integers(0, 50, 500)
+    deltas = rng.random(500)
+    initial = rng.random(50)
+    pheromones = [initial.copy() for _ in BACKENDS]
+    for backend, values in zip(BACKENDS, pheromones):
+        kernels.set_backend(backend)
+        kernels.deposit(values, indices, deltas)
+    assert pheromones[0].tobytes() == pheromones[1].tobytes()
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_sample_pokemon_without_replacement(backend):
+    kernels.set_backend(backend)
+    rng = np.random.default_rng(0)
+    preselected = np.array([0, 5])
+    species = kernels.sample_pokemon(
+        rng.random(20), preselected, 1 - rng.random([200, 4])
+    )
+    for team in species:
+        assert len(set(team.tolist())) == 4
+        assert not set(team.tolist()) & set(preselected.tolist())
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_sample_pokemon_with_exhausted_weights(backend):
+    # Only two pokemon have a positive weight, the other slots are drawn among the pokemon not in the team
+    kernels.set_backend(backend)
+    probabilities = np.zeros(10)
+    probabilities[[2, 3]] = 1
+    preselected = np.array([0, 5])
+    species = kernels.sample_pokemon(
+        probabilities, preselected, 1 - np.random.default_rng(0).random([200, 5])
+    )
+    for team in species:
+        assert len(set(team.tolist())) == 5
+        assert {2, 3} <= set(team.tolist())
+        assert not set(team.tolist()) & set(preselected.tolist())
+    assert set(species[:, 2:].ravel().tolist()) == {1, 4, 6, 7, 8, 9}
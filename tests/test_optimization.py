@@ -0,0 +1,69 @@
+import pytest
+from conftest import HAS_POKEMON_DATA
+
+if not HAS_POKEMON_DATA:
+    pytest.skip("data/pokemon_data.json is not built", allow_module_level=True)
+
+from optimization import request_key
+
+REQUEST = {
+    "obj_funcs_param": ["Attack", "Team Coverage"],
+    "included_types": ["fire", "water"],
+    "generations": [[1, 151], [152, 251]],
+    "games": ["red", "blue"],
+    "mono_type": False,
+    "include_legendaries": True,
+    "strategy": None,
+    "roles": ["is_wall", "is_tank"],
+    "pre_selected": [25, None, 6, None, None, None],
+    "pre_selected_moves": [1, 2, None, None]
+    + [None] * 4
+    + [3, None, None, None]
+    + [None] * 12,
+}
+
+
+def key(**changes) -> str:
+    return request_key(**{**REQUEST, **changes})
+
+
+def test_order_of_the_selections_does_not_change_the_key():
+    assert (
+        key(
+            obj_funcs_param=["Team Coverage", "Attack"],
+            included_types=["water", "fire"],
+            generations=[[152, 251], [1, 151]],
+            games=["blue", "red"],
+            roles=["is_tank", "is_wall"],
+        )
+        == key()
+    )
+
+
+def test_equivalent_selections_give_the_same_key():
+    moves = list(REQUEST["pre_selected_moves"])
+    # Preselected moves in another order, and moves of an empty slot
+    moves[0], moves[1] = moves[1], moves[0]
+    moves[4] = 7
+    assert key(pre_selected_moves=moves) == key()
+    assert key(strategy="") == key()
+    assert key(included_types=None, generations=None, games=None, roles=None) == key(
+        included_types=[], generations=[], games=[], roles=[]
+    )
+    assert key(mono_type=0, include_legendaries=1) == key()
+
+
+def test_different_problems_give_different_keys():
+    keys = {
+        key(),
+        key(obj_funcs_param=["Attack"]),
+        key(included_types=["fire"]),
+        key(games=["red"]),
+        key(mono_type=True),
+        key(include_legendaries=False),
+        key(strategy="Offensive"),
+        key(roles=["is_wall"]),
+        key(pre_selected=[6, None, 25, None, None, None]),
+        key(pre_selected_moves=[1, None, None, None] + [None] * 20),
+    }
+    assert len(keys) == 10
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+from conftest import HAS_POKEMON_DATA
+
+if not HAS_POKEMON_DATA:
+    pytest.skip("data/pokemon_data.json is not built", allow_module_level=True)
+
+from poketactician.engines import SolverEngine, create_solver
+from poketactician.models import Roles
+from poketactician.models.Move import DamageClass, Move
+from poketactician.models.Pokemon import Pokemon
+from poketactician.models.Types import PokemonType
+from poketactician.objectives import ObjectiveFunctions
+
+ROLE = "is_stat_absorber_burn"
+
+
+def make_pokemon(id: int, pokemon_type: PokemonType, power: int) -> Pokemon:
+    pokemon = Pokemon(
+        id,
+        f"pokemon-{id}",
+        80,
+        100,
+        80,
+        100,
+        80,
+        80,
+        pokemon_type,
+        None,
+        False,
+        False,
+        False,
+        False,
+    )
+    for i in range(6):
+        pokemon.add_knowable_move(
+            Move(
+                str(id * 10 + i),
+                f"move-{id}-{i}",
+                pokemon_type,
+                DamageClass.PHYSICAL,
+                power + i,
+            )
+        )
+    return pokemon
+
+
+def make_pool(size: int) -> list[Pokemon]:
+    """
+    Pool of strong water pokemon and two weak fire pokemon, the only ones fulfilling ROLE.
+    """
+    strong = [make_pokemon(id, PokemonType.WATER, 100) for id in range(1, size - 1)]
+    weak = [make_pokemon(id, PokemonType.FIRE, 40) for id in (size - 1, size)]
+    return strong + weak
+
+
+def solve(engine: SolverEngine, pool: list[Pokemon], roles: list[str]):
+    objective = ObjectiveFunctions.ATTACK
+    solver = create_solver(
+        engine,
+        60,
+        [objective.get_function(pool)],
+        pool,
+        [],
+        [],
+        1,
+        1,
+        roles=roles,
+        batch_objective_functions=[objective.get_batch_function(pool)],
+        objective_structures=[objective.get_pool_structures(pool, 1)],
+        local_search_evaluations=200,
+        seed=0,
+    )
+    solver.optimize(iters=5)
+    return solver
+
+
+def fulfills_role(team) -> bool:
+    return any(pokemon.is_role(getattr(Roles, ROLE)) > 0 for pokemon in team.pokemons)
+
+
+# 62 pokemon are searched by the engines, 10 are enumerated exactly
+@pytest.mark.parametrize("size", [62, 10])
+@pytest.mark.parametrize("engine", list(SolverEngine))
+def test_best_team_fulfills_roles(engine, size):
+    pool = make_pool(size)
+    assert not fulfills_role(solve(engine, pool, []).get_solution())
+
+    solver = solve(engine, pool, [ROLE])
+    assert fulfills_role(solver.get_solution())
+    assert solver.feasibility(solver.best_so_far[None])[0]
+    # The distinct teams of the run rank the ones fulfilling the roles first, whatever their values
+    feasible = solver.feasibility(
+        np.array([record.ant for record in solver.elites.top()])
+    )
+    assert feasible[0] and (feasible[:-1] >= feasible[1:]).all()